@@ -0,0 +1,160 @@
+# Import python libraries
+import numpy as np
+
+# Import our own files
+import highspeed_proxies as hspx		# Performance proxies
+import profiling as prf					# Per-stage timing counters
+from representation_homo import HomoPlacement
+from representation_hetero import HeteroPlacement
+from network import chiplet_types
+
+# Placement representations whose genomes can be evaluated in batches
+representations = {
+	"homogeneous" : HomoPlacement,
+	"heterogeneous" : HeteroPlacement,
+}
+
+# Construct the padded adjacency of a batch of networks: Entry (b,v,k) is the k-th neighbor of chiplet v in network b.
+# Neighbors are sorted by chiplet-id, unused entries are set to n (a padding-chiplet that is never reached).
+def get_padded_adjacency(networks):
+	n = networks[0].n
+	csrs = [network.get_adjacency() for network in networks]
+	deg = max([int(np.diff(offsets).max()) for (offsets, indices) in csrs])
+	neighbors = np.full((len(networks), n, deg), n, dtype = np.int64)
+	for (b, (offsets, indices)) in enumerate(csrs):
+		owners = np.repeat(np.arange(n), np.diff(offsets))
+		neighbors[b, owners, np.arange(len(indices)) - offsets[owners]] = indices
+	return neighbors
+
+# Gather entry (b,s,neighbors[b,v,k]) of a tensor with a padding-column for each (b,s,v,k)
+def gather_neighbors(tensor, neighbors):
+	(n_nw, n, deg) = neighbors.shape
+	idx = np.broadcast_to(neighbors.reshape(n_nw, 1, n * deg), (n_nw, tensor.shape[1], n * deg))
+	return np.take_along_axis(tensor, idx, axis = 2).reshape(n_nw, tensor.shape[1], n, deg)
+
+# Run one BFS per source and network in lockstep. Messages are only forwarded by the source and by relay-chiplets.
+# Entry (b,s,v) of the returned tensor is the number of hops from s to v in network b (-1 if unreachable).
+def compute_hop_tensor(neighbors, forwarding):
+	(n_nw, n, deg) = neighbors.shape
+	# Dense adjacency matrices: A chiplet is reached if one of its neighbors forwards, which is a batched matrix product
+	adjacency = np.zeros((n_nw, n + 1, n + 1), dtype = np.float32)
+	adjacency[np.arange(n_nw)[:, None, None], np.arange(n)[None, :, None], neighbors] = 1
+	adjacency = adjacency[:, :n, :n]
+	forwarding = forwarding[:, :, :n]
+	is_source = np.eye(n, dtype = bool)
+	hops = np.full((n_nw, n, n), -1, dtype = np.int32)
+	hops[:, is_source] = 0
+	frontier = np.broadcast_to(is_source, (n_nw, n, n))
+	level = 0
+	while frontier.any():
+		level += 1
+		reached = np.matmul((frontier & forwarding).astype(np.float32), adjacency) > 0
+		frontier = reached & (hops < 0)
+		hops[frontier] = level
+	return hops
+
+# Entry (b,s,v,k) is True if the k-th neighbor of v is a predecessor of v on a shortest path from s in network b
+def compute_predecessor_tensor(neighbors, forwarding, hops):
+	(n_nw, n, deg) = neighbors.shape
+	padded_hops = np.concatenate([hops, np.full((n_nw, n, 1), -1, dtype = hops.dtype)], axis = 2)
+	pred_hops = gather_neighbors(padded_hops, neighbors)
+	return gather_neighbors(forwarding, neighbors) & (pred_hops >= 0) & (pred_hops + 1 == hops[:, :, :, None])
+
+# Greedily construct the reversed paths of one traffic class in all networks in lockstep. The predecessors of a
+# chiplet are visited in the same order as in compute_highspeed_proxies, hence, the same paths are selected.
+# Returns the maximum number of paths sharing a link for each (source-position, destination-position, network).
+def assign_class_paths(src_ids, dst_ids, same_type, neighbors, preds, hops):
+	(n_nw, n, deg) = neighbors.shape
+	nws = np.arange(n_nw)
+	# Links are identified by global slots b * n_slots + v * deg + k, each network has a padding-slot which is used
+	# for non-predecessors and by networks whose path is already complete
+	n_slots = n * deg + 1
+	pad = nws * n_slots + n * deg
+	slots = (nws[:, None] * n_slots + np.arange(n * deg)[None, :]).reshape(n_nw, n, deg)
+	targets = np.append(neighbors.reshape(n_nw, n * deg) + nws[:, None] * n, pad[:, None], axis = 1).reshape(-1)
+	counts = np.zeros(n_nw * n_slots, dtype = np.int64)
+	counts[pad] = np.iinfo(np.int32).max
+	# Number of steps of the longest path of each (source, destination) pair over all networks
+	path_hops = hops[nws[:, None, None], src_ids[:, :, None], dst_ids[:, None, :]]
+	steps = path_hops.max(axis = 0)
+	row_offsets = nws * deg
+	paths = np.broadcast_to(pad, (src_ids.shape[1], dst_ids.shape[1], max(int(steps.max()), 1), n_nw)).copy()
+	for i in range(src_ids.shape[1]):
+		src = nws * n + src_ids[:, i]
+		# Predecessor-slots of each chiplet, a network whose path is complete stays at its source
+		pred_slots = np.where(preds[nws, src_ids[:, i]], slots, pad[:, None, None]).reshape(n_nw * n, deg)
+		targets[pad] = src
+		for j in range(dst_ids.shape[1]):
+			if same_type and i == j:
+				continue
+			cur = nws * n + dst_ids[:, j]
+			for step in range(steps[i, j]):
+				cand = pred_slots.take(cur, axis = 0)
+				# Select predecessor to greedily minimize path count per link
+				best = cand.take(counts.take(cand).argmin(axis = 1) + row_offsets)
+				counts[best] += 1
+				paths[i, j, step] = best
+				cur = targets.take(best)
+	# Count the paths on the most congested link of each path
+	counts[pad] = 0
+	return counts[paths].max(axis = 2)
+
+# Compute the performance proxies of a batch of valid networks of placements with the same chiplets in vectorized
+# passes. Returns an array of costs and a list of evaluations, both are identical to the ones of compute_highspeed_proxies
+@prf.timed("proxies_batch")
+def evaluate_networks(areas, networks, params):
+	prf.count("evaluations", len(networks))
+	n_nw = len(networks)
+	n = networks[0].n
+	nws = np.arange(n_nw)
+	types = np.array([network.types for network in networks])
+	relay_mask = np.array([network.relay_mask for network in networks])
+	neighbors = get_padded_adjacency(networks)
+	# Entry (b,s,u) is True if chiplet u forwards messages from source s in network b, the last column is padding
+	forwarding = np.zeros((n_nw, n, n + 1), dtype = bool)
+	forwarding[:, :, :n] = relay_mask[:, None, :] | np.eye(n, dtype = bool)[None, :, :]
+	hops = compute_hop_tensor(neighbors, forwarding)
+	preds = compute_predecessor_tensor(neighbors, forwarding, hops)
+	cid_subsets = {letter : np.nonzero(types == chiplet_types.index(letter))[1].reshape(n_nw, -1) for letter in chiplet_types}
+	latencies = {}
+	throughputs = {}
+	for tc in hspx.traffic_classes:
+		# Reversed paths start at a chiplet of type tc[-1] and end at one of type tc[0]
+		(src_ids, dst_ids) = (cid_subsets[tc[-1]], cid_subsets[tc[0]])
+		max_counts = assign_class_paths(src_ids, dst_ids, tc[0] == tc[-1], neighbors, preds, hops)
+		path_hops = hops[nws[:, None, None], src_ids[:, :, None], dst_ids[:, None, :]]
+		# Per-source latencies and throughputs, the sums are accumulated in the same order as in compute_highspeed_proxies
+		latencies[tc] = []
+		throughputs[tc] = []
+		for j in range(dst_ids.shape[1]):
+			others = [i for i in range(src_ids.shape[1]) if tc[0] != tc[-1] or i != j]
+			h = path_hops[:, others, j].sum(axis = 1) / len(others)
+			latencies[tc].append((h-1) * params["L_relay"] + 2 * h * params["L_phy"] + h * params["L_link"])
+			# A cumulative sum adds the throughputs one after the other like the built-in sum
+			acc_tps = np.cumsum(1 / max_counts[others, j], axis = 0)[-1]
+			throughputs[tc].append(acc_tps / len(params["phys"][tc[0]]))
+	(costs, results) = hspx.aggregate_results(np.array(areas), latencies, throughputs, params)
+	evaluations = [{metric : (areas[b] if metric == "area" else float(results[metric][b])) for metric in results} for b in range(n_nw)]
+	return (costs, evaluations)
+
+# Compute the performance proxies of all placements whose evaluation was deferred
+def evaluate_placements(placements, params):
+	pending = [placement for placement in placements if placement.pending != None]
+	if len(pending) == 0:
+		return
+	(costs, evaluations) = evaluate_networks([placement.get_area() for placement in pending], [placement.pending for placement in pending], params)
+	for (placement, cost, evaluation) in zip(pending, costs.tolist(), evaluations):
+		placement.set_evaluation(cost, evaluation)
+
+# Compute the performance proxies of all instances whose evaluation was deferred
+def evaluate_instances(instances, params):
+	evaluate_placements([instance.sub_instance for instance in instances], params)
+
+# Evaluate a list of genomes, i.e., (grid, phys) for homogeneous and (types, rotations) for heterogeneous placements.
+# Returns an array of costs (NaN for invalid genomes) and a list of evaluations (None for invalid genomes).
+def evaluate_batch(genomes, params):
+	placements = [representations[params["representation"]](params, genome[0], genome[1], deferred = True) for genome in genomes]
+	evaluate_placements(placements, params)
+	costs = np.array([placement.cost if placement.is_valid else float("NaN") for placement in placements])
+	evaluations = [placement.eval if placement.is_valid else None for placement in placements]
+	return (costs, evaluations)
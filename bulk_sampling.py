@@ -0,0 +1,155 @@
+# Import python libraries
+import sys
+import random as rnd
+import numpy as np
+
+# Import our own files
+import profiling as prf							# Per-stage timing counters
+import genomes as gen							# Integer-coded genomes
+import batch_evaluation as bev					# Batched evaluation of the performance proxies
+from instance import Instance					# Instance-Class
+from representation_homo import HomoPlacement
+from representation_hetero import HeteroPlacement
+from representation_hetero import decoders		# Decoders of heterogeneous placements
+from representation_hetero import rotation_choices
+from generators import get_valid_sides			# Sides that a 1-PHY chiplet can face
+from geometry import get_template				# Rotated sizes and PHY-offsets of the chiplet types
+from geometry import fixed_point				# Scale of fixed-point PHY coordinates
+
+# Bulk sampling of random placements: A whole batch of genomes is drawn as NumPy arrays with the same distribution as
+# the rejection sampler, all links of the batch are extracted at once and the chiplets that the validation reaches
+# are found by propagating labels over the links in lockstep. Only the genomes that pass are constructed and evaluated.
+
+# Return a NumPy generator that is seeded from the random module, i.e., reproducible with rnd.seed
+def get_generator():
+	return np.random.default_rng(rnd.getrandbits(64))
+
+# Return a batch of random permutations of a multiset of codes (one row per genome)
+def draw_permutations(rng, codes, size):
+	order = np.argsort(rng.random((size, len(codes))), axis = 1)
+	return np.array(codes, dtype = np.int8)[order]
+
+# Propagate the label "reached" from the start chiplets until it is stable. Only relay-chiplets forward the label, spread
+# returns the chiplets that are linked to the given forwarding chiplets. Works on any array layout with a leading batch axis.
+def propagate_labels(reached, relay, spread):
+	while True:
+		new = reached | spread(reached & relay)
+		if (new == reached).all():
+			return reached
+		reached = new
+
+# Draw a batch of homogeneous genomes and return (grids, phys, valid) as int8-arrays of shape (size, rows, cols) and a
+# boolean array. A genome is valid if its network passes Network.validate.
+@prf.timed("bulk_sampling")
+def sample_homo_genomes(params, size):
+	(rows, cols) = (params["rows"], params["cols"])
+	counts = {"C" : params["n_compute"], "M" : params["n_memory"], "I" : params["n_io"]}
+	if sum(counts.values()) > rows * cols:
+		print("ERROR: Too many chiplet for given size")
+		sys.exit()
+	if any([len(params["phys"][typ]) not in [1, 4] for typ in counts if counts[typ] > 0]):
+		print("ERROR: Chiplets in the homogeneous placement can only have 1 or four PHYs")
+		sys.exit()
+	rng = get_generator()
+	cells = [typ for typ in ["C","M","I"] for i in range(counts[typ])] + ["X"] * (rows * cols - sum(counts.values()))
+	grids = draw_permutations(rng, [gen.grid_codes[typ] for typ in cells], size).reshape(size, rows, cols)
+	# Each 1-PHY chiplet faces one of the valid sides of its cell with equal probability
+	valid_sides = [[gen.phys_codes[side] for side in get_valid_sides(rows, cols, row, col)] for row in range(rows) for col in range(cols)]
+	n_sides = np.array([len(sides) for sides in valid_sides]).reshape(rows, cols)
+	side_table = np.array([sides + [sides[0]] * (4 - len(sides)) for sides in valid_sides], dtype = np.int8).reshape(rows, cols, 4)
+	choice = (rng.random((size, rows, cols)) * n_sides).astype(np.int64)
+	sides = np.take_along_axis(side_table[None,:,:,:], choice[:,:,:,None], axis = 3)[:,:,:,0]
+	single = np.isin(grids, [gen.grid_codes[typ] for typ in counts if len(params["phys"][typ]) == 1])
+	occupied = grids != gen.grid_codes["X"]
+	phys = np.where(single, sides, np.where(occupied, gen.phys_codes["A"], gen.phys_codes["X"])).astype(np.int8)
+	# Links between horizontally and vertically neighboring cells of all genomes
+	(A, N, E, S, W) = [gen.phys_codes[x] for x in ["A","N","E","S","W"]]
+	east = occupied[:,:,:-1] & occupied[:,:,1:] & np.isin(phys[:,:,:-1], [A, E]) & np.isin(phys[:,:,1:], [A, W])
+	north = occupied[:,:-1,:] & occupied[:,1:,:] & np.isin(phys[:,:-1,:], [A, N]) & np.isin(phys[:,1:,:], [A, S])
+	def spread(forwarding):
+		reached = np.zeros(forwarding.shape, dtype = bool)
+		reached[:,:,1:] |= forwarding[:,:,:-1] & east
+		reached[:,:,:-1] |= forwarding[:,:,1:] & east
+		reached[:,1:,:] |= forwarding[:,:-1,:] & north
+		reached[:,:-1,:] |= forwarding[:,1:,:] & north
+		return reached
+	# The validation starts at the first compute-chiplet (row by row)
+	flat = grids.reshape(size, rows * cols)
+	start = np.argmax(flat == gen.grid_codes["C"], axis = 1) if counts["C"] > 0 else np.argmax(flat != gen.grid_codes["X"], axis = 1)
+	reached = np.zeros((size, rows * cols), dtype = bool)
+	reached[np.arange(size), start] = True
+	relay = np.isin(grids, [gen.grid_codes[typ] for typ in params["relay_chiplets"]])
+	reached = propagate_labels(reached.reshape(size, rows, cols), relay, spread)
+	valid = (reached == occupied).all(axis = (1,2))
+	return (grids, phys, valid)
+
+# Draw a batch of heterogeneous genomes and return (types, rotations, candidate) as int8-arrays of shape (size, n) and a
+# boolean array. The genomes are decoded one by one, the links are then checked for all of them at once: Two chiplets can
+# only be linked if the bounding boxes of their PHYs are at most max_length apart. A genome is a candidate if the labels
+# propagated over these potential links reach all chiplets, which is necessary (but not sufficient) for its validity.
+@prf.timed("bulk_sampling")
+def sample_hetero_genomes(params, size):
+	decoder = params["hetero_decoder"]
+	if decoder not in decoders:
+		print("ERROR: Invalid heterogeneous decoder \"%s\"" % decoder)
+		sys.exit()
+	rng = get_generator()
+	letters = [typ for typ in ["C","M","I"] for i in range(params[{"C" : "n_compute", "M" : "n_memory", "I" : "n_io"}[typ]])]
+	types = draw_permutations(rng, [gen.type_codes[typ] for typ in letters], size)
+	# Each chiplet takes one of the rotations of its rotation behaviour with equal probability
+	n_choices = np.array([len(rotation_choices[params["rotation_behaviour"][typ]]) for typ in gen.type_letters])
+	rotations = (rng.random(types.shape) * n_choices[types]).astype(np.int8)
+	# Decode the genomes and compute the bounding boxes of the PHYs of each chiplet
+	n = len(letters)
+	(low, high) = (np.zeros((size, n, 2)), np.zeros((size, n, 2)))
+	boxes = {}
+	for (typ, rot) in set(zip(types.ravel().tolist(), rotations.ravel().tolist())):
+		(chiplet_size, offsets) = get_template(params, gen.type_letters[typ], 90 * rot)
+		boxes[(typ, rot)] = (chiplet_size, offsets.min(axis = 0) / fixed_point, offsets.max(axis = 0) / fixed_point)
+	for b in range(size):
+		packer = decoders[decoder]()
+		for (i, key) in enumerate(zip(types[b].tolist(), rotations[b].tolist())):
+			(chiplet_size, box_low, box_high) = boxes[key]
+			pos = packer.place(chiplet_size[0], chiplet_size[1])
+			(low[b,i], high[b,i]) = (box_low + pos, box_high + pos)
+	# Potential links of all genomes: Gap between the boxes of each pair of chiplets along both axes
+	gap = np.maximum(0, np.maximum(low[:,None,:,:] - high[:,:,None,:], low[:,:,None,:] - high[:,None,:,:]))
+	dist = np.sqrt((gap * gap).sum(axis = 3)) if params["dist_type"] == "euclidean" else gap.sum(axis = 3)
+	adjacency = dist <= params["max_length"] * (1 + 1e-9)
+	adjacency[:, np.arange(n), np.arange(n)] = False
+	spread = lambda forwarding : (adjacency & forwarding[:,None,:]).any(axis = 2)
+	# The validation starts at the first compute-chiplet
+	start = np.argmax(types == gen.type_codes["C"], axis = 1)
+	reached = np.zeros((size, n), dtype = bool)
+	reached[np.arange(size), start] = True
+	relay = np.isin(types, [gen.type_codes[typ] for typ in params["relay_chiplets"]])
+	candidate = propagate_labels(reached, relay, spread).all(axis = 1)
+	return (types, rotations, candidate)
+
+# Draw a batch of random genomes and return the valid ones as evaluated instances
+def sample_batch(typ, params, size):
+	if typ == "homogeneous":
+		(grids, phys, valid) = sample_homo_genomes(params, size)
+		placements = [HomoPlacement(params, grids[b].copy(), phys[b].copy(), deferred = params["batch_evaluation"]) for b in np.flatnonzero(valid)]
+	elif typ == "heterogeneous":
+		(types, rotations, candidate) = sample_hetero_genomes(params, size)
+		placements = [HeteroPlacement(params, types[b].copy(), rotations[b].copy(), deferred = params["batch_evaluation"]) for b in np.flatnonzero(candidate)]
+	else:
+		print("ERROR: Bulk sampling is not supported for the representation \"%s\"" % typ)
+		sys.exit()
+	instances = []
+	for placement in placements:
+		if placement.is_valid:
+			placement.origin = "random"
+			instances.append(Instance(typ, params, placement))
+	bev.evaluate_instances(instances, params)
+	prf.count("random_attempts", size)
+	prf.count("random_placements", len(instances))
+	return instances
+
+# Return n random instances that are drawn in batches of params["bulk_batch"] genomes
+def sample_instances(typ, params, n):
+	instances = []
+	while len(instances) < n:
+		instances += sample_batch(typ, params, params["bulk_batch"])
+	return instances[:n]
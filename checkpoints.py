@@ -0,0 +1,64 @@
+# Import python libraries
+import os
+import random as rnd
+import numpy as np
+
+# Import our own files
+import placeit_helpers as hlp
+import profiling as prf
+from instance import instance_from_genome
+
+# Checkpoints of interrupted optimizer runs: The state of a run is written to checkpoints/<save_name>.json every
+# checkpoint_interval seconds of CPU time and removed once the results are stored. Together with the state of the
+# optimizer, a checkpoint holds the state of the random number generator and the profile of the run.
+
+checkpoint_dir = "checkpoints"
+
+# Return the path of the checkpoint of a run
+def get_path(save_name):
+	return "%s/%s.json" % (checkpoint_dir, save_name)
+
+# Return True if a checkpoint is due, i.e., checkpoint_interval seconds have passed since the last one
+def is_due(params, duration, last_checkpoint):
+	return params["checkpoint_interval"] > 0 and duration - last_checkpoint >= params["checkpoint_interval"]
+
+# Store the state of a run. The checkpoint is written to a temporary file first which then replaces the previous
+# checkpoint, hence, an interruption never leaves a partially written checkpoint.
+def save_checkpoint(save_name, state):
+	os.makedirs(checkpoint_dir, exist_ok = True)
+	state = dict(state)
+	state["rng"] = rnd.getstate()
+	state["profile"] = {"stages" : prf.profile.stages, "counters" : prf.profile.counters}
+	path = get_path(save_name)
+	hlp.write_file(path + ".tmp", state)
+	os.replace(path + ".tmp", path)
+
+# Load the state of a run and restore the random number generator and the profile. Returns None if there is no checkpoint.
+def load_checkpoint(save_name):
+	path = get_path(save_name)
+	if not os.path.exists(path):
+		return None
+	state = hlp.read_file(path)
+	(version, internal, gauss) = state["rng"]
+	rnd.setstate((version, tuple(internal), gauss))
+	prf.profile.stages = state["profile"]["stages"]
+	prf.profile.counters = state["profile"]["counters"]
+	print("Resuming \"%s\" after %.1f seconds" % (save_name, state["duration"]))
+	return state
+
+# Remove the checkpoint of a run whose results are stored
+def remove_checkpoint(save_name):
+	if os.path.exists(get_path(save_name)):
+		os.remove(get_path(save_name))
+
+# Convert an instance to an entry of a checkpoint: Its genome, evaluation and origin
+def encode_instance(inst):
+	genome = inst.get_genome()
+	return {"genome" : [genome[0].tolist(), genome[1].tolist()], "cost" : inst.get_cost(), "eval" : inst.get_eval(), "origin" : inst.get_origin()}
+
+# Restore an instance from an entry of a checkpoint without evaluating it again
+def decode_instance(typ, params, entry):
+	genome = (np.array(entry["genome"][0], dtype = np.int8), np.array(entry["genome"][1], dtype = np.int8))
+	inst = instance_from_genome(typ, params, genome, known = (True, entry["cost"], entry["eval"]))
+	inst.sub_instance.origin = entry["origin"]
+	return inst
@@ -0,0 +1,48 @@
+# Import python libraries
+import sys
+import copy
+import time
+import random as rnd
+
+# Import our own files
+import config as cfg						# Configuration
+import placeit_helpers as hlp				# Helpers
+import evaluation_cache as evc				# Cache of evaluated placements
+import profiling as prf						# Per-stage timing counters
+from instance import Instance				# Instance-Class
+
+# Random generators to compare: Name, value of params["random_generator"] and value of params["generator_mixing"]
+generators = [("rejection", "rejection", 0), ("constructive", "constructive", 0), ("constructive_mixed", "constructive", 5)]
+metrics = ["c2c_lat","c2c_tp","c2m_lat","c2m_tp","c2i_lat","c2i_tp","m2i_lat","m2i_tp","area"]
+
+# Generate random placements with each generator and report the acceptance rate (valid placements per generated
+# placement), the time per valid placement and the mean of each metric (which should match for unbiased generators)
+def compare_random_generators(exp, samples):
+	results = {}
+	for (name, generator, mixing) in generators:
+		params = copy.deepcopy(cfg.experiment_list[exp])
+		params["experiment"] = exp
+		if params["representation"] == "heterogeneous":
+			params["rotation_behaviour"] = hlp.compute_rotation_behaviour(params)
+		params["cf_normalizers"] = {metric : 1 for metric in metrics}
+		(params["random_generator"], params["generator_mixing"]) = (generator, mixing)
+		rnd.seed(0)
+		evc.reset_cache(params)
+		prf.reset_profile()
+		start = time.process_time()
+		instances = [Instance(params["representation"], params) for i in range(samples)]
+		duration = time.process_time() - start
+		counters = prf.profile.counters
+		results[name] = {
+			"acceptance_rate" : counters["random_placements"] / counters["random_attempts"],
+			"seconds_per_placement" : duration / samples,
+			"mean_eval" : {metric : sum([inst.get_eval()[metric] for inst in instances]) / samples for metric in metrics},
+		}
+		print("%s %-20s acceptance rate: %.3f, %.4f s per placement" % (exp, name, results[name]["acceptance_rate"], results[name]["seconds_per_placement"]))
+	return results
+
+# If this script is called directly
+if __name__ == "__main__":
+	# The number of placements per generator and experiment can be passed as a command line argument
+	samples = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+	hlp.write_file("results/random_generators.json", {exp : compare_random_generators(exp, samples) for exp in cfg.experiment_list})
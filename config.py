@@ -14,6 +14,8 @@ plotting_color_map = {
 	"br": "#000000",	# Best random optimizer
 	"ga": "#000099",	# Genetic algorithm optimizer
 	"sa": "#009900",	# Simulated annealing optimizer
+	"pt": "#999900",	# Parallel tempering optimizer
+	"ig": "#990099",	# Island genetic algorithm optimizer
 	"bl": "#990000",	# Baseline
 }
 
@@ -22,6 +24,8 @@ plotting_linestyle_map = {
 	"br": "solid",			# Best random optimizer
 	"ga": (0, (2, 1)),		# Genetic algorithm optimizer
 	"sa": (0, (1, 0.5)),	# Simulated annealing optimizer
+	"pt": (0, (3, 1, 1, 1)),# Parallel tempering optimizer
+	"ig": (0, (2, 2)),		# Island genetic algorithm optimizer
 	"bl":  (0, (3, 1)),		# Baseline 
 }
 
@@ -112,6 +116,21 @@ params_32cores_homo = {
 	"L_relay"		: 10,						# Latency of relaying a message through a chiplet [cycles]
 	"L_phy"			: 12,						# Latency of a PHY
 	"L_link"		: 1,						# Latency of a link
+	"proxy_backend"	: "bfs",					# Backend of the performance proxies: dijkstra or bfs
+	"delta_evaluation" : True,				# Re-evaluate mutants incrementally based on the evaluation of their parent
+	"delta_max_changes" : 16,				# Maximum number of changed links and chiplets for an incremental evaluation
+	"eval_cache_size" : 10000,				# Number of evaluations kept in the evaluation cache (0 disables the cache)
+	"batch_evaluation" : True,				# Evaluate random populations and offspring in vectorized batches
+	"canonical_hash" : False,				# Treat mirrored and rotated homogeneous placements as identical
+	"hetero_decoder" : "corner",			# Decoder of heterogeneous placements: corner or skyline
+	"decoder_checkpoints" : 8,				# Decoder checkpoints kept per heterogeneous placement (0 disables resuming)
+	"move_screening" : True,				# Reject provably invalid homogeneous mutants before evaluating them
+	"prefilter" : True,						# Reject placements that violate cheap necessary conditions before extracting their network
+	"random_generator" : "rejection",		# Random placements: rejection (retry uniform placements) or constructive
+	"generator_mixing" : 0,					# Validity-preserving moves per chiplet applied to constructed placements
+	"bulk_sampling" : False,				# Draw random placements in vectorized batches (best random and normalizers)
+	"bulk_batch" : 256,						# Number of genomes drawn per batch by the bulk sampler
+	"checkpoint_interval" : 600,				# CPU seconds between checkpoints of SA, GA and best random (0 disables them)
 	"debug_info" 	: False,					# Enables debug-information
 	"debug_frac_sa"	: 0.05,						# Fraction of instances to be stored in the debug info 
 	"debug_frac_ga"	: 0.5,						# Fraction of populations to be stored in the debug info 
@@ -125,11 +144,22 @@ params_32cores_homo = {
 	"sa_L"			: 250,						# Iterations per round in SA
 	"sa_a"			: 1,						# The parameter alpha in SA
 	"sa_b"			: 5,						# The parameter beta in SA
+	"pt_chains"		: 8,						# Number of chains (temperatures) in PT
+	"pt_T_min"		: 0.1,						# Lowest temperature in PT
+	"pt_T_max"		: 40,						# Highest temperature in PT
+	"pt_interval"	: 50,						# Iterations per chain between two rounds of swaps in PT
+	"pt_workers"	: 0,						# Worker processes in PT (0: one per CPU, at most one per chain)
 	"ga_P"			: 200,						# Population size in GA
 	"ga_E" 			: 30,						# Elitism size in GA
 	"ga_T" 			: 30,						# Tournament size in GA
 	"ga_pm" 		: 0.5,						# Mutation probability in GA
 	"ga_sel_fun"  	: "tournament",				# Selection function in GA
+	"ga_pool_workers" : 0,						# Worker processes that produce the offspring in GA (0: no pool), their CPU time counts against the time budget
+	"ga_islands"	: 4,						# Number of islands (populations) in the island GA
+	"ga_migration_interval" : 10,				# Epochs between two migrations in the island GA
+	"ga_migration_size" : 2,					# Individuals that migrate from an island per migration in the island GA
+	"ga_topology"	: "ring",					# Migration topology in the island GA: ring or full
+	"ga_workers"	: 0,						# Worker processes in the island GA (0: one per CPU, at most one per island)
 	"eval_traces"	: eval_traces,				# Traces to be used in the evaluation of this experiment
 	"partial_eval_traces" : partial_eval_traces,# Traces to be used in the evaluation of this experiment
 	"trace_region_counts" : trace_region_counts,# Number of trace regions per trace
@@ -154,6 +184,21 @@ params_64cores_homo = {
 	"L_relay"		: 10,						# Latency of relaying a message through a chiplet [cycles]
 	"L_phy"			: 12,						# Latency of a PHY
 	"L_link"		: 1,						# Latency of a link
+	"proxy_backend"	: "bfs",					# Backend of the performance proxies: dijkstra or bfs
+	"delta_evaluation" : True,				# Re-evaluate mutants incrementally based on the evaluation of their parent
+	"delta_max_changes" : 16,				# Maximum number of changed links and chiplets for an incremental evaluation
+	"eval_cache_size" : 10000,				# Number of evaluations kept in the evaluation cache (0 disables the cache)
+	"batch_evaluation" : True,				# Evaluate random populations and offspring in vectorized batches
+	"canonical_hash" : False,				# Treat mirrored and rotated homogeneous placements as identical
+	"hetero_decoder" : "corner",			# Decoder of heterogeneous placements: corner or skyline
+	"decoder_checkpoints" : 8,				# Decoder checkpoints kept per heterogeneous placement (0 disables resuming)
+	"move_screening" : True,				# Reject provably invalid homogeneous mutants before evaluating them
+	"prefilter" : True,						# Reject placements that violate cheap necessary conditions before extracting their network
+	"random_generator" : "rejection",		# Random placements: rejection (retry uniform placements) or constructive
+	"generator_mixing" : 0,					# Validity-preserving moves per chiplet applied to constructed placements
+	"bulk_sampling" : False,				# Draw random placements in vectorized batches (best random and normalizers)
+	"bulk_batch" : 256,						# Number of genomes drawn per batch by the bulk sampler
+	"checkpoint_interval" : 600,				# CPU seconds between checkpoints of SA, GA and best random (0 disables them)
 	"debug_info" 	: False,					# Enables debug-information
 	"debug_frac_sa"	: 0.05,						# Fraction of instances to be stored in the debug info 
 	"debug_frac_ga"	: 0.5,						# Fraction of populations to be stored in the debug info 
@@ -167,11 +212,22 @@ params_64cores_homo = {
 	"sa_L"			: 50,						# Iterations per round in SA
 	"sa_a"			: 1,						# The parameter alpha in SA
 	"sa_b"			: 5,						# The parameter beta in SA
+	"pt_chains"		: 8,						# Number of chains (temperatures) in PT
+	"pt_T_min"		: 0.1,						# Lowest temperature in PT
+	"pt_T_max"		: 35,						# Highest temperature in PT
+	"pt_interval"	: 50,						# Iterations per chain between two rounds of swaps in PT
+	"pt_workers"	: 0,						# Worker processes in PT (0: one per CPU, at most one per chain)
 	"ga_P"			: 50,						# Population size in GA
 	"ga_E" 			: 8,						# Elitism size in GA
 	"ga_T" 			: 8,						# Tournament size in GA
 	"ga_pm" 		: 0.5,						# Mutation probability in GA
 	"ga_sel_fun"  	: "tournament",				# Selection function in GA
+	"ga_pool_workers" : 0,						# Worker processes that produce the offspring in GA (0: no pool), their CPU time counts against the time budget
+	"ga_islands"	: 4,						# Number of islands (populations) in the island GA
+	"ga_migration_interval" : 10,				# Epochs between two migrations in the island GA
+	"ga_migration_size" : 2,					# Individuals that migrate from an island per migration in the island GA
+	"ga_topology"	: "ring",					# Migration topology in the island GA: ring or full
+	"ga_workers"	: 0,						# Worker processes in the island GA (0: one per CPU, at most one per island)
 	"eval_traces"	: eval_traces,				# Traces to be used in the evaluation of this experiment
 	"partial_eval_traces" : partial_eval_traces,# Traces to be used in the evaluation of this experiment
 	"trace_region_counts" : trace_region_counts,# Number of trace regions per trace
@@ -196,6 +252,21 @@ params_32cores_hetero = {
 	"L_relay"		: 10,						# Latency of relaying a message through a chiplet [cycles]
 	"L_phy"			: 12,						# Latency of a PHY
 	"L_link"		: 1,						# Latency of a link
+	"proxy_backend"	: "bfs",					# Backend of the performance proxies: dijkstra or bfs
+	"delta_evaluation" : True,				# Re-evaluate mutants incrementally based on the evaluation of their parent
+	"delta_max_changes" : 16,				# Maximum number of changed links and chiplets for an incremental evaluation
+	"eval_cache_size" : 10000,				# Number of evaluations kept in the evaluation cache (0 disables the cache)
+	"batch_evaluation" : True,				# Evaluate random populations and offspring in vectorized batches
+	"canonical_hash" : False,				# Treat mirrored and rotated homogeneous placements as identical
+	"hetero_decoder" : "corner",			# Decoder of heterogeneous placements: corner or skyline
+	"decoder_checkpoints" : 8,				# Decoder checkpoints kept per heterogeneous placement (0 disables resuming)
+	"move_screening" : True,				# Reject provably invalid homogeneous mutants before evaluating them
+	"prefilter" : True,						# Reject placements that violate cheap necessary conditions before extracting their network
+	"random_generator" : "rejection",		# Random placements: rejection (retry uniform placements) or constructive
+	"generator_mixing" : 0,					# Validity-preserving moves per chiplet applied to constructed placements
+	"bulk_sampling" : False,				# Draw random placements in vectorized batches (best random and normalizers)
+	"bulk_batch" : 256,						# Number of genomes drawn per batch by the bulk sampler
+	"checkpoint_interval" : 600,				# CPU seconds between checkpoints of SA, GA and best random (0 disables them)
 	"debug_info" 	: False,					# Enables debug-information
 	"debug_frac_sa"	: 0.05,						# Fraction of instances to be stored in the debug info 
 	"debug_frac_ga"	: 0.5,						# Fraction of populations to be stored in the debug info 
@@ -207,11 +278,22 @@ params_32cores_hetero = {
 	"sa_L"			: 50,						# Iterations per round in SA
 	"sa_a"			: 1,						# The parameter alpha in SA
 	"sa_b"			: 5,						# The parameter beta in SA
+	"pt_chains"		: 8,						# Number of chains (temperatures) in PT
+	"pt_T_min"		: 0.1,						# Lowest temperature in PT
+	"pt_T_max"		: 33,						# Highest temperature in PT
+	"pt_interval"	: 50,						# Iterations per chain between two rounds of swaps in PT
+	"pt_workers"	: 0,						# Worker processes in PT (0: one per CPU, at most one per chain)
 	"ga_P"			: 30,						# Population size in GA
 	"ga_E" 			: 6,						# Elitism size in GA
 	"ga_T" 			: 6,						# Tournament size in GA
 	"ga_pm" 		: 0.5,						# Mutation probability in GA
 	"ga_sel_fun"  	: "tournament",				# Selection function in GA
+	"ga_pool_workers" : 0,						# Worker processes that produce the offspring in GA (0: no pool), their CPU time counts against the time budget
+	"ga_islands"	: 4,						# Number of islands (populations) in the island GA
+	"ga_migration_interval" : 10,				# Epochs between two migrations in the island GA
+	"ga_migration_size" : 2,					# Individuals that migrate from an island per migration in the island GA
+	"ga_topology"	: "ring",					# Migration topology in the island GA: ring or full
+	"ga_workers"	: 0,						# Worker processes in the island GA (0: one per CPU, at most one per island)
 	"eval_traces"	: eval_traces,				# Traces to be used in the evaluation of this experiment
 	"partial_eval_traces" : partial_eval_traces,# Traces to be used in the evaluation of this experiment
 	"trace_region_counts" : trace_region_counts,# Number of trace regions per trace
@@ -236,6 +318,21 @@ params_64cores_hetero = {
 	"L_relay"		: 10,						# Latency of relaying a message through a chiplet [cycles]
 	"L_phy"			: 12,						# Latency of a PHY
 	"L_link"		: 1,						# Latency of a link
+	"proxy_backend"	: "bfs",					# Backend of the performance proxies: dijkstra or bfs
+	"delta_evaluation" : True,				# Re-evaluate mutants incrementally based on the evaluation of their parent
+	"delta_max_changes" : 16,				# Maximum number of changed links and chiplets for an incremental evaluation
+	"eval_cache_size" : 10000,				# Number of evaluations kept in the evaluation cache (0 disables the cache)
+	"batch_evaluation" : True,				# Evaluate random populations and offspring in vectorized batches
+	"canonical_hash" : False,				# Treat mirrored and rotated homogeneous placements as identical
+	"hetero_decoder" : "corner",			# Decoder of heterogeneous placements: corner or skyline
+	"decoder_checkpoints" : 8,				# Decoder checkpoints kept per heterogeneous placement (0 disables resuming)
+	"move_screening" : True,				# Reject provably invalid homogeneous mutants before evaluating them
+	"prefilter" : True,						# Reject placements that violate cheap necessary conditions before extracting their network
+	"random_generator" : "rejection",		# Random placements: rejection (retry uniform placements) or constructive
+	"generator_mixing" : 0,					# Validity-preserving moves per chiplet applied to constructed placements
+	"bulk_sampling" : False,				# Draw random placements in vectorized batches (best random and normalizers)
+	"bulk_batch" : 256,						# Number of genomes drawn per batch by the bulk sampler
+	"checkpoint_interval" : 600,				# CPU seconds between checkpoints of SA, GA and best random (0 disables them)
 	"debug_info" 	: False,					# Enables debug-information
 	"debug_frac_sa"	: 0.05,						# Fraction of instances to be stored in the debug info 
 	"debug_frac_ga"	: 0.5,						# Fraction of populations to be stored in the debug info 
@@ -247,11 +344,22 @@ params_64cores_hetero = {
 	"sa_L"			: 45,						# Iterations per round in SA
 	"sa_a"			: 1,						# The parameter alpha in SA
 	"sa_b"			: 5,						# The parameter beta in SA
+	"pt_chains"		: 8,						# Number of chains (temperatures) in PT
+	"pt_T_min"		: 0.1,						# Lowest temperature in PT
+	"pt_T_max"		: 28,						# Highest temperature in PT
+	"pt_interval"	: 50,						# Iterations per chain between two rounds of swaps in PT
+	"pt_workers"	: 0,						# Worker processes in PT (0: one per CPU, at most one per chain)
 	"ga_P"			: 20,						# Population size in GA
 	"ga_E" 			: 5,						# Elitism size in GA
 	"ga_T" 			: 5,						# Tournament size in GA
 	"ga_pm" 		: 0.5,						# Mutation probability in GA
 	"ga_sel_fun"  	: "tournament",				# Selection function in GA
+	"ga_pool_workers" : 0,						# Worker processes that produce the offspring in GA (0: no pool), their CPU time counts against the time budget
+	"ga_islands"	: 4,						# Number of islands (populations) in the island GA
+	"ga_migration_interval" : 10,				# Epochs between two migrations in the island GA
+	"ga_migration_size" : 2,					# Individuals that migrate from an island per migration in the island GA
+	"ga_topology"	: "ring",					# Migration topology in the island GA: ring or full
+	"ga_workers"	: 0,						# Worker processes in the island GA (0: one per CPU, at most one per island)
 	"eval_traces"	: eval_traces,				# Traces to be used in the evaluation of this experiment
 	"partial_eval_traces" : partial_eval_traces,# Traces to be used in the evaluation of this experiment
 	"trace_region_counts" : trace_region_counts,# Number of trace regions per trace
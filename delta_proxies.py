@@ -0,0 +1,168 @@
+# Import python libraries
+import numpy as np
+
+# Import our own files
+import highspeed_proxies as hspx
+import profiling as prf		# Per-stage timing counters
+from network import chiplet_types
+
+# Paths and per-link path counts of one traffic class.
+# Records are never modified after their creation such that mutants can share them with their parent.
+class TrafficClassRecord:
+	def __init__(self, keys, paths, counts, latencies, throughputs):
+		self.keys = keys					# Link of each CSR-slot, encoded as owner * n + neighbor
+		self.paths = paths					# Reversed paths as lists of CSR-slots, keyed by (dst, src)
+		self.counts = counts				# Number of paths using each CSR-slot
+		self.latencies = latencies			# Per-source latencies
+		self.throughputs = throughputs		# Per-source throughputs
+
+# Everything that is needed to evaluate a mutant of an evaluated placement incrementally
+class ProxyState:
+	def __init__(self, types, relay_mask, offsets, indices, hops, records):
+		self.n = len(types)
+		self.types = types
+		self.relay_mask = relay_mask
+		self.keys = get_slot_keys(offsets, indices)
+		self.hops = hops
+		self.records = records
+
+# Encode the link of each CSR-slot as owner * n + neighbor. The keys of a CSR adjacency are sorted.
+def get_slot_keys(offsets, indices):
+	n = len(offsets) - 1
+	owners = np.repeat(np.arange(n, dtype = np.int64), np.diff(offsets))
+	return owners * n + indices
+
+# Map CSR-slots of an old adjacency (given by its keys) to CSR-slots of a new adjacency, -1 if the link was removed
+def map_slots(old_keys, new_keys):
+	pos = np.minimum(np.searchsorted(new_keys, old_keys), len(new_keys) - 1)
+	return np.where(new_keys[pos] == old_keys, pos, -1)
+
+# Count the links and chiplet-types that differ between the parent and the mutant
+def count_changes(state, types, keys):
+	changed_links = len(np.setxor1d(state.keys, keys, assume_unique = True)) // 2
+	changed_types = int(np.count_nonzero(state.types != types))
+	return changed_links + changed_types
+
+# Compute for which sources the hops or the predecessor sets can differ between the parent and the mutant.
+# A source is affected if a link it used to forward on a shortest path disappears or if a new forwarding link is
+# at least as short as the known paths. Links are directed: key owner * n + neighbor means neighbor forwards to owner.
+def find_affected_sources(state, relay_mask, keys):
+	n = state.n
+	hops = state.hops
+	is_source = np.eye(n, dtype = bool)
+	fwd_old = state.relay_mask[None,:] | is_source
+	fwd_new = relay_mask[None,:] | is_source
+	relay_changed = np.flatnonzero(state.relay_mask != relay_mask)
+	affected = np.zeros(n, dtype = bool)
+	# Forwarding links that disappeared: removed links and links whose forwarding chiplet lost relay-capabilities
+	lost = np.union1d(np.setdiff1d(state.keys, keys, assume_unique = True), state.keys[np.isin(state.keys % n, relay_changed)])
+	if len(lost) > 0:
+		(v, u) = (lost // n, lost % n)
+		still_forwarding = np.isin(lost, keys)[None,:] & fwd_new[:,u]
+		was_pred = fwd_old[:,u] & (hops[:,u] >= 0) & (hops[:,u] + 1 == hops[:,v])
+		affected |= (was_pred & ~still_forwarding).any(axis = 1)
+	# Forwarding links that appeared: new links and links whose forwarding chiplet gained relay-capabilities
+	gained = np.union1d(np.setdiff1d(keys, state.keys, assume_unique = True), keys[np.isin(keys % n, relay_changed)])
+	if len(gained) > 0:
+		(v, u) = (gained // n, gained % n)
+		was_forwarding = np.isin(gained, state.keys)[None,:] & fwd_old[:,u]
+		is_short = fwd_new[:,u] & (hops[:,u] >= 0) & ((hops[:,v] < 0) | (hops[:,u] + 1 <= hops[:,v]))
+		affected |= (is_short & ~was_forwarding).any(axis = 1)
+	return affected
+
+# For each affected source, find the chiplets whose hops or whose predecessor set changed
+def find_changed_chiplets(state, relay_mask, keys, hops, affected):
+	n = state.n
+	changed = np.zeros((n, n), dtype = bool)
+	sources = np.flatnonzero(affected)
+	if len(sources) == 0:
+		return changed
+	changed[sources] = state.hops[sources] != hops[sources]
+	# Compare the predecessor relation on the union of old and new links
+	all_keys = np.union1d(state.keys, keys)
+	(v, u) = (all_keys // n, all_keys % n)
+	is_source = sources[:,None] == u[None,:]
+	def pred_relation(link_exists, relay, h):
+		return link_exists[None,:] & (relay[u][None,:] | is_source) & (h[:,u] >= 0) & (h[:,u] + 1 == h[:,v])
+	old_preds = pred_relation(np.isin(all_keys, state.keys), state.relay_mask, state.hops[sources])
+	new_preds = pred_relation(np.isin(all_keys, keys), relay_mask, hops[sources])
+	(rows, cols) = np.nonzero(old_preds != new_preds)
+	changed[sources[rows], v[cols]] = True
+	return changed
+
+# Find the position of the first source of a traffic class whose paths can differ from the parent, None if the
+# whole traffic class can be reused. Reversed paths start at a chiplet of type tc[-1] and end at one of type tc[0].
+def find_first_changed_source(tc, state, types, relay_mask, cid_subsets, changed):
+	tc_types = [chiplet_types.index(tc[0]), chiplet_types.index(tc[-1])]
+	type_changed = state.types != types
+	if (type_changed & (np.isin(state.types, tc_types) | np.isin(types, tc_types))).any():
+		return 0
+	# Paths are only affected if the destination or a relaying chiplet changed
+	relevant = state.relay_mask | relay_mask | (types == tc_types[0])
+	for (pos, src) in enumerate(cid_subsets[tc[-1]]):
+		if (changed[src] & relevant).any():
+			return pos
+	return None
+
+# Recompute one traffic class: Paths of the first sources are copied from the parent record, the rest is recomputed
+def compute_class_record(tc, first, parent_record, offsets, indices, keys, relay_mask, hops, cid_subsets, params):
+	sources = cid_subsets[tc[-1]]
+	dsts = cid_subsets[tc[0]]
+	paths = {}
+	counts = [0] * len(keys)
+	# Copy the paths of sources that are not affected by the mutation
+	if first > 0:
+		slot_map = map_slots(parent_record.keys, keys).tolist()
+		for src in sources[:first]:
+			for dst in dsts:
+				if dst != src:
+					path = [slot_map[slot] for slot in parent_record.paths[(dst,src)]]
+					for slot in path:
+						counts[slot] += 1
+					paths[(dst,src)] = path
+	# Recompute the remaining paths
+	todo = sources[first:]
+	if len(todo) > 0:
+		todo_arr = np.array(todo)
+		pred_rows = dict(zip(todo, hspx.compute_predecessor_mask(offsets, indices, relay_mask, todo_arr, hops[todo_arr]).tolist()))
+		hspx.assign_class_paths(todo, dsts, offsets.tolist(), indices.tolist(), pred_rows, counts, paths)
+	(latencies, throughputs) = hspx.compute_class_metrics(tc, cid_subsets, paths, counts, params)
+	return TrafficClassRecord(keys, paths, counts, latencies, throughputs)
+
+# Compute the performance proxies and the proxy-state of a placement. If the proxy-state of the parent is given and the
+# mutation changed few links, only the BFS trees and the traffic classes that the mutation can affect are recomputed.
+# The results are identical to the ones of compute_highspeed_proxies.
+@prf.timed("proxies_delta")
+def compute_highspeed_proxies_delta(area, network, params, parent_state = None):
+	prf.count("evaluations")
+	# Extract network info
+	n = network.n
+	types = network.types
+	relay_mask = network.relay_mask
+	(offsets, indices) = network.get_adjacency()
+	keys = get_slot_keys(offsets, indices)
+	cid_subsets = {letter : network.get_chiplets_of_type(letter) for letter in chiplet_types}
+	all_cids = np.arange(n)
+	# Fall back to a full evaluation if there is no parent or if the mutation changed too much
+	incremental = parent_state != None and parent_state.n == n and count_changes(parent_state, types, keys) <= params["delta_max_changes"]
+	if incremental:
+		affected = find_affected_sources(parent_state, relay_mask, keys)
+		hops = parent_state.hops.copy()
+		if affected.any():
+			hops[affected] = hspx.compute_hop_matrix(offsets, indices, relay_mask, all_cids[affected])
+		changed = find_changed_chiplets(parent_state, relay_mask, keys, hops, affected)
+	else:
+		hops = hspx.compute_hop_matrix(offsets, indices, relay_mask, all_cids)
+	# Reuse or recompute each traffic class
+	records = {}
+	for tc in hspx.traffic_classes:
+		first = find_first_changed_source(tc, parent_state, types, relay_mask, cid_subsets, changed) if incremental else 0
+		if first == None:
+			records[tc] = parent_state.records[tc]
+		else:
+			parent_record = parent_state.records[tc] if incremental else None
+			records[tc] = compute_class_record(tc, first, parent_record, offsets, indices, keys, relay_mask, hops, cid_subsets, params)
+	latencies = {tc : records[tc].latencies for tc in records}
+	throughputs = {tc : records[tc].throughputs for tc in records}
+	(cost, results) = hspx.aggregate_results(area, latencies, throughputs, params)
+	return (cost, results, ProxyState(types, relay_mask, offsets, indices, hops, records))
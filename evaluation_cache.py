@@ -0,0 +1,72 @@
+# Import python libraries
+from collections import OrderedDict
+
+# Parameters that influence the validity and the evaluation of a placement
+fingerprint_keys = ["representation", "rows", "cols", "dimensions", "phys", "relay_chiplets", "dist_type", "max_length",
+					"L_relay", "L_phy", "L_link", "cf_weights", "cf_normalizers", "canonical_hash",
+					"hetero_decoder"]
+
+# Bounded least-recently-used cache of evaluations, keyed by placement hash and parameter fingerprint
+class EvaluationCache:
+	# Constructor
+	def __init__(self, size):
+		self.size = size
+		self.entries = OrderedDict()
+		self.hits = 0
+		self.misses = 0
+
+	# Return the cached (validity, cost, evaluation) of a placement or None if it is not cached
+	def lookup(self, key):
+		entry = self.entries.get(key)
+		if entry == None:
+			self.misses += 1
+			return None
+		self.hits += 1
+		self.entries.move_to_end(key)
+		(valid, cost, evaluation) = entry
+		return (valid, cost, dict(evaluation) if evaluation != None else None)
+
+	# Store the evaluation of a placement, evict the least recently used one if the cache is full
+	def insert(self, key, valid, cost, evaluation):
+		self.entries[key] = (valid, cost, dict(evaluation) if evaluation != None else None)
+		self.entries.move_to_end(key)
+		while len(self.entries) > self.size:
+			self.entries.popitem(last = False)
+
+	# Return the size and the hit and miss counters
+	def get_stats(self):
+		return {"size" : self.size, "entries" : len(self.entries), "hits" : self.hits, "misses" : self.misses}
+
+# The cache used by all placements of this process, disabled until reset_cache is called
+cache = EvaluationCache(0)
+
+# Replace the cache by an empty one of the size given in the parameters
+def reset_cache(params):
+	global cache
+	cache = EvaluationCache(params["eval_cache_size"])
+
+# Sum the statistics of the caches of several processes
+def merge_stats(stats):
+	return {key : sum([entry[key] for entry in stats]) for key in ["size", "entries", "hits", "misses"]}
+
+# Compute a fingerprint of the parameters that influence the evaluation of a placement
+def get_fingerprint(params):
+	values = []
+	for key in fingerprint_keys:
+		value = params.get(key)
+		if key == "phys":
+			value = {typ : [phy.pos for phy in value[typ]] for typ in value}
+		values.append(repr(value))
+	return "|".join(values)
+
+# Return the cached (validity, cost, evaluation) of the placement with the given hash or None if it is not cached
+def lookup(placement_hash, params):
+	if cache.size <= 0:
+		return None
+	return cache.lookup((placement_hash, get_fingerprint(params)))
+
+# Store the evaluation of the placement with the given hash
+def insert(placement_hash, params, valid, cost, evaluation):
+	if cache.size <= 0:
+		return
+	cache.insert((placement_hash, get_fingerprint(params)), valid, cost, evaluation)
@@ -0,0 +1,203 @@
+# Import python libraries
+import sys
+import random as rnd
+import numpy as np
+
+# Import our own files
+import genomes as gen				# Integer-coded genomes
+from moves import get_linked_cells	# D2D links of homogeneous placements
+from geometry import get_template	# Rotated sizes and PHY-offsets of the chiplet types
+from geometry import fixed_point	# Scale of fixed-point PHY coordinates
+
+# Constructive generation of random placements: Instead of drawing genomes uniformly at random until one is valid
+# (rejection sampling), the genome is built such that it is valid (homogeneous) or likely valid (heterogeneous).
+# The constructed genomes are biased, random moves that keep them valid (mix_genome) bring them closer to the
+# distribution of rejection sampling.
+
+# Number of chiplets drawn per position of a constructed heterogeneous genome
+attach_trials = 8
+
+# Sides that a 1-PHY chiplet can face and the offset of the neighbor it faces
+sides = [("N", (1,0)), ("E", (0,1)), ("S", (-1,0)), ("W", (0,-1))]
+
+# Return the sides that a 1-PHY chiplet at (row, col) can face without facing outside of the grid
+def get_valid_sides(rows, cols, row, col):
+	return [side for (side, (dr, dc)) in sides if 0 <= row + dr < rows and 0 <= col + dc < cols]
+
+# Construct a random, valid homogeneous placement: Grow a connected backbone of relay-chiplets from a random cell by
+# adding random cells next to it, then place the remaining chiplets next to the backbone with their PHY facing it.
+# Returns the grid and phys as lists of letters.
+def construct_homo_genome(params):
+	(rows, cols) = (params["rows"], params["cols"])
+	relay_types = params["relay_chiplets"]
+	counts = {"C" : params["n_compute"], "M" : params["n_memory"], "I" : params["n_io"]}
+	# Relay-chiplets with four PHYs are linked to all neighboring chiplets, this guarantees a connected backbone
+	if "C" not in relay_types or any([len(params["phys"][typ]) != 4 for typ in relay_types]):
+		print("ERROR: The constructive generator requires compute-chiplets to be relays and all relays to have four PHYs")
+		sys.exit()
+	relays = [typ for typ in ["C","M","I"] if typ in relay_types for i in range(counts[typ])]
+	others = [typ for typ in ["C","M","I"] if typ not in relay_types for i in range(counts[typ])]
+	neighbors = lambda cell : [(cell[0] + dr, cell[1] + dc) for (side, (dr, dc)) in sides if 0 <= cell[0] + dr < rows and 0 <= cell[1] + dc < cols]
+	while True:
+		# Grow the backbone, the frontier are the free cells next to it
+		seed = (rnd.randrange(rows), rnd.randrange(cols))
+		(backbone, frontier) = ([seed], [])
+		for cell in neighbors(seed):
+			frontier.append(cell)
+		while len(backbone) < len(relays) and len(frontier) > 0:
+			cell = frontier.pop(rnd.randrange(len(frontier)))
+			backbone.append(cell)
+			frontier += [nei for nei in neighbors(cell) if nei not in backbone and nei not in frontier]
+		# Attach the other chiplets to the backbone, start over if there are not enough free cells next to it
+		if len(backbone) < len(relays) or len(frontier) < len(others):
+			continue
+		attached = rnd.sample(frontier, len(others))
+		rnd.shuffle(relays)
+		rnd.shuffle(others)
+		grid = [["X" for col in range(cols)] for row in range(rows)]
+		phys = [["X" for col in range(cols)] for row in range(rows)]
+		for ((row, col), typ) in zip(backbone, relays):
+			(grid[row][col], phys[row][col]) = (typ, "A")
+		in_backbone = set(backbone)
+		for ((row, col), typ) in zip(attached, others):
+			grid[row][col] = typ
+			if len(params["phys"][typ]) == 4:
+				phys[row][col] = "A"
+			else:
+				phys[row][col] = rnd.choice([side for (side, (dr, dc)) in sides if (row + dr, col + dc) in in_backbone])
+		return (grid, phys)
+
+# Check if a homogeneous placement given as nested lists of codes is valid without constructing its network:
+# Traverse the links from the first compute-chiplet and only continue at relay-chiplets as Network.validate does.
+def is_valid_homo(grid, phys, params):
+	relay_codes = [gen.grid_codes[typ] for typ in params["relay_chiplets"]]
+	(rows, cols) = (len(grid), len(grid[0]))
+	cells = [(row, col) for row in range(rows) for col in range(cols) if grid[row][col] != gen.grid_codes["X"]]
+	start = next((cell for cell in cells if grid[cell[0]][cell[1]] == gen.grid_codes["C"]), cells[0])
+	(visited, todo) = (set([start]), [start])
+	while len(todo) > 0:
+		(row, col) = todo.pop()
+		if grid[row][col] in relay_codes:
+			for nei in get_linked_cells(grid, phys, row, col):
+				if nei not in visited:
+					visited.add(nei)
+					todo.append(nei)
+	return len(visited) == len(cells)
+
+# Propose a random move of a homogeneous genome (pair of nested lists of codes): Swap two cells or turn a 1-PHY chiplet.
+# Returns the proposed genome and the ratio of its probability to that of the current genome under rejection sampling,
+# where each 1-PHY chiplet at a cell with k valid sides has probability 1/k.
+def propose_homo_move(genome, params):
+	(grid, phys) = genome
+	(rows, cols) = (len(grid), len(grid[0]))
+	(new_grid, new_phys) = ([list(row) for row in grid], [list(row) for row in phys])
+	single = [(row, col) for row in range(rows) for col in range(cols) if grid[row][col] != gen.grid_codes["X"] and len(params["phys"][gen.grid_letters[grid[row][col]]]) == 1]
+	k = lambda cell : len(get_valid_sides(rows, cols, cell[0], cell[1]))
+	if len(single) == 0 or rnd.random() < 0.5:
+		(a, b) = [divmod(pos, cols) for pos in rnd.sample(range(rows * cols), 2)]
+		for (src, dst) in [(a, b), (b, a)]:
+			(new_grid[dst[0]][dst[1]], new_phys[dst[0]][dst[1]]) = (grid[src[0]][src[1]], phys[src[0]][src[1]])
+		ratio = 1.0
+		for (src, dst) in [(a, b), (b, a)]:
+			if src in single:
+				ratio *= k(src) / k(dst)
+		return ((new_grid, new_phys), ratio)
+	(row, col) = rnd.choice(single)
+	choices = [gen.phys_codes[side] for side in get_valid_sides(rows, cols, row, col) if gen.phys_codes[side] != phys[row][col]]
+	new_phys[row][col] = rnd.choice(choices)
+	return ((new_grid, new_phys), 1.0)
+
+# Return the distance between two sets of points (rows of x- and y-coordinates) according to the distance type
+def get_distance(dx, dy, params):
+	return np.sqrt(dx * dx + dy * dy) if params["dist_type"] == "euclidean" else dx + dy
+
+# Check if one of the given PHYs is within max_length of one of the PHYs of the packed relay-chiplets. The bounding
+# boxes of both sets of PHYs are compared first, the pairwise distances are only computed if the boxes are close.
+def is_attached(phys, relay_phys, relay_box, params):
+	max_length = params["max_length"] * (1 + 1e-9)
+	gap = np.maximum(0, np.maximum(phys.min(axis = 0) - relay_box[1], relay_box[0] - phys.max(axis = 0)))
+	if get_distance(gap[0], gap[1], params) > max_length:
+		return False
+	(dx, dy) = (np.abs(phys[:,None,0] - relay_phys[None,:,0]), np.abs(phys[:,None,1] - relay_phys[None,:,1]))
+	return bool((get_distance(dx, dy, params) <= max_length).any())
+
+# Decoding of a constructed heterogeneous genome in the format of the decoder checkpoints of HeteroPlacement: The types
+# and rotations as int8-arrays of codes, the positions of the chiplets and the packer-states before chiplets interval,
+# 2 * interval, ... and after the last chiplet. It is passed to HeteroPlacement as a relative, hence, the genome is
+# decoded without packing it a second time.
+class ConstructedDecoding:
+	# Constructor
+	def __init__(self, params, types, rotations, positions, checkpoints):
+		self.params = params
+		self.types = gen.encode(types, gen.type_codes)
+		self.rotations = gen.encode_rotations(rotations)
+		self.positions = positions
+		self.checkpoints = checkpoints
+
+# Construct a random heterogeneous genome chiplet by chiplet: Each chiplet is drawn like the next entry of a shuffled
+# sequence and kept if, at the position where it would be packed, one of its PHYs is within max_length of a PHY of an
+# already packed relay-chiplet (or if it is the first relay-chiplet). Otherwise, another chiplet is drawn, after
+# attach_trials draws the last one is kept. Only the kept chiplet is inserted into the packer. The link assignment of
+# the network is global, hence, the genome is likely but not guaranteed to be valid.
+# Returns the ConstructedDecoding of the genome with decoder checkpoints every interval chiplets.
+def construct_hetero_genome(params, packer, rotation_choices, interval):
+	counts = {"C" : params["n_compute"], "M" : params["n_memory"], "I" : params["n_io"]}
+	relay_types = params["relay_chiplets"]
+	(types, rotations, relay_phys, relay_box) = ([], [], np.zeros((0, 2)), None)
+	(positions, checkpoints) = ([], [])
+	n = sum(counts.values())
+	for i in range(n):
+		if i > 0 and i % interval == 0:
+			checkpoints.append((i, packer.copy()))
+		for trial in range(attach_trials):
+			# Draw the type like the next entry of a shuffled sequence of the remaining chiplets
+			k = rnd.randrange(sum(counts.values()))
+			for typ in ["C","M","I"]:
+				if k < counts[typ]:
+					break
+				k -= counts[typ]
+			rot = 90 * rnd.choice(rotation_choices[params["rotation_behaviour"][typ]])
+			(size, offsets) = get_template(params, typ, rot)
+			pos = packer.find_position(size[0], size[1])
+			phys = (offsets + np.array(pos) * fixed_point) / fixed_point
+			attached = (typ in relay_types) if len(relay_phys) == 0 else is_attached(phys, relay_phys, relay_box, params)
+			if attached:
+				break
+		packer.insert(size[0], size[1], pos)
+		positions.append(pos)
+		counts[typ] -= 1
+		types.append(typ)
+		rotations.append(rot)
+		if typ in relay_types:
+			relay_phys = np.concatenate([relay_phys, phys])
+			relay_box = (relay_phys.min(axis = 0), relay_phys.max(axis = 0))
+	checkpoints.append((n, packer))
+	return ConstructedDecoding(params, types, rotations, positions, checkpoints)
+
+# Propose a random move of a heterogeneous genome (pair of arrays of codes): Swap two chiplets or rotate one chiplet.
+# Both moves are symmetric and rejection sampling draws all genomes with the same probability, hence, the ratio is 1.
+def propose_hetero_move(genome, params, rotation_choices):
+	(types, rotations) = (genome[0].copy(), genome[1].copy())
+	rotatable = [i for (i, typ) in enumerate(types.tolist()) if len(rotation_choices[params["rotation_behaviour"][gen.type_letters[typ]]]) > 1]
+	if len(rotatable) == 0 or rnd.random() < 0.5:
+		(a, b) = rnd.sample(range(len(types)), 2)
+		types[[a, b]] = types[[b, a]]
+		rotations[[a, b]] = rotations[[b, a]]
+	else:
+		i = rnd.choice(rotatable)
+		choices = [rot for rot in rotation_choices[params["rotation_behaviour"][gen.type_letters[types[i]]]] if rot != rotations[i]]
+		rotations[i] = rnd.choice(choices)
+	return ((types, rotations), 1.0)
+
+# Metropolis moves that keep a genome valid: A proposal is accepted if it is valid and with probability min(1, ratio).
+# The genomes that rejection sampling produces are the stationary distribution of these moves. The state is a genome or
+# a placement: propose(state) returns a proposed genome and the ratio, validate(genome, state) returns the state of the
+# proposed genome if it is valid and None otherwise.
+def mix_genome(state, propose, validate, n_moves):
+	for i in range(n_moves):
+		(candidate, ratio) = propose(state)
+		if ratio >= 1 or rnd.random() < ratio:
+			candidate = validate(candidate, state)
+			if candidate != None:
+				state = candidate
+	return state
@@ -0,0 +1,43 @@
+# Import python libraries
+import numpy as np
+
+# Genomes of the placement representations are stored as small int8-arrays of codes instead of lists of letters.
+# Codes follow the alphabetical order of the letters, hence, byte-hashes order genomes like their string representation.
+
+# Homogeneous grid entries: Chiplet types or X (no chiplet)
+grid_letters = ["C","I","M","X"]
+grid_codes = {letter : code for (code, letter) in enumerate(grid_letters)}
+# Homogeneous phys entries: A (PHYs on all four sides), N,E,S,W (side of the single PHY) or X (no chiplet)
+phys_letters = ["A","E","N","S","W","X"]
+phys_codes = {letter : code for (code, letter) in enumerate(phys_letters)}
+# Heterogeneous chiplet types, rotations are stored as multiples of 90 degrees
+type_letters = ["C","I","M"]
+type_codes = {letter : code for (code, letter) in enumerate(type_letters)}
+
+# Convert a (possibly nested) list of letters to an array of codes, arrays are returned as they are
+def encode(entries, codes):
+	if isinstance(entries, np.ndarray):
+		return entries
+	if len(entries) > 0 and isinstance(entries[0], list):
+		return np.array([[codes[x] for x in row] for row in entries], dtype = np.int8)
+	return np.array([codes[x] for x in entries], dtype = np.int8)
+
+# Convert an array of codes to a (possibly nested) list of letters
+def decode(array, letters):
+	if array.ndim == 2:
+		return [[letters[code] for code in row] for row in array.tolist()]
+	return [letters[code] for code in array.tolist()]
+
+# Convert a list of rotations in degrees to an array of codes, arrays are returned as they are
+def encode_rotations(rotations):
+	if isinstance(rotations, np.ndarray):
+		return rotations
+	return np.array([int(rot // 90) for rot in rotations], dtype = np.int8)
+
+# Convert an array of rotation-codes to a list of rotations in degrees
+def decode_rotations(array):
+	return [90 * code for code in array.tolist()]
+
+# Hash of a genome consisting of arrays of the same shape: The bytes of the interleaved codes
+def get_genome_hash(*arrays):
+	return np.stack(arrays, axis = -1).tobytes()
@@ -0,0 +1,93 @@
+# Import python libraries
+import numpy as np
+
+# Import our own files
+from chiplet import Chiplet
+from phy import PHY
+
+# PHY coordinates are stored as integer multiples of 1 / fixed_point. Chiplets move by whole units, hence, moving a PHY
+# is an exact integer addition and coordinate / fixed_point equals the coordinate that Chiplet.move_by rounds to 4 digits.
+fixed_point = 10000
+
+# Rotation templates, keyed by the PHY-definitions and dimensions they were computed from. The definitions are kept
+# in each entry such that their ids cannot be reused by other objects.
+template_cache = {}
+
+# Return the size and the fixed-point PHY offsets (relative to the bottom-left corner) of a chiplet type in a rotation.
+# The template is computed once per (type, rotation) by rotating a Chiplet, i.e., exactly like the chiplet objects.
+def get_template(params, typ, rotation):
+	(phys, dimensions) = (params["phys"], params["dimensions"])
+	key = (id(phys), id(dimensions))
+	if key not in template_cache or template_cache[key][0] is not phys or template_cache[key][1] is not dimensions:
+		template_cache[key] = (phys, dimensions, {})
+	templates = template_cache[key][2]
+	if (typ, rotation) not in templates:
+		chiplet = Chiplet((0, 0), dimensions[typ], typ, phys[typ])
+		chiplet.rotate(rotation)
+		offsets = [[round(phy.pos[i] * fixed_point) - chiplet.pos[i] * fixed_point for i in range(2)] for phy in chiplet.phys]
+		templates[(typ, rotation)] = (tuple(chiplet.size), np.array(offsets, dtype = np.int64).reshape(-1, 2))
+	return templates[(typ, rotation)]
+
+# Geometry of all chiplets of a placement as flat arrays (struct of arrays). Chiplet i has its bottom-left corner at
+# origins[i] and the size sizes[i], its PHYs are the rows phy_starts[i] to phy_starts[i+1]-1 of phy_pos.
+class Geometry:
+	# Constructor
+	def __init__(self, types, rotations, origins, sizes, phy_pos, phy_counts):
+		self.types = types
+		self.rotations = rotations
+		self.origins = np.array(origins, dtype = np.int64).reshape(-1, 2)
+		self.sizes = np.array(sizes, dtype = np.int64).reshape(-1, 2)
+		self.phy_pos = np.array(phy_pos, dtype = np.int64).reshape(-1, 2)
+		self.phy_starts = np.concatenate([[0], np.cumsum(phy_counts, dtype = np.int64)])
+		self.phy_chiplet = np.repeat(np.arange(len(types)), phy_counts)
+
+	# Number of chiplets
+	def __len__(self):
+		return len(self.types)
+
+	# Move chiplet i (including its PHYs) such that its bottom-left corner is at pos
+	def move_to(self, i, pos):
+		vec = np.array(pos, dtype = np.int64) - self.origins[i]
+		self.origins[i] += vec
+		self.phy_pos[self.phy_starts[i]:self.phy_starts[i+1]] += vec * fixed_point
+
+	# Move all chiplets by the given vector
+	def translate(self, vec):
+		vec = np.array(vec, dtype = np.int64)
+		self.origins += vec
+		self.phy_pos += vec * fixed_point
+
+	# Move the placement to the origin and return its size as (width, height)
+	def normalize(self):
+		self.translate(-self.origins.min(axis = 0))
+		(width, height) = (self.origins + self.sizes).max(axis = 0).tolist()
+		return (width, height)
+
+	# Return the PHY positions as a list of (x, y)-tuples
+	def get_phy_positions(self):
+		return [tuple(pos) for pos in (self.phy_pos / fixed_point).tolist()]
+
+	# Convert the geometry to a list of Chiplet objects
+	def to_chiplets(self):
+		chiplets = []
+		phy_positions = self.get_phy_positions()
+		(origins, sizes, starts) = (self.origins.tolist(), self.sizes.tolist(), self.phy_starts.tolist())
+		for (i, typ) in enumerate(self.types):
+			phys = [PHY(pos) for pos in phy_positions[starts[i]:starts[i+1]]]
+			chiplet = Chiplet(tuple(origins[i]), tuple(sizes[i]), typ, phys, abs_phy_pos_given = True)
+			chiplet.rotation = self.rotations[i]
+			chiplets.append(chiplet)
+		return chiplets
+
+# Build the geometry of chiplets with the given types and rotations (in degrees) at the given positions
+def build_geometry(params, types, rotations, positions):
+	templates = [get_template(params, typ, rot) for (typ, rot) in zip(types, rotations)]
+	origins = np.array(positions, dtype = np.int64).reshape(-1, 2)
+	phy_counts = [len(template[1]) for template in templates]
+	phy_pos = np.concatenate([template[1] for template in templates]) + np.repeat(origins * fixed_point, phy_counts, axis = 0)
+	return Geometry(list(types), list(rotations), origins, [template[0] for template in templates], phy_pos, phy_counts)
+
+# Build the geometry of a list of Chiplet objects
+def get_geometry_from_chiplets(chiplets):
+	phy_pos = [[round(phy.pos[0] * fixed_point), round(phy.pos[1] * fixed_point)] for c in chiplets for phy in c.phys]
+	return Geometry([c.typ for c in chiplets], [c.rotation for c in chiplets], [c.pos for c in chiplets], [c.size for c in chiplets], phy_pos, [len(c.phys) for c in chiplets])
@@ -1,6 +1,14 @@
 # Import python libraries
+import sys
 import queue 
 import random as rnd
+import numpy as np
+
+# Import our own files
+import profiling as prf		# Per-stage timing counters
+
+# Traffic classes considered by the performance proxies
+traffic_classes = ["C2C","C2M","C2I","M2I"]
 
 # compute cost function of a placement
 def cost_function(results, normalizers, weights):
@@ -17,9 +25,53 @@ def cost_function(results, normalizers, weights):
 			print("ERROR: No cost function computation defined for metric \"%s\"" % metric)
 	return cost
 
+# Determine the traffic class of a reversed path from src to dst, None if no path of that type is needed
+def get_path_type(src_typ, dst_typ):
+	if src_typ == "C" and dst_typ == "C":
+		return "C2C"
+	elif src_typ == "M" and dst_typ == "C":
+		return "C2M"
+	elif src_typ == "I" and dst_typ == "C":
+		return "C2I"
+	elif src_typ == "I" and dst_typ == "M":
+		return "M2I"
+	return None
+
+# Aggregate per-source latencies and throughputs and compute the cost function
+def aggregate_results(area, latencies, throughputs, params):
+	# Aggregate statistics
+	avg = lambda x : sum(x)/len(x)
+	results = {
+		"c2c_lat" : avg(latencies["C2C"]),
+		"c2c_tp" : avg(throughputs["C2C"]),
+		"c2m_lat" : avg(latencies["C2M"]),
+		"c2m_tp" : avg(throughputs["C2M"]),
+		"c2i_lat" : avg(latencies["C2I"]),
+		"c2i_tp" : avg(throughputs["C2I"]),
+		"m2i_lat" : avg(latencies["M2I"]),
+		"m2i_tp" : avg(throughputs["M2I"]),
+		"area" : area,
+	}
+	
+	# Compute cost function
+	cost = cost_function(results, params["cf_normalizers"], params["cf_weights"])
+	
+	# Return median in case of multiple repetitions, usually only one repetition is done with a deterministic routing function
+	return (cost, results)
+
 # Compute the performance proxies as in RapidChiplet
 # We implement our own version to avoid writing and reading input files which slows down the process
+@prf.timed("proxies")
 def compute_highspeed_proxies(area, network, params):
+	prf.count("evaluations")
+	backend = params["proxy_backend"]
+	if backend not in proxy_backends:
+		print("ERROR: Invalid proxy backend \"%s\"" % backend)
+		sys.exit()
+	return proxy_backends[backend](area, network, params)
+
+# Reference implementation of the performance proxies: One Dijkstra per source chiplet
+def compute_highspeed_proxies_dijkstra(area, network, params):
 	# Hard-coded traffic classes
 	traffic_classes = ["C2C","C2M","C2I","M2I"]
 	# Extract network info
@@ -27,12 +79,9 @@ def compute_highspeed_proxies(area, network, params):
 	node_types = network.node_types
 	neighbors = network.neighbors
 	relay_types = network.relay_types
-	# Extract parameters
-	cf_normalizers = params["cf_normalizers"]
-	cf_weights = params["cf_weights"]
 	# Construct custom lists
 	all_cids = list(range(n))
-	cid_subsets = {letter : [i for i in range(n) if node_types[i] == letter] for letter in ["C","M","I"]}
+	cid_subsets = {letter : network.get_chiplets_of_type(letter) for letter in ["C","M","I"]}
 	# Construct shortest paths
 	paths = {} 
 	edge_to_path_count = {tc : {} for tc in traffic_classes}
@@ -72,15 +121,8 @@ def compute_highspeed_proxies(area, network, params):
 		# Backtracking to construct paths for C2C, C2M, C2I: Only end at compute nodes since we use reversed pats
 		for dst in (cid_subsets["C"] + cid_subsets["M"]):
 			# Determine path type:
-			if node_types[src] == "C" and node_types[dst] == "C":
-				path_typ = "C2C"
-			elif node_types[src] == "M" and node_types[dst] == "C":
-				path_typ = "C2M"
-			elif node_types[src] == "I" and node_types[dst] == "C":
-				path_typ = "C2I"
-			elif node_types[src] == "I" and node_types[dst] == "M":
-				path_typ = "M2I"
-			else:
+			path_typ = get_path_type(node_types[src], node_types[dst])
+			if path_typ == None:
 				continue
 			cur = dst
 			paths[(dst,src)] = []
@@ -120,22 +162,106 @@ def compute_highspeed_proxies(area, network, params):
 			latencies[tc].append((h-1) * params["L_relay"] + 2 * h * params["L_phy"] + h * params["L_link"])	
 			throughputs[tc].append(sum(acc_tps) / len(params["phys"][tc[0]])) 
 
-	# Aggregate statistics
-	avg = lambda x : sum(x)/len(x)
-	results = {
-		"c2c_lat" : avg(latencies["C2C"]),
-		"c2c_tp" : avg(throughputs["C2C"]),
-		"c2m_lat" : avg(latencies["C2M"]),
-		"c2m_tp" : avg(throughputs["C2M"]),
-		"c2i_lat" : avg(latencies["C2I"]),
-		"c2i_tp" : avg(throughputs["C2I"]),
-		"m2i_lat" : avg(latencies["M2I"]),
-		"m2i_tp" : avg(throughputs["M2I"]),
-		"area" : area,
-	}
-	
-	# Compute cost function
-	cost = cost_function(results, cf_normalizers, cf_weights)
-	
-	# Return median in case of multiple repetitions, usually only one repetition is done with a deterministic routing function
-	return (cost, results)	
+	return aggregate_results(area, latencies, throughputs, params)
+
+# Run one BFS per source in bulk. Messages are only forwarded by the source and by relay-chiplets.
+# Returns a matrix with one row per source containing the number of hops to each chiplet (-1 if unreachable)
+def compute_hop_matrix(offsets, indices, relay_mask, sources):
+	n = len(offsets) - 1
+	rows = np.arange(len(sources))
+	with_neighbors = np.flatnonzero(np.diff(offsets) > 0)
+	hops = np.full((len(sources), n), -1, dtype = np.int32)
+	hops[rows, sources] = 0
+	frontier = np.zeros((len(sources), n), dtype = bool)
+	frontier[rows, sources] = True
+	level = 0
+	while len(indices) > 0 and frontier.any():
+		level += 1
+		# Only the source and relay-chiplets forward messages
+		forwarding = frontier & relay_mask
+		forwarding[rows, sources] = frontier[rows, sources]
+		# A chiplet is reached if one of its neighbors forwards
+		reached = np.zeros((len(sources), n), dtype = bool)
+		reached[:, with_neighbors] = np.logical_or.reduceat(forwarding[:, indices], offsets[with_neighbors], axis = 1)
+		frontier = reached & (hops < 0)
+		hops[frontier] = level
+	return hops
+
+# Compute the predecessor sets of all sources in bulk: Entry (s,k) is True if the neighbor in CSR-slot k
+# is a predecessor of the chiplet owning slot k on a shortest path from source s
+def compute_predecessor_mask(offsets, indices, relay_mask, sources, hops):
+	slot_owner = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+	pred_hops = hops[:, indices]
+	forwarding = relay_mask[indices][None,:] | (indices[None,:] == sources[:,None])
+	return forwarding & (pred_hops >= 0) & (pred_hops + 1 == hops[:, slot_owner])
+
+# Greedily construct the reversed paths of one traffic class as lists of CSR-slots (one slot per link)
+def assign_class_paths(sources, dsts, offsets, indices, pred_rows, counts, paths):
+	n = len(offsets) - 1
+	for src in sources:
+		# Collect the predecessor-slots of each chiplet
+		pred_row = pred_rows[src]
+		preds = [[slot for slot in range(offsets[cur], offsets[cur+1]) if pred_row[slot]] for cur in range(n)]
+		for dst in dsts:
+			if dst == src:
+				continue
+			path = []
+			cur = dst
+			while cur != src:
+				cur_preds = preds[cur]
+				# Select predecessor to greedily minimize path count per link
+				best = cur_preds[0]
+				for slot in cur_preds:
+					if counts[slot] < counts[best]:
+						best = slot
+				counts[best] += 1
+				path.append(best)
+				cur = indices[best]
+			paths[(dst,src)] = path
+
+# Compute per-source latencies and throughputs of one traffic class
+def compute_class_metrics(tc, cid_subsets, paths, counts, params):
+	latencies = []
+	throughputs = []
+	for src in cid_subsets[tc[0]]:
+		acc_hops = []
+		acc_tps = []
+		for dst in cid_subsets[tc[-1]]:
+			if src != dst:
+				path = paths[(src,dst)]
+				acc_hops.append(len(path))
+				acc_tps.append(1 / max(map(counts.__getitem__, path)))
+		h = sum(acc_hops) / len(acc_hops)
+		latencies.append((h-1) * params["L_relay"] + 2 * h * params["L_phy"] + h * params["L_link"])	
+		throughputs.append(sum(acc_tps) / len(params["phys"][tc[0]])) 
+	return (latencies, throughputs)
+
+# Array-based implementation of the performance proxies: Multi-source BFS over a CSR adjacency
+# The greedy path selection is identical to the Dijkstra-based implementation, hence, both return the same results
+def compute_highspeed_proxies_bfs(area, network, params):
+	# Extract network info
+	n = network.n
+	relay_mask = network.relay_mask
+	(offsets, indices) = network.get_adjacency()
+	cid_subsets = {letter : network.get_chiplets_of_type(letter) for letter in ["C","M","I"]}
+	# Compute hops and predecessors for all sources at once
+	all_cids = np.arange(n)
+	hops = compute_hop_matrix(offsets, indices, relay_mask, all_cids)
+	pred_rows = compute_predecessor_mask(offsets, indices, relay_mask, all_cids, hops).tolist()
+	# Construct the paths of each traffic class. Reversed paths start at a chiplet of type tc[-1] and end at one of type tc[0]
+	offsets = offsets.tolist()
+	indices = indices.tolist()
+	latencies = {}
+	throughputs = {}
+	for tc in traffic_classes:
+		paths = {}
+		counts = [0] * len(indices)
+		assign_class_paths(cid_subsets[tc[-1]], cid_subsets[tc[0]], offsets, indices, pred_rows, counts, paths)
+		(latencies[tc], throughputs[tc]) = compute_class_metrics(tc, cid_subsets, paths, counts, params)
+	return aggregate_results(area, latencies, throughputs, params)
+
+# Map of backends to compute the performance proxies
+proxy_backends = {
+	"dijkstra" : compute_highspeed_proxies_dijkstra,
+	"bfs" : compute_highspeed_proxies_bfs,
+}
@@ -8,7 +8,8 @@ import placeit_helpers as hlp
 # Internally, the instance class calls functions from a specific placement representation 
 class Instance:
 	# Constructor
-	def __init__(self, typ, params, sub_instance = None):
+	# Deferred: Only validate a random placement, its proxies are computed later by the batch evaluation
+	def __init__(self, typ, params, sub_instance = None, deferred = False):
 		self.typ = typ
 		self.params = params
 		# The placement representation was passed as an argument
@@ -16,7 +17,7 @@ class Instance:
 			self.sub_instance = sub_instance
 		# Randomly initialize the underlying placement representation
 		else:
-			self.sub_instance = {"homogeneous" : HomoPlacement, "placement" : Placement, "heterogeneous" : HeteroPlacement}[typ](params)
+			self.sub_instance = {"homogeneous" : HomoPlacement, "placement" : Placement, "heterogeneous" : HeteroPlacement}[typ](params, deferred = deferred)
 
 	# Convert instance to JSON
 	def to_json(self):
@@ -39,12 +40,29 @@ class Instance:
 		return self.sub_instance.get_area()
 
 	# Perform a mutation
-	def mutate(self):
-		return Instance(self.typ, self.params, self.sub_instance.mutate())
+	def mutate(self, deferred = False):
+		return Instance(self.typ, self.params, self.sub_instance.mutate(deferred))
 
 	# Merge two instances
-	def merge(self, other):
-		return Instance(self.typ, self.params, self.sub_instance.merge(other.sub_instance))
+	def merge(self, other, deferred = False):
+		return Instance(self.typ, self.params, self.sub_instance.merge(other.sub_instance, deferred))
+
+	# Propose a mutation without evaluating it: Returns a proposal whose first entry is the mutant's genome or None if
+	# the mutant was rejected by the move screening. get_mutant constructs the mutant, optionally from a known evaluation.
+	def propose_mutation(self):
+		return self.sub_instance.propose_mutation()
+
+	# Construct the mutant of a proposal
+	def get_mutant(self, proposal, deferred = False, known = None):
+		return Instance(self.typ, self.params, self.sub_instance.get_mutant(proposal, deferred, known))
+
+	# Propose the genome of a merger of two instances without evaluating it
+	def propose_merge(self, other):
+		return self.sub_instance.propose_merge(other.sub_instance)
+
+	# Construct the merger of two instances from a proposed genome, optionally from a known evaluation
+	def get_merger(self, other, genome, deferred = False, known = None):
+		return Instance(self.typ, self.params, self.sub_instance.get_merger(other.sub_instance, genome, deferred, known))
 
 	# Extract cost
 	def get_cost(self):
@@ -62,6 +80,10 @@ class Instance:
 	def get_hash(self):
 		return self.sub_instance.hash
 
+	# Get the genome of an instance as a tuple of int8-arrays, instance_from_genome restores the instance
+	def get_genome(self):
+		return self.sub_instance.get_genome()
+
 	# Returns True if the instance is valid (i.e. the ICI topology is connected)
 	def is_valid(self):
 		return self.sub_instance.is_valid
@@ -74,8 +96,10 @@ class Instance:
 		# Export topology
 		nw = self.sub_instance.get_network()
 		topology = []		
+		(offsets, indices, link_phys) = (nw.offsets.tolist(), nw.indices.tolist(), nw.link_phys.tolist())
 		for src_id in range(nw.n):
-			for (dst_id, (src_phy, dst_phy)) in zip(nw.neighbors[src_id], nw.phy_map[src_id]):
+			for k in range(offsets[src_id], offsets[src_id+1]):
+				(dst_id, (src_phy, dst_phy)) = (indices[k], link_phys[k])
 				if src_id < dst_id:
 					link = {
 						"ep1" : {"type" : "chiplet", "outer_id" : src_id, "inner_id" : src_phy},
@@ -84,3 +108,7 @@ class Instance:
 					topology.append(link)
 		hlp.write_file("%s/ici_topologies/topology_%s_%s.json" % (path, self.params["experiment"], algo), topology)
 	
+
+# Construct an instance from a genome as returned by Instance.get_genome, optionally from a known evaluation
+def instance_from_genome(typ, params, genome, deferred = False, known = None):
+	return Instance(typ, params, {"homogeneous" : HomoPlacement, "heterogeneous" : HeteroPlacement}[typ](params, genome[0], genome[1], deferred = deferred, known = known))
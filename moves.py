@@ -0,0 +1,213 @@
+# Import python libraries
+import copy
+
+# Import our own files
+import genomes as gen		# Integer-coded genomes
+
+# Offsets of the four neighbors of a grid cell and the codes of the PHY-sides that have to face each other for a link
+link_directions = [((dr, dc), gen.phys_codes[side], gen.phys_codes[other_side]) for ((dr, dc), side, other_side) in [((0,-1), "W", "E"), ((0,1), "E", "W"), ((-1,0), "S", "N"), ((1,0), "N", "S")]]
+(empty, all_sides) = (gen.grid_codes["X"], gen.phys_codes["A"])
+
+# Return the cells that are connected to the chiplet at (row, col) of a homogeneous placement by a D2D link.
+# The grid and PHYs are nested lists of codes.
+def get_linked_cells(grid, phys, row, col):
+	if grid[row][col] == empty:
+		return []
+	(rows, cols) = (len(grid), len(grid[0]))
+	linked = []
+	for ((dr, dc), side, other_side) in link_directions:
+		(r, c) = (row + dr, col + dc)
+		if 0 <= r < rows and 0 <= c < cols and grid[r][c] != empty and phys[row][col] in [all_sides, side] and phys[r][c] in [all_sides, other_side]:
+			linked.append((r,c))
+	return linked
+
+# Return the articulation points of the subgraph induced by the relay-chiplets (given as codes) of a homogeneous placement
+def find_articulation_points(grid, phys, relay_types):
+	relays = [(row, col) for row in range(len(grid)) for col in range(len(grid[0])) if grid[row][col] in relay_types]
+	neighbors = {cell : [n for n in get_linked_cells(grid, phys, cell[0], cell[1]) if grid[n[0]][n[1]] in relay_types] for cell in relays}
+	(order, low, articulation_points) = ({}, {}, set())
+	# Iterative DFS (Tarjan): A non-root is an articulation point if a child cannot reach above it, the root if it has two children
+	for root in relays:
+		if root in order:
+			continue
+		order[root] = low[root] = len(order)
+		(stack, root_children) = ([(root, None, iter(neighbors[root]))], 0)
+		while len(stack) > 0:
+			(cur, parent, children) = stack[-1]
+			child = next(children, None)
+			if child == None:
+				stack.pop()
+				if parent != None:
+					low[parent] = min(low[parent], low[cur])
+					if parent != root and low[cur] >= order[parent]:
+						articulation_points.add(parent)
+			elif child not in order:
+				order[child] = low[child] = len(order)
+				root_children += 1 if cur == root else 0
+				stack.append((child, cur, iter(neighbors[child])))
+			elif child != parent:
+				low[cur] = min(low[cur], order[child])
+		if root_children > 1:
+			articulation_points.add(root)
+	return articulation_points
+
+# Connectivity information of a valid homogeneous placement that is used to screen its mutants. A placement is valid iff
+# its relay-chiplets form a connected subgraph and every other chiplet is linked to at least one relay-chiplet.
+# Grids and PHYs are passed as arrays of codes, relay types as letters.
+class HomoMoveState:
+	# Constructor
+	def __init__(self, grid, phys, relay_types):
+		self.grid = grid.tolist()
+		self.phys = phys.tolist()
+		self.relay_types = relay_types
+		self.relay_codes = [gen.grid_codes[typ] for typ in relay_types]
+		self.n_relays = sum([1 for row in self.grid for typ in row if typ in self.relay_codes])
+		self.articulation_points = find_articulation_points(self.grid, self.phys, self.relay_codes)
+
+	# Check if a mutant that differs from this placement in the given cells is valid without extracting its network.
+	# Returns True or False if the local information is sufficient and None if the mutant needs a full validation.
+	def check(self, grid, phys, cells):
+		# The validation starts at a compute-chiplet, the criterion only holds if compute-chiplets are relays
+		if "C" not in self.relay_types:
+			return None
+		(grid, phys) = (grid.tolist(), phys.tolist())
+		is_relay = lambda cell : grid[cell[0]][cell[1]] in self.relay_codes
+		# Cells whose relay-capability and links did not change do not change the connectivity (e.g. swapped relays with four PHYs)
+		was_relay = lambda cell : self.grid[cell[0]][cell[1]] in self.relay_codes
+		cells = set([(r, c) for (r, c) in cells if is_relay((r,c)) != was_relay((r,c)) or get_linked_cells(grid, phys, r, c) != get_linked_cells(self.grid, self.phys, r, c)])
+		# 1) Every non-relay chiplet on or next to a changed cell must be linked to a relay
+		(rows, cols) = (len(grid), len(grid[0]))
+		region = set(cells) | set([(r + dr, c + dc) for (r, c) in cells for ((dr, dc), _, _) in link_directions if 0 <= r + dr < rows and 0 <= c + dc < cols])
+		for (r, c) in region:
+			if grid[r][c] != empty and not is_relay((r,c)) and not any([is_relay(n) for n in get_linked_cells(grid, phys, r, c)]):
+				return False
+		# 2) The unchanged relays must stay connected: Removing one relay that is no articulation point is fine
+		changed_relays = [cell for cell in cells if was_relay(cell)]
+		if len(changed_relays) > 1 or self.n_relays == len(changed_relays) or any([cell in self.articulation_points for cell in changed_relays]):
+			return None
+		# 3) Every relay on a changed cell must be connected to the unchanged relays, possibly through another changed cell
+		new_relays = [cell for cell in cells if is_relay(cell)]
+		linked = {cell : [n for n in get_linked_cells(grid, phys, cell[0], cell[1]) if is_relay(n)] for cell in new_relays}
+		reached = set([cell for cell in new_relays if any([n not in cells for n in linked[cell]])])
+		progress = True
+		while progress:
+			progress = False
+			for cell in new_relays:
+				if cell not in reached and any([n in reached for n in linked[cell]]):
+					reached.add(cell)
+					progress = True
+		return len(reached) == len(new_relays)
+
+# Binary indexed tree over a list of 0/1-flags: Updates a flag and finds the k-th set (or unset) flag in O(log n)
+class FenwickTree:
+	# Constructor
+	def __init__(self, flags):
+		self.n = len(flags)
+		self.total = sum(flags)
+		self.tree = [0] + list(flags)
+		for i in range(1, self.n + 1):
+			j = i + (i & -i)
+			if j <= self.n:
+				self.tree[j] += self.tree[i]
+
+	# Return an independent copy of this tree
+	def copy(self):
+		tree = FenwickTree([])
+		(tree.n, tree.total, tree.tree) = (self.n, self.total, list(self.tree))
+		return tree
+
+	# Add delta to the flag at index i
+	def add(self, i, delta):
+		self.total += delta
+		i += 1
+		while i <= self.n:
+			self.tree[i] += delta
+			i += i & -i
+
+	# Return the number of set flags (unset flags if complement is True)
+	def count(self, complement = False):
+		return self.n - self.total if complement else self.total
+
+	# Return the index of the k-th set flag (unset flag if complement is True), k starts at 0
+	def find(self, k, complement = False):
+		(pos, step) = (0, 1 << (self.n.bit_length() - 1) if self.n > 0 else 0)
+		while step > 0:
+			if pos + step <= self.n:
+				cnt = step - self.tree[pos + step] if complement else self.tree[pos + step]
+				if cnt <= k:
+					pos += step
+					k -= cnt
+			step >>= 1
+		return pos
+
+# Index of the swap- and rotation-candidates of a placement given as a flat list of chiplet types and rotatable-flags.
+# Pairs are the candidates of the "neighbors" mutation mode, a pair is a candidate if its types differ. The k-th candidate
+# of each kind is the same as the k-th entry of the corresponding list that the mutation would build, hence, drawing the
+# index of a candidate from the random number generator selects exactly the same candidate as choosing from that list.
+class MoveIndex:
+	# Constructor
+	def __init__(self, types, pairs, rotatable):
+		self.types = list(types)
+		self.pairs = pairs
+		self.rotatable_flags = [int(flag) for flag in rotatable]
+		self.positions = {typ : FenwickTree([int(t == typ) for t in self.types]) for typ in set(self.types)}
+		self.heterotypic = FenwickTree([int(self.types[a] != self.types[b]) for (a, b) in pairs])
+		self.rotatable = FenwickTree(self.rotatable_flags)
+		# Pairs that contain each position
+		self.pairs_of = [[] for t in self.types]
+		for (i, (a, b)) in enumerate(pairs):
+			self.pairs_of[a].append(i)
+			self.pairs_of[b].append(i)
+
+	# Return an independent copy of this index, the pairs are shared
+	def copy(self):
+		index = copy.copy(self)
+		index.types = list(self.types)
+		index.rotatable_flags = list(self.rotatable_flags)
+		index.positions = {typ : tree.copy() for (typ, tree) in self.positions.items()}
+		index.heterotypic = self.heterotypic.copy()
+		index.rotatable = self.rotatable.copy()
+		return index
+
+	# Number of positions whose type differs from typ and the k-th of them
+	def count_other(self, typ):
+		return self.positions[typ].count(complement = True)
+	def find_other(self, typ, k):
+		return self.positions[typ].find(k, complement = True)
+
+	# Number of pairs with different types and the k-th of them
+	def count_pairs(self):
+		return self.heterotypic.count()
+	def find_pair(self, k):
+		return self.pairs[self.heterotypic.find(k)]
+
+	# Number of positions with a rotatable chiplet and the k-th of them
+	def count_rotatable(self):
+		return self.rotatable.count()
+	def find_rotatable(self, k):
+		return self.rotatable.find(k)
+
+	# Set the rotatable-flag of the chiplet at position pos
+	def set_rotatable(self, pos, flag):
+		if int(flag) != self.rotatable_flags[pos]:
+			self.rotatable.add(pos, int(flag) - self.rotatable_flags[pos])
+			self.rotatable_flags[pos] = int(flag)
+
+	# Swap the chiplets at positions a and b, their rotatable-flags are swapped with them
+	def swap(self, a, b):
+		(typ_a, typ_b) = (self.types[a], self.types[b])
+		(flag_a, flag_b) = (self.rotatable_flags[a], self.rotatable_flags[b])
+		self.set_rotatable(a, flag_b)
+		self.set_rotatable(b, flag_a)
+		if typ_a == typ_b:
+			return
+		# Only the pairs that contain a or b can change
+		differs = lambda i : int(self.types[self.pairs[i][0]] != self.types[self.pairs[i][1]])
+		affected = [(i, differs(i)) for i in set(self.pairs_of[a] + self.pairs_of[b])]
+		(self.types[a], self.types[b]) = (typ_b, typ_a)
+		for (i, was) in affected:
+			if differs(i) != was:
+				self.heterotypic.add(i, differs(i) - was)
+		for (pos, old, new) in [(a, typ_a, typ_b), (b, typ_b, typ_a)]:
+			self.positions[old].add(pos, -1)
+			self.positions[new].add(pos, 1)
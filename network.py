@@ -1,29 +1,85 @@
+# Import python libraries
+import numpy as np
+
+# Import our own files
+import profiling as prf				# Per-stage timing counters
+
+# Chiplet types, the compact representation stores the index of a chiplet's type in this list
+chiplet_types = ["C","M","I"]
+
 # Class representing an inter-chiplet interconnection network
+# The links are stored in compressed sparse row (CSR) format: The links of chiplet i are stored in the entries
+# offsets[i] to offsets[i+1] of indices (the neighboring chiplet) and link_phys (the PHY-ids on both ends).
 class Network:
-	# Constructor
+	# Constructor: The neighbors and the phy_map are lists with one list of neighbors / PHY-pairs per chiplet
 	def __init__(self, n, node_types, neighbors, phy_map, relay_types):
 		self.n = n
-		self.node_types = node_types
-		self.neighbors = neighbors
-		self.phy_map = phy_map
 		self.relay_types = relay_types
+		self.adjacency = None
+		# Invalid network: Its construction failed
+		if n == None or node_types == None or neighbors == None or relay_types == None:
+			self.types = None
+			return
+		self.types = np.array([chiplet_types.index(typ) for typ in node_types], dtype = np.int8)
+		self.relay_mask = np.isin(self.types, [chiplet_types.index(typ) for typ in relay_types])
+		self.offsets = np.zeros(n + 1, dtype = np.int32)
+		self.offsets[1:] = np.cumsum([len(row) for row in neighbors])
+		self.indices = np.array([nei for row in neighbors for nei in row], dtype = np.int32)
+		self.link_phys = np.array([pair for row in phy_map for pair in row], dtype = np.int32).reshape(-1, 2)
+
+	# Type of each chiplet as a list of letters
+	@property
+	def node_types(self):
+		return [chiplet_types[code] for code in self.types.tolist()] if self.types is not None else None
+
+	# Neighbors of each chiplet as lists
+	@property
+	def neighbors(self):
+		(offsets, indices) = (self.offsets.tolist(), self.indices.tolist())
+		return [indices[offsets[i]:offsets[i+1]] for i in range(self.n)]
+
+	# PHY-pairs of each chiplet's links as lists
+	@property
+	def phy_map(self):
+		(offsets, pairs) = (self.offsets.tolist(), [tuple(pair) for pair in self.link_phys.tolist()])
+		return [pairs[offsets[i]:offsets[i+1]] for i in range(self.n)]
+
+	# Return the ids of all chiplets of the given type
+	def get_chiplets_of_type(self, typ):
+		return np.flatnonzero(self.types == chiplet_types.index(typ)).tolist()
+
+	# Return the CSR adjacency without parallel links: Neighbors are sorted by chiplet-id
+	def get_adjacency(self):
+		if self.adjacency == None:
+			owners = np.repeat(np.arange(self.n, dtype = np.int64), np.diff(self.offsets))
+			keys = np.unique(owners * self.n + self.indices)
+			offsets = np.zeros(self.n + 1, dtype = np.int32)
+			offsets[1:] = np.cumsum(np.bincount(keys // self.n, minlength = self.n))
+			self.adjacency = (offsets, (keys % self.n).astype(np.int32))
+		return self.adjacency
 
 	# Check that the network is valid, i.e. fully connected
+	@prf.timed("validate")
 	def validate(self):
 		# Check that the network was initialized correctly
-		if self.n == None or self.node_types == None or self.neighbors == None or self.relay_types == None:
+		if self.types is None:
 			return False
-		# Start at a random compute-chiplet, perform BFS to check that every chiplet is reachable
-		start = self.node_types.index("C")	
-		visited = []
+		# Start at the first compute-chiplet, perform DFS to check that every chiplet is reachable
+		start = int(np.argmax(self.types == chiplet_types.index("C")))
+		offsets = self.offsets.tolist()
+		indices = self.indices.tolist()
+		relay_mask = self.relay_mask.tolist()
+		visited = [False] * self.n
+		visited[start] = True
+		n_visited = 1
 		todo = [start]
 		while len(todo) > 0:
 			cur = todo.pop()
-			visited.append(cur)
-			# Only continue BFS if the cur-chiplet has relay-capability
-			if self.node_types[cur] in self.relay_types:
-				for nei in self.neighbors[cur]:
-					if nei not in visited and nei not in todo:
+			# Only continue DFS if the cur-chiplet has relay-capability
+			if relay_mask[cur]:
+				for nei in indices[offsets[cur]:offsets[cur+1]]:
+					if not visited[nei]:
+						visited[nei] = True
+						n_visited += 1
 						todo.append(nei)
-		return len(visited) == self.n
-
+		return n_visited == self.n
@@ -4,29 +4,48 @@ import copy
 
 # Import our own files
 import placeit_helpers as hlp
+import evaluation_cache as evc
+import profiling as prf
+import bulk_sampling as bulk
+import checkpoints as ckp
 from instance import Instance
 
 
-def optimizer_best_random(typ, params, save_name):
+def optimizer_best_random(typ, params, save_name, resume = False):
 	# Extract relevant parameters
 	time_budget = params["time_budget"]
 	# Info about the best instance found
 	best_inst = None
 	updates = []
+	# Start with an empty evaluation cache and empty timing counters
+	evc.reset_cache(params)
+	prf.reset_profile()
 	# Start timer
 	starttime = time.process_time()
 	duration = 0
-	# Generate random placements until time budges is expired
 	n_generated = 0
+	# Continue an interrupted run from its checkpoint
+	state = ckp.load_checkpoint(save_name) if resume else None
+	if state != None:
+		best_inst = ckp.decode_instance(typ, params, state["best_inst"])
+		(updates, n_generated, duration) = (state["updates"], state["n_generated"], state["duration"])
+		starttime = time.process_time() - duration
+	last_checkpoint = duration
+	# Generate random placements until time budges is expired
 	while duration < time_budget:
-		# Generate and evaluate a random placement
-		inst = Instance(typ, params)
+		# Generate and evaluate a random placement or a whole batch of them with the bulk sampler
+		insts = bulk.sample_batch(typ, params, params["bulk_batch"]) if params["bulk_sampling"] else [Instance(typ, params)]
 		duration =  time.process_time() - starttime
-		n_generated += 1
-		# Check if this one is better than the previous one
-		if best_inst == None or inst.get_cost() < best_inst.get_cost():
-			best_inst = inst
-			updates.append((duration, best_inst.get_cost()))
+		n_generated += len(insts)
+		# Check if one of them is better than the previous one
+		for inst in insts:
+			if best_inst == None or inst.get_cost() < best_inst.get_cost():
+				best_inst = inst
+				updates.append((duration, best_inst.get_cost()))
+		# Store a checkpoint if one is due
+		if ckp.is_due(params, duration, last_checkpoint):
+			ckp.save_checkpoint(save_name, {"best_inst" : ckp.encode_instance(best_inst), "updates" : updates, "n_generated" : n_generated, "duration" : duration})
+			last_checkpoint = duration
 	# Storing the baseline requires serializing the phys in the configuration
 	params_ = copy.deepcopy(params)
 	for c_type in params_["phys"]:
@@ -35,6 +54,9 @@ def optimizer_best_random(typ, params, save_name):
 	to_store = {"best_inst" : best_inst.to_json(),
 				"updates" : updates,
 				"parameters" : params_,
-				"n_generated" : n_generated}
+				"n_generated" : n_generated,
+				"eval_cache" : evc.cache.get_stats(),
+				"profile" : prf.profile.get_stats(duration)}
 
 	hlp.write_file("results/%s.json" % save_name, to_store)
+	ckp.remove_checkpoint(save_name)
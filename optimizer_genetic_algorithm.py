@@ -2,17 +2,23 @@
 import random as rnd
 import time
 import copy
+import concurrent.futures
 
 # Import our own files
 import placeit_helpers as hlp
-from instance import Instance
+import evaluation_cache as evc
+import profiling as prf
+import batch_evaluation as bev
+import checkpoints as ckp
+from instance import Instance, instance_from_genome
 
 # Create a random population
 def get_random_population(typ, params):
 	pop_size = params["ga_P"]
 	population = []
 	while len(population) < pop_size:
-		population.append(Instance(typ, params))
+		population.append(Instance(typ, params, deferred = params["batch_evaluation"]))
+	bev.evaluate_instances(population, params)
 	return population
 
 # Perform tournament selection
@@ -38,15 +44,96 @@ def run_epoch(pop, params):
 		valid = False
 		while not valid:
 			parents = selection_functions[params["ga_sel_fun"]](params, pop)
-			child = parents[0].merge(parents[1])
+			child = parents[0].merge(parents[1], params["batch_evaluation"])
 			if rnd.random() < params["ga_pm"]:
-				child = child.mutate()
+				child = child.mutate(params["batch_evaluation"])
 			valid = (child.get_hash() not in new_pop_hashes)
 		new_pop.append(child)
 		new_pop_hashes.append(child.get_hash())
+	# Compute the proxies of all offspring at once if the batch evaluation is enabled
+	bev.evaluate_instances(new_pop, params)
 	return new_pop
 
-def optimizer_genetic_algorithm(typ, params, save_name):
+# Parameters of the worker processes of the offspring pool
+worker_params = None
+
+# CPU time spent by the worker processes of the offspring pool, it counts against the time budget of the GA
+pool_cpu_time = 0
+
+# Initialize a worker process of the offspring pool
+def init_pool_worker(params):
+	global worker_params
+	worker_params = params
+	evc.reset_cache(params)
+
+# Produce a chunk of children in a worker process. Each child is merged from a pair of parents, given by their genomes
+# and (validity, cost, evaluation), and mutated if its flag in mutate is set. The random draws of each child are seeded
+# by its seed, hence, the offspring does not depend on the number of workers. Like in run_epoch, mutants are
+# delta-evaluated based on their merger unless the batch evaluation is enabled, in which case the proxies of the chunk
+# are computed in one batch.
+# Returns the genome, the (validity, cost, evaluation) and the origin of each child.
+def produce_children(parents, mutate, seeds):
+	typ = worker_params["representation"]
+	children = []
+	for (genomes, mutate_child, seed) in zip(parents, mutate, seeds):
+		rnd.seed(seed)
+		(a, b) = [instance_from_genome(typ, worker_params, genome, known = known) for (genome, known) in genomes]
+		# The parents are cached like in the main process, e.g., a merger that repeats its parent is not evaluated again
+		for (parent, (genome, known)) in zip((a, b), genomes):
+			evc.insert(parent.get_hash(), worker_params, *known)
+		child = a.merge(b, worker_params["batch_evaluation"])
+		if mutate_child:
+			child = child.mutate(worker_params["batch_evaluation"])
+		children.append(child)
+	bev.evaluate_instances(children, worker_params)
+	return [(child.get_genome(), (True, child.get_cost(), child.get_eval()), child.get_origin()) for child in children]
+
+# Run a function on chunks of its arguments in a worker process and return its results, the profile and the CPU time
+def run_pool_task(function, *args):
+	starttime = time.process_time()
+	prf.reset_profile()
+	results = function(*args)
+	return (results, prf.profile, time.process_time() - starttime)
+
+# Run a function in the offspring pool: The argument lists are split into one chunk per worker, the results are in order
+@prf.timed("pool_evaluation")
+def run_in_pool(pool, params, function, *args):
+	global pool_cpu_time
+	size = -(-len(args[0]) // params["ga_pool_workers"])
+	futures = [pool.submit(run_pool_task, function, *[arg[i:i+size] for arg in args]) for i in range(0, len(args[0]), size)]
+	results = []
+	for future in futures:
+		(chunk_results, profile, cpu_time) = future.result()
+		results += chunk_results
+		prf.profile.merge(profile)
+		pool_cpu_time += cpu_time
+	return results
+
+# Perform one epoch in which the offspring is produced in the pool. The main process only selects the parents and draws
+# the mutation decision and a seed for each missing child, the workers merge, mutate, validate and evaluate the children
+# in one chunk per worker. Slots of duplicates are filled in the next round.
+def run_epoch_pool(pop, params, pool):
+	ordered_pop = sorted(pop, key = lambda x : x.get_cost())
+	# Elitism Selection
+	new_pop = ordered_pop[:params["ga_E"]]
+	new_pop_hashes = set([x.get_hash() for x in new_pop])
+	# Selecting the remaining elements
+	while len(new_pop) < params["ga_P"]:
+		n = params["ga_P"] - len(new_pop)
+		parents = [[(x.get_genome(), (True, x.get_cost(), x.get_eval())) for x in selection_functions[params["ga_sel_fun"]](params, pop)] for i in range(n)]
+		mutate = [rnd.random() < params["ga_pm"] for i in range(n)]
+		seeds = [rnd.getrandbits(64) for i in range(n)]
+		for (genome, known, origin) in run_in_pool(pool, params, produce_children, parents, mutate, seeds):
+			child = instance_from_genome(pop[0].typ, params, genome, known = known)
+			child.sub_instance.origin = origin
+			evc.insert(child.get_hash(), params, *known)
+			if child.get_hash() not in new_pop_hashes:
+				new_pop.append(child)
+				new_pop_hashes.add(child.get_hash())
+	return new_pop
+
+def optimizer_genetic_algorithm(typ, params, save_name, resume = False):
+	global pool_cpu_time
 	# Extract relevant parameters
 	time_budget = params["time_budget"]
 	store_debug_info = params["debug_info"]
@@ -55,23 +142,45 @@ def optimizer_genetic_algorithm(typ, params, save_name):
 	best_inst = None
 	updates = []
 	debug_info = []
-	# Start timer
+	# Start with an empty evaluation cache and empty timing counters
+	evc.reset_cache(params)
+	prf.reset_profile()
+	# Start timer, the elapsed time includes the CPU time of the offspring pool
 	starttime = time.process_time()
+	pool_cpu_time = 0
 	duration = 0
-	# Initialize random population
-	pop = get_random_population(typ, params)
-	# Run the genetic algorithm
 	epoch_counter = 0
+	# Continue an interrupted run from its checkpoint or initialize a random population
+	state = ckp.load_checkpoint(save_name) if resume else None
+	if state != None:
+		pop = [ckp.decode_instance(typ, params, x) for x in state["pop"]]
+		best_inst = ckp.decode_instance(typ, params, state["best_inst"])
+		(updates, debug_info, epoch_counter, duration) = (state["updates"], state["debug_info"], state["epoch_counter"], state["duration"])
+		starttime = time.process_time() - duration
+	else:
+		pop = get_random_population(typ, params)
+	last_checkpoint = duration
+	# Start the persistent pool of worker processes that evaluate the offspring
+	pool = None
+	if params["ga_pool_workers"] > 0:
+		pool = concurrent.futures.ProcessPoolExecutor(max_workers = params["ga_pool_workers"], initializer = init_pool_worker, initargs = (params,))
+	# Run the genetic algorithm
 	while duration < time_budget:
-		pop = run_epoch(pop, params)
+		pop = run_epoch(pop, params) if pool == None else run_epoch_pool(pop, params, pool)
 		epoch_counter += 1
-		duration = time.process_time() - starttime
+		duration = time.process_time() - starttime + pool_cpu_time
 		for individual in pop:
 			if best_inst == None or individual.get_cost() < best_inst.get_cost():
 				best_inst = individual
 				updates.append((duration, best_inst.get_cost()))
 		if store_debug_info and (epoch_counter % debug_divider) == 0:
 			debug_info.append((duration, [x.get_cost() for x in pop],[x.get_origin() for x in pop]))
+		# Store a checkpoint if one is due
+		if ckp.is_due(params, duration, last_checkpoint):
+			ckp.save_checkpoint(save_name, {"pop" : [ckp.encode_instance(x) for x in pop], "best_inst" : ckp.encode_instance(best_inst), "updates" : updates, "debug_info" : debug_info, "epoch_counter" : epoch_counter, "duration" : duration})
+			last_checkpoint = duration
+	if pool != None:
+		pool.shutdown()
 	# Storing the baseline requires serializing the phys in the configuration
 	params_ = copy.deepcopy(params)
 	for c_type in params_["phys"]:
@@ -80,12 +189,15 @@ def optimizer_genetic_algorithm(typ, params, save_name):
 	to_store = {"best_inst" : best_inst.to_json(),
 				"updates" : updates,
 				"parameters" : params_,
-				"n_epochs" : epoch_counter}
+				"n_epochs" : epoch_counter,
+				"eval_cache" : evc.cache.get_stats(),
+				"profile" : prf.profile.get_stats(duration)}
 	# Store debug info if configured to do so
 	if store_debug_info:
 		to_store["debug_info"] = debug_info
 	# Store results
 	hlp.write_file("results/%s.json" % save_name, to_store)
+	ckp.remove_checkpoint(save_name)
 
 
 
@@ -0,0 +1,163 @@
+# Import python libraries
+import os
+import sys
+import time
+import copy
+import random as rnd
+import multiprocessing as mp
+
+# Import our own files
+import placeit_helpers as hlp
+import evaluation_cache as evc
+import profiling as prf
+import batch_evaluation as bev
+import optimizer_genetic_algorithm as oga
+from instance import instance_from_genome
+
+# Island-model genetic algorithm: ga_islands populations evolve in worker processes. Every ga_migration_interval epochs,
+# the best ga_migration_size individuals of each island migrate to its neighbors in the migration topology and replace
+# the worst individuals there. Only genomes (int8-arrays) and costs cross process boundaries, the best instance of an
+# island is sent as JSON when it improved.
+
+# Return the ids of the islands that island i sends its emigrants to
+def get_destinations(topology, i, n_islands):
+	if topology == "ring":
+		return [(i + 1) % n_islands]
+	elif topology == "full":
+		return [j for j in range(n_islands) if j != i]
+	else:
+		print("ERROR: Invalid migration topology \"%s\"" % topology)
+		sys.exit()
+
+# Replace the worst individuals of a population by the immigrants that are not yet part of it
+def integrate_immigrants(typ, params, pop, immigrants):
+	hashes = set([x.get_hash() for x in pop])
+	new = []
+	for (genome, cost) in sorted(immigrants, key = lambda x : x[1]):
+		inst = instance_from_genome(typ, params, genome, deferred = params["batch_evaluation"])
+		if inst.get_hash() not in hashes:
+			hashes.add(inst.get_hash())
+			new.append(inst)
+	new = new[:params["ga_migration_size"]]
+	bev.evaluate_instances(new, params)
+	return sorted(pop, key = lambda x : x.get_cost())[:len(pop) - len(new)] + new
+
+# Report the state of an island to the main process: The times and costs of improvements, the best instance (only if it
+# improved) and the genomes and costs of the emigrants
+def get_report(island, improvements, params):
+	best_json = island["best"].to_json() if len(improvements) > 0 else None
+	emigrants = [(x.get_genome(), x.get_cost()) for x in sorted(island["pop"], key = lambda x : x.get_cost())[:params["ga_migration_size"]]]
+	return (improvements, best_json, emigrants)
+
+# Main loop of a worker process that holds the islands with the given ids. Each command is answered with the reports of
+# the worker's islands and its elapsed CPU time.
+def run_worker(conn, typ, params, island_ids, seed):
+	rnd.seed(seed)
+	evc.reset_cache(params)
+	prf.reset_profile()
+	starttime = time.process_time()
+	islands = {}
+	for i in island_ids:
+		pop = oga.get_random_population(typ, params)
+		best = min(pop, key = lambda x : x.get_cost())
+		islands[i] = {"pop" : pop, "best" : best, "epochs" : 0}
+	conn.send(({i : get_report(islands[i], [(time.process_time() - starttime, islands[i]["best"].get_cost())], params) for i in island_ids}, time.process_time() - starttime))
+	while True:
+		(command, immigrants) = conn.recv()
+		if command == "run":
+			reports = {}
+			for i in island_ids:
+				island = islands[i]
+				island["pop"] = integrate_immigrants(typ, params, island["pop"], immigrants[i])
+				improvements = []
+				for epoch in range(params["ga_migration_interval"]):
+					# Stop early if the budget of this worker is expired
+					if time.process_time() - starttime >= params["time_budget"]:
+						break
+					island["pop"] = oga.run_epoch(island["pop"], params)
+					island["epochs"] += 1
+					for individual in island["pop"]:
+						if individual.get_cost() < island["best"].get_cost():
+							island["best"] = individual
+							improvements.append((time.process_time() - starttime, individual.get_cost()))
+				reports[i] = get_report(island, improvements, params)
+			conn.send((reports, time.process_time() - starttime))
+		elif command == "stop":
+			conn.send(({i : islands[i]["epochs"] for i in island_ids}, prf.profile, evc.cache.get_stats()))
+			conn.close()
+			return
+
+def optimizer_island_genetic_algorithm(typ, params, save_name):
+	# Extract relevant parameters
+	time_budget = params["time_budget"]
+	n_islands = params["ga_islands"]
+	n_workers = min(n_islands, params["ga_workers"] if params["ga_workers"] > 0 else os.cpu_count())
+	destinations = {i : get_destinations(params["ga_topology"], i, n_islands) for i in range(n_islands)}
+	# Info about best instance found
+	best_json = None
+	best_cost = None
+	updates = []
+	n_migrations = 0
+	# Start the workers, island i evolves in worker i % n_workers
+	workers = []
+	for w in range(n_workers):
+		(conn, child_conn) = mp.Pipe()
+		process = mp.Process(target = run_worker, args = (child_conn, typ, params, list(range(w, n_islands, n_workers)), rnd.getrandbits(64)))
+		process.start()
+		workers.append((process, conn))
+	command = None
+	duration = 0
+	while True:
+		if command != None:
+			for (process, conn) in workers:
+				conn.send(command)
+		# Collect the reports of all islands
+		(emigrants, improvements) = ({}, [])
+		for (process, conn) in workers:
+			(reports, elapsed) = conn.recv()
+			duration = max(duration, elapsed)
+			for (i, (island_improvements, island_best_json, island_emigrants)) in reports.items():
+				emigrants[i] = island_emigrants
+				improvements += [(t, cost, island_best_json) for (t, cost) in island_improvements]
+		# Merge the improvements of all islands into the updates of the best instance. Each improvement comes with the
+		# island's best instance at the end of the round, which is at least as good as the improvement.
+		for (t, cost, island_best_json) in sorted(improvements, key = lambda x : x[0]):
+			if best_cost == None or cost < best_cost:
+				(best_cost, best_json) = (cost, island_best_json)
+				updates.append((t, cost))
+		if duration >= time_budget:
+			break
+		# Send the emigrants of each island to its destinations, an island with several sources receives the best ones
+		immigrants = {i : [] for i in range(n_islands)}
+		for i in range(n_islands):
+			for j in destinations[i]:
+				immigrants[j] += emigrants[i]
+		for i in range(n_islands):
+			immigrants[i] = sorted(immigrants[i], key = lambda x : x[1])[:params["ga_migration_size"]]
+		n_migrations += 1
+		command = ("run", immigrants)
+	# Stop the workers and merge their statistics
+	n_epochs = 0
+	profile = prf.Profile()
+	cache_stats = []
+	for (process, conn) in workers:
+		conn.send(("stop", None))
+		(epochs, worker_profile, worker_cache_stats) = conn.recv()
+		process.join()
+		n_epochs += sum(epochs.values())
+		profile.merge(worker_profile)
+		cache_stats.append(worker_cache_stats)
+	# Storing the baseline requires serializing the phys in the configuration
+	params_ = copy.deepcopy(params)
+	for c_type in params_["phys"]:
+		params_["phys"][c_type] = [x.to_json() for x in params_["phys"][c_type]]
+	# Save results
+	to_store = {"best_inst" : best_json,
+				"updates" : updates,
+				"parameters" : params_,
+				"n_epochs" : n_epochs,
+				"n_migrations" : n_migrations,
+				"eval_cache" : evc.merge_stats(cache_stats),
+				"profile" : profile.get_stats(duration)}
+	# Store results
+	hlp.write_file("results/%s.json" % save_name, to_store)
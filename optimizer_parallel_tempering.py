@@ -0,0 +1,151 @@
+# Import python libraries
+import os
+import sys
+import time
+import copy
+import math
+import random as rnd
+import multiprocessing as mp
+
+# Import our own files
+import placeit_helpers as hlp
+import evaluation_cache as evc
+import profiling as prf
+from instance import Instance
+
+# Parallel tempering (replica exchange): K Metropolis chains run at a fixed ladder of temperatures in worker processes.
+# After every pt_interval iterations, chains at neighboring temperatures exchange their temperatures, which is
+# equivalent to exchanging their states but only a temperature is sent to a worker. Workers report costs, the times of
+# improvements and the JSON of improved best instances, i.e., instances never cross process boundaries.
+
+# Run pt_interval Metropolis iterations of one chain at temperature T.
+# Returns the times and costs of the improvements of the chain's best instance.
+def run_chain(chain, T, iterations, starttime):
+	improvements = []
+	for i in range(iterations):
+		cand_inst = chain["cur"].mutate()
+		diff = cand_inst.get_cost() - chain["cur"].get_cost()
+		# Metropolis acceptance criterion
+		if diff < 0 or rnd.random() < math.exp(-diff / T):
+			chain["cur"] = cand_inst
+			if cand_inst.get_cost() < chain["best"].get_cost():
+				chain["best"] = cand_inst
+				improvements.append((time.process_time() - starttime, cand_inst.get_cost()))
+	chain["iterations"] += iterations
+	return improvements
+
+# Report the state of a chain to the main process, the best instance is only sent if it improved
+def get_report(chain, improvements):
+	best_json = chain["best"].to_json() if len(improvements) > 0 else None
+	return (chain["cur"].get_cost(), improvements, best_json)
+
+# Main loop of a worker process that holds the chains with the given ids. Each command is answered with the reports of
+# the worker's chains and its elapsed CPU time.
+def run_worker(conn, typ, params, chain_ids, seed):
+	rnd.seed(seed)
+	evc.reset_cache(params)
+	prf.reset_profile()
+	starttime = time.process_time()
+	chains = {}
+	for c in chain_ids:
+		inst = Instance(typ, params)
+		chains[c] = {"cur" : inst, "best" : inst, "iterations" : 0}
+	conn.send(({c : get_report(chains[c], [(time.process_time() - starttime, chains[c]["cur"].get_cost())]) for c in chain_ids}, time.process_time() - starttime))
+	while True:
+		(command, temperatures) = conn.recv()
+		if command == "run":
+			reports = {}
+			for c in chain_ids:
+				improvements = run_chain(chains[c], temperatures[c], params["pt_interval"], starttime)
+				reports[c] = get_report(chains[c], improvements)
+			conn.send((reports, time.process_time() - starttime))
+		elif command == "stop":
+			conn.send(({c : chains[c]["iterations"] for c in chain_ids}, prf.profile, evc.cache.get_stats()))
+			conn.close()
+			return
+
+def optimizer_parallel_tempering(typ, params, save_name):
+	# Extract relevant parameters
+	time_budget = params["time_budget"]
+	K = params["pt_chains"]
+	(T_min, T_max) = (params["pt_T_min"], params["pt_T_max"])
+	n_workers = min(K, params["pt_workers"] if params["pt_workers"] > 0 else os.cpu_count())
+	if K < 2:
+		print("ERROR: Parallel tempering requires at least two chains")
+		sys.exit()
+	# Geometric temperature ladder, ladder[j] is the id of the chain at the j-th temperature
+	temperatures = [T_min * (T_max / T_min)**(j / (K - 1)) for j in range(K)]
+	ladder = list(range(K))
+	swap_attempts = [0] * (K - 1)
+	swap_accepts = [0] * (K - 1)
+	# Info about the best instance found
+	best_json = None
+	best_cost = None
+	updates = []
+	# Start the workers, chain c runs in worker c % n_workers
+	workers = []
+	for w in range(n_workers):
+		(conn, child_conn) = mp.Pipe()
+		process = mp.Process(target = run_worker, args = (child_conn, typ, params, list(range(w, K, n_workers)), rnd.getrandbits(64)))
+		process.start()
+		workers.append((process, conn))
+	command = None
+	duration = 0
+	swap_round = 0
+	while True:
+		if command != None:
+			for (process, conn) in workers:
+				conn.send(command)
+		# Collect the reports of all chains
+		(costs, improvements) = ({}, [])
+		for (process, conn) in workers:
+			(reports, elapsed) = conn.recv()
+			duration = max(duration, elapsed)
+			for (c, (cost, chain_improvements, chain_best_json)) in reports.items():
+				costs[c] = cost
+				improvements += [(t, cost, chain_best_json) for (t, cost) in chain_improvements]
+		# Merge the improvements of all chains into the updates of the best instance. Each improvement comes with the
+		# chain's best instance at the end of the round, which is at least as good as the improvement.
+		for (t, cost, chain_best_json) in sorted(improvements, key = lambda x : x[0]):
+			if best_cost == None or cost < best_cost:
+				(best_cost, best_json) = (cost, chain_best_json)
+				updates.append((t, cost))
+		if duration >= time_budget:
+			break
+		# Propose swaps between neighboring temperatures, even and odd pairs in alternating rounds
+		if swap_round > 0:
+			for j in range(swap_round % 2, K - 1, 2):
+				(a, b) = (ladder[j], ladder[j+1])
+				swap_attempts[j] += 1
+				exponent = (1 / temperatures[j] - 1 / temperatures[j+1]) * (costs[a] - costs[b])
+				if exponent >= 0 or rnd.random() < math.exp(exponent):
+					(ladder[j], ladder[j+1]) = (b, a)
+					swap_accepts[j] += 1
+		swap_round += 1
+		command = ("run", {ladder[j] : temperatures[j] for j in range(K)})
+	# Stop the workers and merge their statistics
+	n_iterations = 0
+	profile = prf.Profile()
+	cache_stats = []
+	for (process, conn) in workers:
+		conn.send(("stop", None))
+		(iterations, worker_profile, worker_cache_stats) = conn.recv()
+		process.join()
+		n_iterations += sum(iterations.values())
+		profile.merge(worker_profile)
+		cache_stats.append(worker_cache_stats)
+	# Storing the baseline requires serializing the phys in the configuration
+	params_ = copy.deepcopy(params)
+	for c_type in params_["phys"]:
+		params_["phys"][c_type] = [x.to_json() for x in params_["phys"][c_type]]
+	# Store Results
+	to_store = {"best_inst" : best_json,
+				"updates" : updates,
+				"parameters" : params_,
+				"n_iterations" : n_iterations,
+				"temperatures" : temperatures,
+				"swap_acceptance_rates" : [swap_accepts[j] / swap_attempts[j] if swap_attempts[j] > 0 else None for j in range(K - 1)],
+				"eval_cache" : evc.merge_stats(cache_stats),
+				"profile" : profile.get_stats(duration)}
+	# Store results
+	hlp.write_file("results/%s.json" % save_name, to_store)
@@ -6,9 +6,12 @@ import random as rnd
 
 # Import our own files
 import placeit_helpers as hlp
+import evaluation_cache as evc
+import profiling as prf
+import checkpoints as ckp
 from instance import Instance
 
-def optimizer_simulated_annealing(typ, params, save_name):
+def optimizer_simulated_annealing(typ, params, save_name, resume = False):
 	# Extract relevant parameters
 	time_budget = params["time_budget"]
 	cooling = params["sa_cooling"]
@@ -24,17 +27,29 @@ def optimizer_simulated_annealing(typ, params, save_name):
 	best_inst = None
 	updates = []
 	debug_info = []
+	# Start with an empty evaluation cache and empty timing counters
+	evc.reset_cache(params)
+	prf.reset_profile()
 	# Start timer
 	starttime = time.process_time()
 	duration = 0
-	# Generate an initial placement
-	cur_inst = Instance(typ, params)	
-	# The current config is the best known at start
-	best_inst = cur_inst
-	updates.append((time.process_time() - starttime, cur_inst.get_cost()))
 	# Keep statistics
 	iteration = 0
 	n2 = n/2
+	# Continue an interrupted run from its checkpoint
+	state = ckp.load_checkpoint(save_name) if resume else None
+	if state != None:
+		cur_inst = ckp.decode_instance(typ, params, state["cur_inst"])
+		best_inst = ckp.decode_instance(typ, params, state["best_inst"])
+		(updates, debug_info, iteration, duration) = (state["updates"], state["debug_info"], state["iteration"], state["duration"])
+		starttime = time.process_time() - duration
+	else:
+		# Generate an initial placement
+		cur_inst = Instance(typ, params)
+		# The current config is the best known at start
+		best_inst = cur_inst
+		updates.append((time.process_time() - starttime, cur_inst.get_cost()))
+	last_checkpoint = duration
 	# Run simulated annealing algorithm
 	while duration < time_budget:
 		iteration += 1
@@ -76,6 +91,10 @@ def optimizer_simulated_annealing(typ, params, save_name):
 		# Store debug information
 		if store_debug_info and (iteration % debug_divider) == 0:
 			debug_info.append((duration, cand_inst.get_cost(), cur_inst.get_cost(), best_inst.get_cost()))
+		# Store a checkpoint if one is due
+		if ckp.is_due(params, duration, last_checkpoint):
+			ckp.save_checkpoint(save_name, {"cur_inst" : ckp.encode_instance(cur_inst), "best_inst" : ckp.encode_instance(best_inst), "updates" : updates, "debug_info" : debug_info, "iteration" : iteration, "duration" : duration})
+			last_checkpoint = duration
 	# Storing the baseline requires serializing the phys in the configuration
 	params_ = copy.deepcopy(params)
 	for c_type in params_["phys"]:
@@ -84,10 +103,13 @@ def optimizer_simulated_annealing(typ, params, save_name):
 	to_store = {"best_inst" : best_inst.to_json(),
 				"updates" : updates,
 				"parameters" : params_,
-				"n_iterations" : iteration}
+				"n_iterations" : iteration,
+				"eval_cache" : evc.cache.get_stats(),
+				"profile" : prf.profile.get_stats(duration)}
 	# Store debug information
 	if store_debug_info:
 		to_store["debug_info"] = debug_info
 	# Store results
 	hlp.write_file("results/%s.json" % save_name, to_store)
+	ckp.remove_checkpoint(save_name)
 
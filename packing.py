@@ -0,0 +1,189 @@
+# Import python libraries
+import copy
+import bisect
+import collections
+import numpy as np
+
+# Bottom-left corner packing of rectangular chiplets as used by the heterogeneous placement representation.
+# The occupancy is stored in a growable boolean array: Row 0 and column 0 are a permanently occupied border, the
+# chiplets are placed in rows 1 to rows and columns 1 to cols. Free corners are maintained incrementally.
+class CornerPacker:
+	# Constructor
+	def __init__(self, capacity = 16):
+		self.rows = 1
+		self.cols = 1
+		self.occupied = np.zeros((capacity, capacity), dtype = bool)
+		self.occupied[0,:] = True
+		self.occupied[:,0] = True
+		# Highest occupied row of each column and rightmost occupied column of each row (0 is the border)
+		self.top = [0] * capacity
+		self.right = [0] * capacity
+		# Free cells whose bottom and left neighbors are occupied
+		self.is_corner = np.zeros((capacity, capacity), dtype = bool)
+		self.corners = set()
+		self.update_corners(1, 2, 1, 2)
+
+	# Return an independent copy of this packer, used as a decoder checkpoint
+	def copy(self):
+		packer = copy.copy(self)
+		(packer.occupied, packer.is_corner) = (self.occupied.copy(), self.is_corner.copy())
+		(packer.top, packer.right, packer.corners) = (list(self.top), list(self.right), set(self.corners))
+		return packer
+
+	# Enlarge the occupancy array such that it holds at least the given number of rows and columns
+	def ensure_capacity(self, rows, cols):
+		(cap_rows, cap_cols) = self.occupied.shape
+		if rows <= cap_rows and cols <= cap_cols:
+			return
+		(new_rows, new_cols) = (max(rows, 2 * cap_rows), max(cols, 2 * cap_cols))
+		occupied = np.zeros((new_rows, new_cols), dtype = bool)
+		occupied[:cap_rows,:cap_cols] = self.occupied
+		occupied[0,:] = True
+		occupied[:,0] = True
+		is_corner = np.zeros((new_rows, new_cols), dtype = bool)
+		is_corner[:cap_rows,:cap_cols] = self.is_corner
+		self.occupied = occupied
+		self.is_corner = is_corner
+		self.top += [0] * (new_cols - cap_cols)
+		self.right += [0] * (new_rows - cap_rows)
+
+	# Re-evaluate the corner property of the cells in rows r0 to r1-1 and columns c0 to c1-1
+	def update_corners(self, r0, r1, c0, c1):
+		(r0, r1, c0, c1) = (max(r0, 1), min(r1, self.rows + 1), max(c0, 1), min(c1, self.cols + 1))
+		if r0 >= r1 or c0 >= c1:
+			return
+		occ = self.occupied
+		corner = occ[r0-1:r1-1,c0:c1] & occ[r0:r1,c0-1:c1-1] & ~occ[r0:r1,c0:c1]
+		for (r, c) in np.argwhere(corner != self.is_corner[r0:r1,c0:c1]).tolist():
+			if corner[r,c]:
+				self.corners.add((r0 + r, c0 + c))
+			else:
+				self.corners.discard((r0 + r, c0 + c))
+		self.is_corner[r0:r1,c0:c1] = corner
+
+	# Check if a chiplet of width w and height h placed at (row, col) overlaps an occupied cell
+	def collides(self, row, col, w, h):
+		return bool(self.occupied[row:min(row+h, self.rows+2),col:min(col+w, self.cols+2)].any())
+
+	# Return the position (col, row) at which a chiplet of width w and height h would be placed, without placing it
+	def find_position(self, w, h):
+		# Only keep corners that are either free to the top or right and select the one with the longest distance
+		# to the square-perimeter. Ties are broken by the smallest row, then by the smallest column.
+		square_size = max(self.rows, self.cols)
+		(selected_corner, best_key) = (None, None)
+		for (r, c) in self.corners:
+			if self.top[c] < r or self.right[r] < c:
+				key = (min(square_size - r, square_size - c), -r, -c)
+				if best_key == None or key > best_key:
+					(selected_corner, best_key) = ((r, c), key)
+		(row, col) = selected_corner
+		# Check if the chiplet can be placed at the corner, if not, move the chiplet
+		top_free = self.top[col] < row
+		right_free = self.right[row] < col
+		collision = self.collides(row, col, w, h)
+		while right_free and collision:
+			col += 1
+			collision = self.collides(row, col, w, h)
+		while top_free and collision:
+			row += 1
+			collision = self.collides(row, col, w, h)
+		return (col, row)
+
+	# Insert a chiplet of width w and height h at a position returned by find_position
+	def insert(self, w, h, pos):
+		(col, row) = pos
+		# Enlarge grid if necessary, there is always one free row and column beyond the placed chiplets
+		(old_rows, old_cols) = (self.rows, self.cols)
+		self.rows = max(self.rows, row + h)
+		self.cols = max(self.cols, col + w)
+		self.ensure_capacity(self.rows + 2, self.cols + 2)
+		# Add chiplet to grid
+		self.occupied[row:row+h,col:col+w] = True
+		for c in range(col, col + w):
+			self.top[c] = max(self.top[c], row + h - 1)
+		for r in range(row, row + h):
+			self.right[r] = max(self.right[r], col + w - 1)
+		# Only the cells of the chiplet, the cells above and right of it and the new rows and columns can change
+		self.update_corners(row, row + h + 1, col, col + w + 1)
+		self.update_corners(old_rows + 1, self.rows + 1, 1, self.cols + 1)
+		self.update_corners(1, self.rows + 1, old_cols + 1, self.cols + 1)
+
+	# Place a chiplet of width w and height h and return its position as (col, row)
+	def place(self, w, h):
+		pos = self.find_position(w, h)
+		self.insert(w, h, pos)
+		return pos
+
+# Skyline packing of rectangular chiplets: The packing is described by its contour, a list of segments with start
+# positions xs and heights ys. Segment i spans the columns xs[i] to xs[i+1]-1, the last segment starts at the width
+# of the packing, has height zero and extends infinitely. Each chiplet rests on the contour at the segment start that
+# keeps the bounding square of the packing smallest, ties are broken by the lowest top edge, then the leftmost start.
+# Placing a chiplet costs O(k) for k segments, the packing never has to be rescanned.
+class SkylinePacker:
+	# Constructor
+	def __init__(self):
+		self.xs = [0]
+		self.ys = [0]
+		self.width = 0
+		self.height = 0
+
+	# Return an independent copy of this packer, used as a decoder checkpoint
+	def copy(self):
+		packer = copy.copy(self)
+		(packer.xs, packer.ys) = (list(self.xs), list(self.ys))
+		return packer
+
+	# Return the heights at which a chiplet of width w rests if it is placed at the start of each segment. The segments
+	# under the chiplet form a window that slides to the right, its maximum is kept in a deque of segments with
+	# decreasing heights, hence, each segment enters and leaves the deque once.
+	def get_resting_heights(self, w):
+		(xs, ys) = (self.xs, self.ys)
+		heights = []
+		window = collections.deque()
+		j = 0
+		for i in range(len(xs)):
+			while j < len(xs) and xs[j] < xs[i] + w:
+				while len(window) > 0 and ys[window[-1]] <= ys[j]:
+					window.pop()
+				window.append(j)
+				j += 1
+			while window[0] < i:
+				window.popleft()
+			heights.append(ys[window[0]])
+		return heights
+
+	# Raise the contour between x and end-1 to the given height
+	def raise_contour(self, x, end, height):
+		(xs, ys) = (self.xs, self.ys)
+		(left, right) = (bisect.bisect_left(xs, x), bisect.bisect_left(xs, end))
+		# The segment that contains the right edge of the chiplet continues right of it
+		if right == len(xs) or xs[right] != end:
+			(xs[right:right], ys[right:right]) = ([end], [ys[right-1]])
+		(xs[left:right], ys[left:right]) = ([x], [height])
+		# Merge neighboring segments of equal height
+		for i in [left + 1, left]:
+			if 0 < i < len(xs) and ys[i] == ys[i-1]:
+				del xs[i]
+				del ys[i]
+		self.width = xs[-1]
+
+	# Return the position (x, y) at which a chiplet of width w and height h would be placed, without placing it
+	def find_position(self, w, h):
+		(best_key, best_pos) = (None, None)
+		for (x, y) in zip(self.xs, self.get_resting_heights(w)):
+			key = (max(self.width, x + w, self.height, y + h), y + h, x)
+			if best_key == None or key < best_key:
+				(best_key, best_pos) = (key, (x, y))
+		return best_pos
+
+	# Insert a chiplet of width w and height h at a position returned by find_position
+	def insert(self, w, h, pos):
+		(x, y) = pos
+		self.raise_contour(x, x + w, y + h)
+		self.height = max(self.height, y + h)
+
+	# Place a chiplet of width w and height h and return its position as (x, y)
+	def place(self, w, h):
+		pos = self.find_position(w, h)
+		self.insert(w, h, pos)
+		return pos
@@ -19,11 +19,17 @@ def read_file(filename):
 # Compute cost function normalizers
 def compute_normalizers(params):
 	from instance import Instance
+	import batch_evaluation as bev
 	all_metrics = ["c2c_lat","c2c_tp","c2m_lat","c2m_tp","c2i_lat","c2i_tp","m2i_lat","m2i_tp","area"]
 	params["cf_normalizers"] = {metric : 1 for metric in all_metrics}
 	reps = params["norm_samples"]			
 	typ = params["representation"]
-	instances = [Instance(typ, params) for i in range(reps)]
+	if params["bulk_sampling"]:
+		import bulk_sampling as bulk
+		instances = bulk.sample_instances(typ, params, reps)
+	else:
+		instances = [Instance(typ, params, deferred = params["batch_evaluation"]) for i in range(reps)]
+		bev.evaluate_instances(instances, params)
 	cf_normalizers = {}
 	for metric in all_metrics:
 		cf_normalizers[metric] = sum([inst.get_eval()[metric] for inst in instances]) / reps
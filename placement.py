@@ -2,7 +2,7 @@
 import sys
 import copy
 import math
-import queue
+import heapq
 import random as rnd
 import matplotlib.pyplot as plt
 
@@ -10,9 +10,12 @@ import matplotlib.pyplot as plt
 import config as cfg
 import placeit_helpers as hlp
 import highspeed_proxies as hspx
+import profiling as prf
+import screening as scr
 from representation_homo import HomoPlacement
 from chiplet import Chiplet
 from network import Network 
+from geometry import get_geometry_from_chiplets
 
 # Returns the distance between two positions on the chip
 def get_dist(pos1, pos2, typ):
@@ -32,12 +35,16 @@ def swap_chiplets(c1, c2):
 	c2.move_to(pos1)
 
 # The "placement" is the underlying data structure of the HeteroPlacement
+# The chiplets are stored as a Geometry (flat arrays), Chiplet objects are only created when they are accessed.
 class Placement:	
-	# Create a new placement
-	def __init__(self, params, chiplets):	
+	# Create a new placement from a list of chiplets or a geometry, evaluate it unless the caller evaluates it
+	def __init__(self, params, chiplets, evaluate = True, geometry = None):	
 		self.params = params	
-		self.chiplets = chiplets
+		self.geometry = geometry if geometry != None else get_geometry_from_chiplets(chiplets)
+		self._chiplets = None
 		self.update_placement_size()
+		if not evaluate:
+			return
 		network = self.get_network()
 		valid = network.validate()
 		self.is_valid = valid
@@ -46,6 +53,13 @@ class Placement:
 			self.cost = cost
 			self.eval = evaluation
 	
+	# Chiplet objects of this placement
+	@property
+	def chiplets(self):
+		if self._chiplets == None:
+			self._chiplets = self.geometry.to_chiplets()
+		return self._chiplets
+
 	# Store the placement as JSON
 	def to_json(self):
 		json = {
@@ -59,7 +73,7 @@ class Placement:
 	# Visualize the current placement
 	def visualize(self, fig_name = "placement"):
 		# Extract network topology
-		(nw_success, nw_error, neighbors) = self.get_network_internal()
+		(nw_success, nw_error, links) = self.get_network_internal()
 		# Set up plot
 		(fig, ax) = plt.subplots(1,1, figsize = (5,5))
 		plt.subplots_adjust(left=0.01, right = 0.99, top = 0.99, bottom = 0.01)
@@ -81,15 +95,14 @@ class Placement:
 				ax.add_patch(circ)
 		# Draw Links
 		if nw_success:
-			for (c1, p1) in neighbors:
+			for (c1, p1, c2, p2) in zip(links["src_chiplets"], links["src_phys"], links["dst_chiplets"], links["dst_phys"]):
 				phy = self.chiplets[c1].phys[p1]
 				x1 = phy.pos[0] if phy.pos[0] < self.chiplets[c1].get_pos()[0] + 0.5 else (phy.pos[0] - 0.15)
 				y1 = phy.pos[1] if phy.pos[1] < self.chiplets[c1].get_pos()[1] + 0.5 else (phy.pos[1] - 0.15)
-				for (c2, p2) in neighbors[(c1,p1)]:
-					phy = self.chiplets[c2].phys[p2]
-					x2 = phy.pos[0] if phy.pos[0] < self.chiplets[c2].get_pos()[0] + 0.5 else (phy.pos[0] - 0.15)
-					y2 = phy.pos[1] if phy.pos[1] < self.chiplets[c2].get_pos()[1] + 0.5 else (phy.pos[1] - 0.15)
-					ax.arrow(x1,y1,x2-x1,y2-y1,zorder = 5, color = cfg.plotting_color_map["link"],length_includes_head=True, head_width = 0.0, head_length = 0.0, linewidth = 6)
+				phy = self.chiplets[c2].phys[p2]
+				x2 = phy.pos[0] if phy.pos[0] < self.chiplets[c2].get_pos()[0] + 0.5 else (phy.pos[0] - 0.15)
+				y2 = phy.pos[1] if phy.pos[1] < self.chiplets[c2].get_pos()[1] + 0.5 else (phy.pos[1] - 0.15)
+				ax.arrow(x1,y1,x2-x1,y2-y1,zorder = 5, color = cfg.plotting_color_map["link"],length_includes_head=True, head_width = 0.0, head_length = 0.0, linewidth = 6)
 		ax.axis('off')
 		# Set scale
 		ax.set_xlim(-0.1,self.size[0] + 0.05)
@@ -97,114 +110,126 @@ class Placement:
 		# Store image
 		plt.savefig("plots/" + fig_name + ".pdf")
 
+	# Move the placement to the origin and compute its size
 	def update_placement_size(self):
-		bottom_left_corners = [chiplet.get_pos() for chiplet in self.chiplets]
-		correction_x = -1 * min([blc[0] for blc in bottom_left_corners])
-		correction_y = -1 * min([blc[1] for blc in bottom_left_corners])
-		vec = [correction_x, correction_y]
-		for chiplet in self.chiplets:
-			chiplet.move_by(vec)
-		top_right_corners = [chiplet.get_pos_inv() for chiplet in self.chiplets]
-		size_x = max([trc[0] for trc in top_right_corners])
-		size_y = max([trc[1] for trc in top_right_corners])
-		self.size = (size_x, size_y)
+		self._chiplets = None
+		self.size = self.geometry.normalize()
+
+	# Find all ordered pairs of PHYs on different chiplets that can be connected by a D2D link, sorted by
+	# (cidx1, cidx2, pidx1, pidx2). PHYs are hashed into a uniform grid with cells slightly larger than max_length,
+	# such that only PHYs in the same or in adjacent cells need to be compared.
+	def find_d2d_phy_pairs(self):
+		max_length = self.params["max_length"]
+		dist_type = self.params["dist_type"]
+		cell_size = max_length * (1 + 1e-9)
+		max_sq = max_length * max_length * (1 + 1e-9)
+		cells = {}
+		(phy_chiplet, phy_starts) = (self.geometry.phy_chiplet.tolist(), self.geometry.phy_starts.tolist())
+		for (phy, pos) in enumerate(self.geometry.get_phy_positions()):
+			(cidx, pidx) = (phy_chiplet[phy], phy - phy_starts[phy_chiplet[phy]])
+			cell = (math.floor(pos[0] / cell_size), math.floor(pos[1] / cell_size))
+			if cell not in cells:
+				cells[cell] = []
+			cells[cell].append((cidx, pidx, pos))
+		pairs = []
+		for ((x, y), phys) in cells.items():
+			for cell in [(x+dx, y+dy) for dx in (-1,0,1) for dy in (-1,0,1)]:
+				for (cidx2, pidx2, pos2) in cells.get(cell, []):
+					for (cidx1, pidx1, pos1) in phys:
+						if cidx1 == cidx2:
+							continue
+						# Cheap filter on the squared distance, the boundary is decided by the exact distance function
+						(dx, dy) = (pos1[0] - pos2[0], pos1[1] - pos2[1])
+						if dx * dx + dy * dy <= max_sq:
+							dist = get_dist(pos1, pos2, dist_type)
+							if dist <= max_length:
+								pairs.append((cidx1, cidx2, pidx1, pidx2, dist))
+		pairs.sort()
+		return pairs
 
 	# Derive the placement-based interconnect topology
+	@prf.timed("get_network_internal")
 	def get_network_internal(self):	
-		# 0) Construct a graph where phys are vertices and links are edges
-		neighbors = {(cidx,pidx) : [] for (cidx, c) in enumerate(self.chiplets) for pidx in range(len(c.phys)) }
-		edges = []
-		edge_weights = {}
-		edge_is_d2d = {}
+		# Skip the extraction if the placement cannot be valid
+		if self.params["prefilter"] and not scr.screen_hetero(self.geometry, self.params):
+			return (False, "necessary condition violated", None)
+		# 0) Construct a graph where phys are vertices and links are edges. PHY pidx of chiplet cidx has the id
+		# phy_offsets[cidx] + pidx, hence, ids are ordered like (cidx, pidx)-tuples.
+		n_chiplets = len(self.geometry)
+		phy_offsets = self.geometry.phy_starts.tolist()
+		n_phys = phy_offsets[-1]
+		phy_chiplet = self.geometry.phy_chiplet.tolist()
+		phy_index = [phy - phy_offsets[cidx] for (phy, cidx) in enumerate(phy_chiplet)]
+		neighbors = [[] for i in range(n_phys)]
 		# 1) Add edges within chiplet (not D2D)
-		for (cidx, c) in enumerate(self.chiplets):
-			for pidx1 in range(len(c.phys)):
-				for pidx2 in range(len(c.phys)):
-					if pidx1 == pidx2:
-						continue
-					neighbors[(cidx,pidx1)].append((cidx,pidx2))
-					neighbors[(cidx,pidx2)].append((cidx,pidx1))
-					edge_weights[((cidx,pidx1),(cidx,pidx2))] = 0
-					edge_weights[((cidx,pidx2),(cidx,pidx1))] = 0
-					edge_is_d2d[((cidx,pidx1),(cidx,pidx2))] = False
-					edge_is_d2d[((cidx,pidx2),(cidx,pidx1))] = False
-		# 2) Add edges between chiplets (D2D)
-		for (cidx1, c1) in enumerate(self.chiplets):
-			for (cidx2, c2) in enumerate(self.chiplets):
-				if cidx1 == cidx2:
-					continue
-				for (pidx1, p1) in enumerate(c1.phys):
-					for (pidx2, p2) in enumerate(c2.phys):
-						dist = get_dist(p1.pos, p2.pos, self.params["dist_type"])		
-						if dist <= self.params["max_length"]:
-							neighbors[(cidx1,pidx1)].append((cidx2,pidx2))
-							neighbors[(cidx2,pidx2)].append((cidx1,pidx1))
-							edge_weights[((cidx1,pidx1),(cidx2,pidx2))] = dist
-							edge_weights[((cidx2,pidx2),(cidx1,pidx1))] = dist
-							edge_is_d2d[((cidx1,pidx1),(cidx2,pidx2))] = True
-							edge_is_d2d[((cidx2,pidx2),(cidx1,pidx1))] = True
-							edges.append(((cidx1,pidx1),(cidx2,pidx2)))
+		for cidx in range(n_chiplets):
+			phy_ids = range(phy_offsets[cidx], phy_offsets[cidx+1])
+			for phy1 in phy_ids:
+				neighbors[phy1] += [(phy2, 0) for phy2 in phy_ids if phy2 != phy1]
+		# 2) Add edges between chiplets (D2D), both directions are listed
+		edges = []
+		for (cidx1, cidx2, pidx1, pidx2, dist) in self.find_d2d_phy_pairs():
+			(phy1, phy2) = (phy_offsets[cidx1] + pidx1, phy_offsets[cidx2] + pidx2)
+			neighbors[phy1].append((phy2, dist))
+			edges.append((dist, phy1, phy2))
 		# 3) Check for unconnected chiplets:
 		unconnected_chiplet_ids = []
-		for (cidx, c) in enumerate(self.chiplets):
-			n_links = sum([len(neighbors[(cidx,pidx)]) for pidx in range(len(c.phys))])
+		for cidx in range(n_chiplets):
+			n_links = sum([len(neighbors[phy]) for phy in range(phy_offsets[cidx], phy_offsets[cidx+1])])
 			if n_links == 0:
 				unconnected_chiplet_ids.append(cidx)
 		if len(unconnected_chiplet_ids) > 0:
 			return (False, "unconnected chiplets", unconnected_chiplet_ids)
-		# 4) Find a minimal spanning tree using Prim's Algorithm
-		final_neighbors = {(cidx,pidx) : [] for (cidx, c) in enumerate(self.chiplets) for pidx in range(len(c.phys)) }
-		phy_available = {(cidx,pidx) : True for (cidx, c) in enumerate(self.chiplets) for pidx in range(len(c.phys)) }
-		final_nodes = []
-		todo = queue.PriorityQueue()
-		todo.put((0,(None, (0,0))))
-		while todo.qsize() > 0:
-			(_, (pred,cur)) = todo.get()
+		# 4) Find a minimal spanning tree using Prim's Algorithm: Ties are broken by the ids of (pred, cur) and a D2D link
+		# is only selected if both of its PHYs are still available, i.e., each PHY is used by at most one D2D link.
+		visited = [False] * n_phys
+		partner = [-1] * n_phys
+		n_visited = 0
+		todo = [(0, -1, 0)]
+		while len(todo) > 0:
+			(_, pred, cur) = heapq.heappop(todo)
 			# If this node was already reached over a cheaper path
-			if cur in final_nodes:
+			if visited[cur]:
 				continue
 			# If one of both phys of that link are already used for a different link
-			if pred != None and (pred[0] != cur[0]) and ((not phy_available[pred]) or (not phy_available[cur])):
+			is_d2d = pred >= 0 and phy_chiplet[pred] != phy_chiplet[cur]
+			if is_d2d and (partner[pred] >= 0 or partner[cur] >= 0):
 				continue
-			# Store new node and new edge, update phy availability if needed
-			final_nodes.append(cur)
-			if pred != None:
-				final_neighbors[cur].append(pred)
-				final_neighbors[pred].append(cur)
-				if pred[0] != cur[0]:
-					phy_available[pred] = False
-					phy_available[cur] = False
+			# Store new node and new D2D link
+			visited[cur] = True
+			n_visited += 1
+			if is_d2d:
+				partner[pred] = cur
+				partner[cur] = pred
 			# Explore all neighbors
-			for nei in neighbors[cur]:
-				if nei not in final_nodes:
-					dist = edge_weights[(cur,nei)]
-					todo.put((dist, (cur, nei)))
+			for (nei, dist) in neighbors[cur]:
+				if not visited[nei]:
+					heapq.heappush(todo, (dist, cur, nei))
 		# 5) Check if the whole graph is unconnected
-		if len(final_nodes) < len(neighbors):
+		if n_visited < n_phys:
 			return (False, "unconnected network", None)
-		# 6) Post-process: Only keep D2D links
-		for (cidx1, pidx1) in final_neighbors: 
-			idx = 0
-			while idx < len(final_neighbors[(cidx1, pidx1)]):
-				(cidx2, pidx2) = final_neighbors[(cidx1, pidx1)][idx]
-				if cidx1 == cidx2:
-					del final_neighbors[(cidx1, pidx1)][idx]
-				else:
-					idx += 1
+		# 6) Post-process: Only keep D2D links, they are stored as the partner of each PHY
 		# 7) Add additional edges to increase connectivity
-		connected_chiplet_pairs = [(min(a[0],b[0]), max(a[0],b[0])) for a in final_neighbors for b in final_neighbors[a]]
-		edges = sorted(edges, key = lambda x : edge_weights[x])
-		for (src, dst) in edges:
-			if (min(src[0],dst[0]), max(src[0],dst[0])) not in connected_chiplet_pairs:
-				if phy_available[src] and phy_available[dst]:
-					final_neighbors[src].append(dst)
-					final_neighbors[dst].append(src)
-					phy_available[src] = False
-					phy_available[dst] = False
-					connected_chiplet_pairs.append((min(src[0],dst[0]), max(src[0],dst[0])))
-		return (True, None, final_neighbors)
+		link_pair = lambda phy1, phy2 : (min(phy_chiplet[phy1], phy_chiplet[phy2]), max(phy_chiplet[phy1], phy_chiplet[phy2]))
+		connected_chiplet_pairs = set([link_pair(phy, partner[phy]) for phy in range(n_phys) if partner[phy] >= 0])
+		edges.sort(key = lambda edge : edge[0])
+		for (dist, src, dst) in edges:
+			if link_pair(src, dst) not in connected_chiplet_pairs and partner[src] < 0 and partner[dst] < 0:
+				partner[src] = dst
+				partner[dst] = src
+				connected_chiplet_pairs.add(link_pair(src, dst))
+		# Return the links as flat arrays with one entry per direction, ordered by the (cidx, pidx) of the first PHY
+		src_phys = [phy for phy in range(n_phys) if partner[phy] >= 0]
+		links = {
+			"src_chiplets" : [phy_chiplet[phy] for phy in src_phys],
+			"src_phys" : [phy_index[phy] for phy in src_phys],
+			"dst_chiplets" : [phy_chiplet[partner[phy]] for phy in src_phys],
+			"dst_phys" : [phy_index[partner[phy]] for phy in src_phys],
+		}
+		return (True, None, links)
 		
 	# Derive the placement-based interconnect topology
+	@prf.timed("get_network")
 	def get_network(self):	
 		# Try to extract a network topology
 		(success, error, info) = self.get_network_internal()
@@ -213,16 +238,13 @@ class Placement:
 			return Network(None, None, None, None, None)
 		# Topology was successfully derived, convert to output format
 		else:
-			n = len(self.chiplets)
-			node_types = [self.chiplets[i].typ for i in range(n)]
+			n = len(self.geometry)
+			node_types = list(self.geometry.types)
 			neighbors = [[] for i in range(n)]		
 			phy_map = [[] for i in range(n)]		
-			internal_neighbors = info
-			for (cidx1, pidx1) in internal_neighbors:
-				for (cidx2, pidx2) in internal_neighbors[(cidx1, pidx1)]:
-					if cidx1 != cidx2:
-						neighbors[cidx1].append(cidx2)
-						phy_map[cidx1].append((pidx1, pidx2))
+			for (cidx1, pidx1, cidx2, pidx2) in zip(info["src_chiplets"], info["src_phys"], info["dst_chiplets"], info["dst_phys"]):
+				neighbors[cidx1].append(cidx2)
+				phy_map[cidx1].append((pidx1, pidx2))
 			return Network(n, node_types, neighbors, phy_map, self.params["relay_chiplets"])
 
 	# Return the area of this placement
@@ -400,10 +400,12 @@ def plot_ninstances(exp):
 			data = hlp.read_file("results/%s_%s_%d.json" % (exp, algo, rep))
 			if algo == "br":
 				all_counters.append(data["n_generated"])
-			if algo == "sa":
+			if algo in ["sa","pt"]:
 				all_counters.append(data["n_iterations"])
 			if algo == "ga":
 				all_counters.append(params["ga_E"] + data["n_epochs"] * (params["ga_P"] - params["ga_E"]))
+			if algo == "ig":
+				all_counters.append(params["ga_islands"] * params["ga_E"] + data["n_epochs"] * (params["ga_P"] - params["ga_E"]))
 		if len(all_counters) > 0:
 			col = cfg.plotting_color_map[algo]
 			vp = ax.violinplot([all_counters], [j], showmeans = True)
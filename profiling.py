@@ -0,0 +1,77 @@
+# Import python libraries
+import time
+import functools
+
+# Accumulated wall time, CPU time and number of calls of each stage and event counters
+class Profile:
+	# Constructor
+	def __init__(self):
+		self.stages = {}
+		self.counters = {}
+
+	# Add one call of a stage
+	def add(self, stage, wall, cpu):
+		if stage not in self.stages:
+			self.stages[stage] = [0, 0.0, 0.0]
+		entry = self.stages[stage]
+		entry[0] += 1
+		entry[1] += wall
+		entry[2] += cpu
+
+	# Increment an event counter
+	def count(self, counter, k = 1):
+		self.counters[counter] = self.counters.get(counter, 0) + k
+
+	# Add the stages and counters of another profile, e.g., of a worker process
+	def merge(self, other):
+		for (stage, (calls, wall, cpu)) in other.stages.items():
+			if stage not in self.stages:
+				self.stages[stage] = [0, 0.0, 0.0]
+			entry = self.stages[stage]
+			entry[0] += calls
+			entry[1] += wall
+			entry[2] += cpu
+		for (counter, k) in other.counters.items():
+			self.count(counter, k)
+
+	# Return the totals of all stages and counters and derived statistics, duration is the CPU time of the whole run
+	def get_stats(self, duration):
+		get = lambda counter : self.counters.get(counter, 0)
+		ratio = lambda a, b : a / b if b > 0 else None
+		return {
+			"stages" : {stage : {"calls" : calls, "wall" : wall, "cpu" : cpu} for (stage, (calls, wall, cpu)) in self.stages.items()},
+			"counters" : dict(self.counters),
+			"invalid_random" : get("random_attempts") - get("random_placements"),
+			"random_acceptance_rate" : ratio(get("random_placements"), get("random_attempts")),
+			"invalid_mutants" : get("mutation_attempts") - get("mutants"),
+			"invalid_mutants_evaluated" : get("mutation_attempts") - get("mutants") - get("screened_mutants"),
+			"invalid_mergers" : get("merge_attempts") - get("mergers"),
+			"retries_per_mutant" : ratio(get("mutation_attempts") - get("mutants"), get("mutants")),
+			"retries_per_merger" : ratio(get("merge_attempts") - get("mergers"), get("mergers")),
+			"evaluations_per_second" : ratio(get("evaluations"), duration),
+			"prefilter_rejections" : {counter[len("prefilter_"):] : k for (counter, k) in self.counters.items() if counter.startswith("prefilter_") and counter != "prefilter_checks"},
+		}
+
+# The profile of the current run, it is replaced by reset_profile at the start of each optimization
+profile = Profile()
+
+# Replace the profile by an empty one
+def reset_profile():
+	global profile
+	profile = Profile()
+
+# Increment an event counter of the current profile
+def count(counter, k = 1):
+	profile.count(counter, k)
+
+# Decorator that accumulates the wall time, CPU time and number of calls of a function as the given stage
+def timed(stage):
+	def decorator(function):
+		@functools.wraps(function)
+		def wrapper(*args, **kwargs):
+			(wall, cpu) = (time.perf_counter(), time.process_time())
+			result = function(*args, **kwargs)
+			profile.add(stage, time.perf_counter() - wall, time.process_time() - cpu)
+			return result
+		return wrapper
+	return decorator
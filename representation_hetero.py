@@ -1,36 +1,71 @@
 # Import python libraries
 import sys
-import copy
 import random as rnd
+import numpy as np
 
 # Import our own files
 import config as cfg					# Experiment Configuration
 import placeit_helpers as hlp			# Helpers 
 import highspeed_proxies as hspx		# Performance proxies
-from chiplet import Chiplet				# Chiplet-Class
+import delta_proxies as dpx				# Incremental evaluation of the performance proxies
+import evaluation_cache as evc			# Cache of evaluated placements
+import profiling as prf					# Per-stage timing counters
+import genomes as gen					# Integer-coded genomes
+import generators as gnr				# Constructive generation of random placements
 from placement import Placement			# Placement-Class
+from geometry import get_template		# Rotated sizes and PHY-offsets of the chiplet types
+from geometry import build_geometry		# Struct-of-arrays geometry of a placement
+from packing import CornerPacker		# Corner-based packing of chiplets
+from packing import SkylinePacker		# Skyline-based packing of chiplets
+from moves import MoveIndex				# Index of swap- and rotation-candidates
+
+# Map of decoders that pack the chiplets of a heterogeneous placement
+decoders = {
+	"corner" : CornerPacker,
+	"skyline" : SkylinePacker,
+}
+
+# Codes of the rotations that a chiplet with the given rotation behaviour can take
+rotation_choices = {
+	"invariant" : [0],
+	"hybrid" : [0,1],
+	"sensitive" : [0,1,2,3],
+}
+
+# Number of chiplets between two decoder checkpoints of a placement with n chiplets
+def get_checkpoint_interval(params, n):
+	limit = params["decoder_checkpoints"]
+	return -(-n // (limit + 1)) if limit > 0 else n
 
 # Placement Representation for Heterogeneous Chiplets
 class HeteroPlacement:	
 
 	# Constructor
-	def __init__(self, params, types = None, rotations = None):
+	# Parent: Placement this one was derived from, its evaluation is reused if delta evaluation is enabled
+	# Deferred: Only validate the placement, the proxies are computed later for a whole batch of placements
+	# Relatives: Placements whose decoder checkpoints can be reused if they share a prefix with this placement
+	# Known: (validity, cost, evaluation) computed elsewhere (e.g., by a worker process) that is used instead of evaluating
+	# Types and rotations are passed as lists of letters and degrees or as int8-arrays of their codes and are stored as the latter
+	def __init__(self, params, types = None, rotations = None, parent = None, deferred = False, relatives = (), known = None):
 		self.params = params
 		self.placement = None
+		self.positions = None
+		self.checkpoints = None
+		self.move_index = None
+		self.move_index_source = None
+		self.proxy_state = None
+		self.pending = None
 		# Parameterized initialization: This can result in an invalid placement
-		if types != None and rotations != None:
-			self.types = types
-			self.rotations = rotations
-			network = self.get_network()
-			self.is_valid = network.validate()
+		if types is not None and rotations is not None:
+			self.types = gen.encode(types, gen.type_codes)
+			self.rotations = gen.encode_rotations(rotations)
 			self.hash = self.compute_hash()
-			self.cost = float("NaN")
-			if self.is_valid:
-				(cost, evaluation) = hspx.compute_highspeed_proxies(self.get_area(), network, params)
-				self.cost = cost
-				self.eval = evaluation
+			self.evaluate(parent, deferred, relatives, known)
+		# Constructive random initialization: Builds likely valid placements, always produces a valid placement
+		elif params["random_generator"] == "constructive":
+			self.init_constructive(deferred)
 		# Random Initialization: Always produces a valid placement
-		else:
+		elif params["random_generator"] == "rejection":
 			n_compute = params["n_compute"]	
 			n_memory = params["n_memory"]	
 			n_io = params["n_io"]	
@@ -49,195 +84,275 @@ class HeteroPlacement:
 					if rb == "sensitive":
 						valid_rotations += [90,180,270]
 					rotations.append(rnd.choice(valid_rotations))
-				self.types = types	
-				self.rotations = rotations
-				network = self.get_network()	
-				valid = network.validate()
-			self.valid = valid
-			(cost, evaluation) = hspx.compute_highspeed_proxies(self.get_area(), network, params)
-			self.cost = cost
-			self.eval = evaluation
+				self.types = gen.encode(types, gen.type_codes)
+				self.rotations = gen.encode_rotations(rotations)
+				self.hash = self.compute_hash()
+				self.evaluate(deferred = deferred)
+				valid = self.is_valid
+				prf.count("random_attempts")
+			prf.count("random_placements")
 			self.origin = "random"
-			self.hash = self.compute_hash()
+		else:
+			print("ERROR: Invalid random generator \"%s\"" % params["random_generator"])
+			sys.exit()
+
+	# Construct a random placement chiplet by chiplet until it is valid, optionally followed by validity-preserving moves
+	def init_constructive(self, deferred = False):
+		decoder = self.params["hetero_decoder"]
+		if decoder not in decoders:
+			print("ERROR: Invalid heterogeneous decoder \"%s\"" % decoder)
+			sys.exit()
+		n = self.params["n_compute"] + self.params["n_memory"] + self.params["n_io"]
+		valid = False
+		while not valid:
+			# The constructed genome is decoded from the packing of the generator, i.e., it is not packed again
+			decoding = gnr.construct_hetero_genome(self.params, decoders[decoder](), rotation_choices, get_checkpoint_interval(self.params, n))
+			current = HeteroPlacement(self.params, decoding.types, decoding.rotations, deferred = True, relatives = [decoding])
+			valid = current.is_valid
+			prf.count("random_attempts")
+		# Validity-preserving moves, each proposal is decoded from the checkpoints of the current placement and validated
+		def validate(genome, placement):
+			candidate = HeteroPlacement(self.params, genome[0], genome[1], deferred = True, relatives = [placement])
+			return candidate if candidate.is_valid else None
+		propose = lambda placement : gnr.propose_hetero_move((placement.types, placement.rotations), self.params, rotation_choices)
+		current = gnr.mix_genome(current, propose, validate, self.params["generator_mixing"] * n)
+		# Adopt the decoding and the validated network of the final placement instead of constructing them again
+		(self.types, self.rotations, self.hash) = (current.types, current.rotations, current.hash)
+		(self.placement, self.positions, self.checkpoints) = (current.placement, current.positions, current.checkpoints)
+		(self.is_valid, self.cost, self.pending) = (current.is_valid, current.cost, current.pending)
+		if current.pending == None:
+			self.eval = current.eval
+		# Compute the proxies unless they are computed later by the batch evaluation
+		elif not deferred:
+			self.set_evaluation(*self.compute_proxies(self.pending))
+		prf.count("random_placements")
+		self.origin = "random"
 			
+	# Evaluate the placement: Look it up in the evaluation cache or decode it, extract and validate its network and compute the proxies
+	def evaluate(self, parent = None, deferred = False, relatives = (), known = None):
+		self.cost = float("NaN")
+		cached = known if known != None else evc.lookup(self.hash, self.params)
+		if cached != None:
+			(self.is_valid, cost, evaluation) = cached
+		else:
+			network = self.get_network(relatives)
+			self.is_valid = network.validate()
+			# Keep the network of a valid placement until the proxies are computed by the batch evaluation
+			if deferred and self.is_valid:
+				self.pending = network
+				return
+			(cost, evaluation) = self.compute_proxies(network, parent) if self.is_valid else (None, None)
+			evc.insert(self.hash, self.params, self.is_valid, cost, evaluation)
+		if self.is_valid:
+			self.cost = cost
+			self.eval = evaluation
+
+	# Set the proxies of a placement whose evaluation was deferred
+	def set_evaluation(self, cost, evaluation):
+		self.pending = None
+		self.cost = cost
+		self.eval = evaluation
+		evc.insert(self.hash, self.params, True, cost, evaluation)
+
+	# Return the number of leading chiplets that have the same type and rotation in this and the other placement
+	def get_common_prefix(self, other):
+		differs = (self.types != other.types) | (self.rotations != other.rotations)
+		return int(np.argmax(differs)) if differs.any() else len(self.types)
+
 	# Construct and return a placement based on this placement representation 
-	def construct_placement(self):
-		# Initialize grid
-		rows = 1
-		cols = 1
-		grid = [["x","x","x"],["x", " "," "],["x", " "," "]]
-		chiplets = []
-		# Iterate through the chiplets
-		for (i, (typ, rot)) in enumerate(zip(self.types, self.rotations)):
-			# Construct chiplet with wrong location, rotate it and extract size from it 
-			chiplet = Chiplet((0, 0), self.params["dimensions"][typ], typ, self.params["phys"][typ])
-			chiplet.rotate(rot)
-			(w,h) = chiplet.size
-			# Find Candidate corners
-			cand_corners = []
-			for r in range(1,rows+1,1):
-				for c in range(1,cols+1,1):
-					if grid[r-1][c] == "x" and grid[r][c-1] == "x" and grid[r][c] == " ":
-						cand_corners.append((r,c))							
-			# Only keep corners that are either free to the top or right
-			corners = []
-			for (r,c) in cand_corners:
-				topfree = sum([0 if grid[rr][c] == " " else 1 for rr in range(r, rows+1,1)]) == 0
-				rightfree = sum([0 if grid[r][cc] == " " else 1 for cc in range(c, cols+1,1)]) == 0
-				if topfree or rightfree:
-					corners.append((r,c))
-			# Find the corner with longest distance to square-perimeter	
-			max_dist = -1 * float("inf")
-			selected_corner = None
-			square_size = max(rows, cols)
-			for (r,c) in corners:
-				dist = min(square_size - r, square_size - c)
-				if dist > max_dist:
-					max_dist = dist
-					selected_corner = (r,c)
-			row, col = selected_corner
-			# Check if the chiplet can be placed at the corner, if not, move the chiplet
-			top_free = sum([0 if grid[rr][col] == " " else 1 for rr in range(row, rows+1,1)]) == 0
-			right_free = sum([0 if grid[row][cc] == " " else 1 for cc in range(col, cols+1,1)]) == 0
-			collision = sum([1 if grid[rr][cc] == "x" else 0 for rr in range(row, min(row+h, rows+2), 1) for cc in range(col, min(col+w, cols+2), 1)]) > 0
-			while right_free and collision:
-				col += 1
-				collision = sum([1 if grid[rr][cc] == "x" else 0 for rr in range(row, min(row+h, rows+2), 1) for cc in range(col, min(col+w, cols+2), 1)]) > 0
-			while top_free and collision:
-				row += 1
-				collision = sum([1 if grid[rr][cc] == "x" else 0 for rr in range(row, min(row+h, rows+2), 1) for cc in range(col, min(col+w, cols+2), 1)]) > 0
-			# Enlarge grid if necessary
-			rows_missing = row + h - rows
-			cols_missing = col + w - cols
-			if rows_missing > 0:
-				for j in range(rows_missing):
-					grid.append(["x"] + [" " for k in range(cols + 1)])
-				rows += rows_missing
-			if cols_missing > 0:
-				for j in range(rows+2):
-					grid[j] += ([" " for k in range(cols_missing)] if j > 0 else ["x" for k in range(cols_missing)])
-				cols += cols_missing
-			# Add chiplet to placement and to grid
-			chiplet.move_to((col, row))
-			chiplets.append(chiplet)
-			for r in range(row, row + h, 1):
-				for c in range(col, col + w, 1):
-					grid[r][c] = "x"
-		# Create and return placement:	
-		self.placement = Placement(self.params, chiplets)
+	# Chiplets are packed in sequence, hence, the packing of a shared prefix can be resumed from a relative's checkpoint.
+	# Checkpoints are the packer-states before chiplets interval, 2 * interval, ... and are shared between placements.
+	@prf.timed("construct_placement")
+	def construct_placement(self, relatives = ()):
+		decoder = self.params["hetero_decoder"]
+		if decoder not in decoders:
+			print("ERROR: Invalid heterogeneous decoder \"%s\"" % decoder)
+			sys.exit()
+		n = len(self.types)
+		interval = get_checkpoint_interval(self.params, n)
+		# Resume from the latest checkpoint that lies within the prefix shared with a relative
+		(start, packer, self.positions, self.checkpoints) = (0, None, [], [])
+		for relative in relatives:
+			if relative.checkpoints == None or relative.params["hetero_decoder"] != decoder:
+				continue
+			prefix = self.get_common_prefix(relative)
+			usable = [checkpoint for checkpoint in relative.checkpoints if checkpoint[0] <= prefix]
+			if len(usable) > 0 and usable[-1][0] > start:
+				(start, packer) = usable[-1]
+				self.positions = relative.positions[:start]
+				self.checkpoints = usable
+		packer = packer.copy() if packer != None else decoders[decoder]()
+		if start > 0:
+			prf.count("resumed_decodings")
+			prf.count("resumed_chiplets", start)
+		(types, rotations) = (gen.decode(self.types, gen.type_letters), gen.decode_rotations(self.rotations))
+		# Iterate through the chiplets that are not packed in the checkpoint
+		for i in range(start, n):
+			# The size of the rotated chiplet is taken from its template
+			(w,h) = get_template(self.params, types[i], rotations[i])[0]
+			if i > 0 and i % interval == 0:
+				self.checkpoints.append((i, packer.copy()))
+			self.positions.append(packer.place(w, h))
+		# Create and return placement: It is evaluated by this representation, not by the placement itself
+		geometry = build_geometry(self.params, types, rotations, self.positions)
+		self.placement = Placement(self.params, None, evaluate = False, geometry = geometry)
 
 	# Construct placement if not yet done and return it.
-	def get_placement(self):
+	def get_placement(self, relatives = ()):
 		if self.placement == None:
-			self.construct_placement()
+			self.construct_placement(relatives)
 		return self.placement
-			
+
+	# Compute the performance proxies, incrementally based on the parent if delta evaluation is enabled
+	def compute_proxies(self, network, parent = None):
+		if not self.params["delta_evaluation"]:
+			return hspx.compute_highspeed_proxies(self.get_area(), network, self.params)
+		parent_state = parent.proxy_state if parent != None else None
+		(cost, evaluation, self.proxy_state) = dpx.compute_highspeed_proxies_delta(self.get_area(), network, self.params, parent_state)
+		return (cost, evaluation)
+
 	# Translate the placement to json
 	def to_json(self):
 		json = {
-			"types" : self.types,
-			"rotations" : self.rotations,
+			"types" : gen.decode(self.types, gen.type_letters),
+			"rotations" : gen.decode_rotations(self.rotations),
 			"cost" : self.cost,
 			"eval" : self.eval,
 		}
 		return json
 
+	# Return the genome, i.e., the types and rotations as int8-arrays of codes
+	def get_genome(self):
+		return (self.types, self.rotations)
+
 	# Visualize the placement 
 	def visualize(self, fig_name = None):
 		self.get_placement().visualize(fig_name)
 
 	# Return the network topology
-	def get_network(self):
-		return self.get_placement().get_network()
+	def get_network(self, relatives = ()):
+		return self.get_placement(relatives).get_network()
 
 	# Return the total area
 	def get_area(self):
 		return self.get_placement().get_area()
 
-	# Perform a mutation
-	def mutate(self):
-		tmp = [self.params["rotation_behaviour"][typ] for typ in self.types]
-		can_rotate = (tmp.count("sensitive") + tmp.count("hybrid")) > 0
+	# Propose a random mutation of the placement. Returns the mutated genome and the swaps that derive the mutant's move
+	# index from this one.
+	def propose_mutation(self):
+		index = self.get_move_index()
+		can_rotate = index.count_rotatable() > 0
 		bias = self.params["mutation_bias"]
 		n = len(self.types)
+		new_types = self.types.copy()
+		new_rotations = self.rotations.copy()
+		swaps = []
+		rand_num = rnd.random()
+		# Swap chiplets
+		if "both" in self.params["mutation_mode"] or (rand_num >= bias) or (not can_rotate):
+			if "any" in self.params["mutation_mode"]:
+				idx1 = rnd.randrange(n)
+				typ1 = int(new_types[idx1])
+				idx2 = index.find_other(typ1, rnd.randrange(index.count_other(typ1)))
+			elif "neighbors" in self.params["mutation_mode"]:
+				(idx1, idx2) = index.find_pair(rnd.randrange(index.count_pairs()))
+			else:
+				print("ERROR: Invalid mutation mode: \"%s\"" % self.params["mutation_mode"])
+				sys.exit()
+			new_types[[idx1, idx2]] = new_types[[idx2, idx1]]
+			new_rotations[[idx1, idx2]] = new_rotations[[idx2, idx1]]
+			swaps.append((idx1, idx2))
+		# Rotate chiplet
+		if ("both" in self.params["mutation_mode"] or (rand_num < bias)) and can_rotate:
+			# Select which chiplet to rotate: The index is temporarily updated if the chiplets were swapped
+			for (a, b) in swaps:
+				index.swap(a, b)
+			idx = index.find_rotatable(rnd.randrange(index.count_rotatable()))
+			for (a, b) in swaps:
+				index.swap(a, b)
+			# Create list of valid rotations
+			valid_rotations = list(rotation_choices[self.params["rotation_behaviour"][gen.type_letters[new_types[idx]]]])
+			if new_rotations[idx] in valid_rotations:
+				valid_rotations.remove(new_rotations[idx])
+			new_rotations[idx] = rnd.choice(valid_rotations)
+		return ((new_types, new_rotations), swaps)
+
+	# Construct the mutant of a proposal of propose_mutation
+	def get_mutant(self, proposal, deferred = False, known = None):
+		((types, rotations), swaps) = proposal
+		mutant = HeteroPlacement(self.params, types, rotations, parent = self, deferred = deferred, relatives = [self], known = known)
+		mutant.origin = "mutate"
+		# The mutant derives its move index from this one when it is mutated itself
+		mutant.move_index_source = (self.get_move_index(), swaps)
+		return mutant
+
+	# Perform a mutation
+	@prf.timed("mutate")
+	def mutate(self, deferred = False):
 		valid = False
 		while not valid:
-			new_types = copy.deepcopy(self.types)
-			new_rotations = copy.deepcopy(self.rotations)
-			rand_num = rnd.random()
-			# Swap chiplets
-			if "both" in self.params["mutation_mode"] or (rand_num >= bias) or (not can_rotate):
-				if "any" in self.params["mutation_mode"]:
-					idx1 = rnd.choice(list(range(n))) 
-					idx2 = rnd.choice([x for x in range(n) if new_types[x] != new_types[idx1]])
-				elif "neighbors" in self.params["mutation_mode"]:
-					(idx1, idx2) = rnd.choice([(i,i+1) for i in range(n-1) if new_types[i] != new_types[i+1]])
-				else:
-					print("ERROR: Invalid mutation mode: \"%s\"" % self.params["mutation_mode"])
-					sys.exit()
-				tmp_type = new_types[idx1]
-				new_types[idx1] = new_types[idx2]
-				new_types[idx2] = tmp_type
-				tmp_rot = new_rotations[idx1]
-				new_rotations[idx1] = new_rotations[idx2]
-				new_rotations[idx2] = tmp_rot
-			# Rotate chiplet
-			if ("both" in self.params["mutation_mode"] or (rand_num < bias)) and can_rotate:
-				# Select which chiplet to rotate
-				idx = rnd.choice([x for x in range(n) if self.params["rotation_behaviour"][new_types[x]] != "invariant"])
-				# Create list of valid rotations
-				valid_rotations = [0,90] if self.params["rotation_behaviour"][new_types[idx]] == "hybrid" else [0,90,180,270]
-				if new_rotations[idx] in valid_rotations:
-					valid_rotations.remove(new_rotations[idx])
-				new_rotations[idx] = rnd.choice(valid_rotations)
-			mutant = HeteroPlacement(self.params, new_types, new_rotations)	
+			mutant = self.get_mutant(self.propose_mutation(), deferred)
 			valid = mutant.is_valid
-		mutant.origin = "mutate"
+			prf.count("mutation_attempts")
+		prf.count("mutants")
 		return mutant
 
-	# Merge two placement
-	def merge(self, other):
-		n = len(self.types)	
-		tmp_types = [None for i in range(n)]
-		tmp_rotations = [None for i in range(n)]
-		# Set locations that match in this and the other placement
-		for i in range(n):
-			if self.types[i] == other.types[i]:
-				tmp_types[i] = self.types[i]
-			if self.rotations[i] == other.rotations[i]:
-				tmp_rotations[i] = self.rotations[i]
-		# Randomly set the remaining locations - repeat until the resulting placement is valid
+	# Return the index of swap- and rotation-candidates: Derive it from the parent's index or build it
+	def get_move_index(self):
+		if self.move_index == None:
+			if self.move_index_source != None:
+				(index, swaps) = self.move_index_source
+				self.move_index = index.copy()
+				for (a, b) in swaps:
+					self.move_index.swap(a, b)
+				self.move_index_source = None
+			else:
+				rotatable = [self.params["rotation_behaviour"][typ] != "invariant" for typ in gen.decode(self.types, gen.type_letters)]
+				self.move_index = MoveIndex(self.types.tolist(), [(i, i+1) for i in range(len(self.types) - 1)], rotatable)
+		return self.move_index
+
+	# Propose a merger of two placements: Returns its genome as int8-arrays
+	def propose_merge(self, other):
+		# Set locations that match in this and the other placement, -1 marks the remaining locations
+		new_types = np.where(self.types == other.types, self.types, -1).astype(np.int8)
+		new_rotations = np.where(self.rotations == other.rotations, self.rotations, -1).astype(np.int8)
+		(free_types, free_rotations) = (np.flatnonzero(new_types < 0), np.flatnonzero(new_rotations < 0))
+		# Randomly set the remaining locations
+		to_place = []
+		for typ in ["C","M","I"]:
+			code = gen.type_codes[typ]
+			to_place += [code] * int(np.count_nonzero(self.types == code) - np.count_nonzero(new_types == code))
+		rnd.shuffle(to_place)
+		# Sanity Check
+		if len(to_place) != len(free_types):
+			print("ERROR: Merging of Placements seems to contain a Bug: Not all chiplets have been placed")
+			sys.exit()
+		# The free locations are filled from the end of the shuffled list
+		new_types[free_types] = to_place[::-1]
+		for i in free_rotations.tolist():
+			new_rotations[i] = rnd.choice(rotation_choices[self.params["rotation_behaviour"][gen.type_letters[new_types[i]]]])
+		return (new_types, new_rotations)
+
+	# Construct the merger of a genome proposed by propose_merge
+	def get_merger(self, other, genome, deferred = False, known = None):
+		merger = HeteroPlacement(self.params, genome[0], genome[1], deferred = deferred, relatives = [self, other], known = known)
+		merger.origin = "merge"
+		return merger
+
+	# Merge two placement, repeat until the merger is valid
+	@prf.timed("merge")
+	def merge(self, other, deferred = False):
 		valid = False
 		while not valid:
-			new_types = copy.deepcopy(tmp_types)
-			new_rotations = copy.deepcopy(tmp_rotations)
-			n_comp_missing = self.types.count("C") - new_types.count("C")
-			n_mem_missing = self.types.count("M") - new_types.count("M")
-			n_io_missing = self.types.count("I") - new_types.count("I")
-			to_place = n_comp_missing * ["C"] + n_mem_missing * ["M"] + n_io_missing * ["I"]
-			rnd.shuffle(to_place)
-			for i in range(n):
-				if new_types[i] == None:
-					new_types[i] = to_place.pop()
-				if new_rotations[i] == None:
-					valid_rotations = [0]
-					if self.params["rotation_behaviour"][new_types[i]] == "hybrid":
-						valid_rotations += [90]
-					elif self.params["rotation_behaviour"][new_types[i]] == "sensitive": 
-						valid_rotations += [90,180,270]
-					new_rotations[i] = rnd.choice(valid_rotations)
-			# Sanity Check
-			if len(to_place) > 0:
-				print("ERROR: Merging of Placements seems to contain a Bug: Not all chiplets have been placed")
-				sys.exit()
-			merger = HeteroPlacement(self.params, new_types, new_rotations)	
+			merger = self.get_merger(other, self.propose_merge(other), deferred)
 			valid = merger.is_valid
-		merger.origin = "merge"
+			prf.count("merge_attempts")
+		prf.count("mergers")
 		return merger
 
 	# Compute a unique hash of this placement
 	def compute_hash(self):
-		return "".join([self.types[i] + str(int(self.rotations[i] // 90)) for i in range(min(len(self.types), len(self.rotations)))])
+		return gen.get_genome_hash(self.types, self.rotations)
 
 	# Export this placement to RapidChiplet
 	def export(self, path, algo):
@@ -1,36 +1,75 @@
 # Import python libraries
 import sys
-import copy
 import random as rnd
+import numpy as np
 import matplotlib.pyplot as plt
 
 # Import our own files
 import config as cfg
 import placeit_helpers as hlp
 import highspeed_proxies as hspx	# Our implementation of the performance proxies from RapidChiplet
+import delta_proxies as dpx			# Incremental evaluation of the performance proxies
+import evaluation_cache as evc		# Cache of evaluated placements
+import profiling as prf				# Per-stage timing counters
+import genomes as gen				# Integer-coded genomes
+import screening as scr				# Necessary conditions for valid placements
+import generators as gnr			# Constructive generation of random placements
 from network import Network
+from moves import HomoMoveState
+from moves import MoveIndex
+
+# Codes of the grid and phys entries
+empty = gen.grid_codes["X"]
+(all_sides, north, east, south, west, no_phys) = [gen.phys_codes[x] for x in ["A","N","E","S","W","X"]]
+
+# Relabeling of 1-PHY chiplets when mirroring the rows or the columns of a grid or when transposing a square grid.
+# Entry i is the code that replaces code i.
+get_relabeling = lambda mapping : np.array([gen.phys_codes[mapping.get(x, x)] for x in gen.phys_letters], dtype = np.int8)
+relabel_rows = get_relabeling({"N" : "S", "S" : "N"})
+relabel_cols = get_relabeling({"E" : "W", "W" : "E"})
+relabel_transpose = get_relabeling({"N" : "E", "E" : "N", "S" : "W", "W" : "S"})
+
+# Return all grid/phys pairs that are equivalent to the given one under mirroring and, for square grids, 90° rotations.
+# Mirroring the rows, mirroring the columns, and transposing the grid generate all eight symmetries of a square.
+def get_symmetric_variants(grid, phys):
+	variants = [(grid, phys)]
+	if grid.shape[0] == grid.shape[1]:
+		variants.append((grid.T, relabel_transpose[phys.T]))
+	variants += [(g[::-1], relabel_rows[p[::-1]]) for (g, p) in variants]
+	variants += [(g[:,::-1], relabel_cols[p[:,::-1]]) for (g, p) in variants]
+	return variants
+
+# Hash of a grid/phys pair
+def get_grid_hash(grid, phys):
+	return gen.get_genome_hash(grid, phys)
 
 # Placement representation for homogeneous chiplets
 class HomoPlacement:
 	# If no grid is passed, initialize a random grid
 	# Grid: 2D-array with entries C, M, I, (compute, memory, io) or X (no chiplet)
 	# PHYs: 2D-array with entries A (phys of four sides) or N,E,S,W (north, east, south, west)
-	def __init__(self, params, grid = None, phys = None):
+	# Both are passed as lists of letters or as int8-arrays of their codes and are stored as the latter
+	# Parent: Placement this one was derived from, its evaluation is reused if delta evaluation is enabled
+	# Deferred: Only validate the placement, the proxies are computed later for a whole batch of placements
+	# Known: (validity, cost, evaluation) computed elsewhere (e.g., by a worker process) that is used instead of evaluating
+	def __init__(self, params, grid = None, phys = None, parent = None, deferred = False, known = None):
 		self.params = params
+		self.proxy_state = None
+		self.pending = None
+		self.move_state = None
+		self.move_index = None
+		self.move_index_source = None
 		# Parameterized initialization: This can create an invalid placement
-		if grid != None and phys != None:
-			self.grid = grid
-			self.phys= phys
-			network = self.get_network()
-			valid = network.validate()
-			self.is_valid = valid
+		if grid is not None and phys is not None:
+			self.grid = gen.encode(grid, gen.grid_codes)
+			self.phys = gen.encode(phys, gen.phys_codes)
 			self.hash = self.compute_hash()
-			if valid:
-				(cost, evaluation) = hspx.compute_highspeed_proxies(self.get_area(), network, params)
-				self.cost = cost
-				self.eval = evaluation
+			self.evaluate(parent, deferred, known)
+		# Constructive random initialization: This produces a valid placement without rejection sampling
+		elif params["random_generator"] == "constructive":
+			self.init_constructive(deferred)
 		# Random initialization: This always produces a valid placement
-		else:
+		elif params["random_generator"] == "rejection":
 			# Gather information
 			rows = params["rows"]
 			cols = params["cols"]
@@ -81,48 +120,105 @@ class HomoPlacement:
 						else:
 							print("ERROR: Chiplets in the homogeneous placement can only have 1 or four PHYs")
 							sys.exit()
-				network = self.get_network()
-				valid = network.validate()
-			# Once a valid grid was found: Compute its cost and store it
-			self.is_valid = valid
-			(cost, evaluation) = hspx.compute_highspeed_proxies(self.get_area(), network, params)
-			self.cost = cost
-			self.eval = evaluation
+				self.grid = gen.encode(self.grid, gen.grid_codes)
+				self.phys = gen.encode(self.phys, gen.phys_codes)
+				self.hash = self.compute_hash()
+				self.evaluate(deferred = deferred)
+				valid = self.is_valid
+				prf.count("random_attempts")
+			prf.count("random_placements")
 			self.origin = "random"
+		else:
+			print("ERROR: Invalid random generator \"%s\"" % params["random_generator"])
+			sys.exit()
+
+	# Construct a random placement that is valid by construction, optionally followed by validity-preserving moves
+	def init_constructive(self, deferred = False):
+		valid = False
+		while not valid:
+			(grid, phys) = gnr.construct_homo_genome(self.params)
+			genome = (gen.encode(grid, gen.grid_codes).tolist(), gen.encode(phys, gen.phys_codes).tolist())
+			n_moves = self.params["generator_mixing"] * (self.params["n_compute"] + self.params["n_memory"] + self.params["n_io"])
+			genome = gnr.mix_genome(genome, lambda g : gnr.propose_homo_move(g, self.params), lambda g, state : g if gnr.is_valid_homo(g[0], g[1], self.params) else None, n_moves)
+			self.grid = np.array(genome[0], dtype = np.int8)
+			self.phys = np.array(genome[1], dtype = np.int8)
 			self.hash = self.compute_hash()
+			self.evaluate(deferred = deferred)
+			valid = self.is_valid
+			prf.count("random_attempts")
+		prf.count("random_placements")
+		self.origin = "random"
+
+	# Evaluate the placement: Look it up in the evaluation cache or extract and validate its network and compute the proxies
+	# With canonical hashing, the placement is evaluated in its canonical orientation
+	def evaluate(self, parent = None, deferred = False, known = None):
+		cached = known if known != None else evc.lookup(self.hash, self.params)
+		if cached != None:
+			(self.is_valid, cost, evaluation) = cached
+		else:
+			network = self.get_network(self.params["canonical_hash"])
+			self.is_valid = network.validate()
+			# Keep the network of a valid placement until the proxies are computed by the batch evaluation
+			if deferred and self.is_valid:
+				self.pending = network
+				return
+			(cost, evaluation) = self.compute_proxies(network, parent) if self.is_valid else (None, None)
+			evc.insert(self.hash, self.params, self.is_valid, cost, evaluation)
+		if self.is_valid:
+			self.cost = cost
+			self.eval = evaluation
+
+	# Set the proxies of a placement whose evaluation was deferred
+	def set_evaluation(self, cost, evaluation):
+		self.pending = None
+		self.cost = cost
+		self.eval = evaluation
+		evc.insert(self.hash, self.params, True, cost, evaluation)
+
+	# Compute the performance proxies, incrementally based on the parent if delta evaluation is enabled
+	def compute_proxies(self, network, parent = None):
+		if not self.params["delta_evaluation"]:
+			return hspx.compute_highspeed_proxies(self.get_area(), network, self.params)
+		parent_state = parent.proxy_state if parent != None else None
+		(cost, evaluation, self.proxy_state) = dpx.compute_highspeed_proxies_delta(self.get_area(), network, self.params, parent_state)
+		return (cost, evaluation)
 
 	# Store grid as JSON
 	def to_json(self):
 		json = {
-			"grid" : self.grid,
-			"phys" : self.phys,
+			"grid" : gen.decode(self.grid, gen.grid_letters),
+			"phys" : gen.decode(self.phys, gen.phys_letters),
 			"cost" : self.cost,
 			"eval" : self.eval,
 		}
 		return json
 
+	# Return the genome, i.e., the grid and phys as int8-arrays of codes
+	def get_genome(self):
+		return (self.grid, self.phys)
+
 	# Create a visualization of the placement
 	def visualize(self, fig_name = "homogeneous_placement"):
 		# Fetch data
-		grid = self.grid
-		phys = self.phys
-		rows = len(self.grid)
-		cols = len(self.grid[0])
+		grid = gen.decode(self.grid, gen.grid_letters)
+		phys = gen.decode(self.phys, gen.phys_letters)
+		rows = len(grid)
+		cols = len(grid[0])
 
 		# Create plot
 		(fig, ax) = plt.subplots(1, 1, figsize = (3, 3 * rows / cols))
 		plt.subplots_adjust(left=0.01, right = 0.99, top = 0.99, bottom = 0.0)
 		for row in range(rows):
 			for col in range(cols):
-				if self.grid[row][col] != "X":
+				if grid[row][col] != "X":
 					# Plot Chiplet	
-					c = cfg.plotting_color_map[self.grid[row][col]]
+					c = cfg.plotting_color_map[grid[row][col]]
 					rectangle = plt.Rectangle((col+0.03,row+0.03), 0.94, 0.94, fc = c, fill = True, alpha = 1.0)
 					ax.add_patch(rectangle)
 					ax.text(col + 0.5, row + 0.5, grid[row][col], ha = "center", va = "center", fontweight = "bold", fontsize = 6)
 					# Plot PHYs
 					tmp = {"A" : [(0.15,0.5),(0.85,0.5),(0.5,0.15),(0.5,0.85)], "N" : [(0.5,0.85)], "E" : [(0.85,0.5)], "S" : [(0.5,0.15)], "W" : [(0.15,0.5)]}
-					for (px,py) in tmp[self.phys[row][col]]:	
+					for (px,py) in tmp[phys[row][col]]:	
 						circ = plt.Circle((col + px, row + py), 0.1, fc = cfg.plotting_color_map["phy"], fill = True, zorder = 3, edgecolor = "#666666")
 						ax.add_patch(circ)
 					# Plot link to right
@@ -144,14 +240,19 @@ class HomoPlacement:
 		plt.savefig("plots/" + fig_name + ".pdf")
 
 	# Extract the network topology from the placement
-	def get_network(self):
+	# Canonical: Extract it from the canonical orientation, such that all symmetric placements share the same evaluation
+	@prf.timed("get_network")
+	def get_network(self, canonical = False):
 		# Gather data
-		grid = self.grid
-		phys = self.phys
+		(grid, phys) = self.get_canonical_grid() if canonical else (self.grid, self.phys)
+		# Skip the extraction if the placement cannot be valid
+		if self.params["prefilter"] and not scr.screen_homo(grid, phys, self.params):
+			return Network(None, None, None, None, None)
+		(grid, phys) = (grid.tolist(), phys.tolist())
 		rows = len(grid)
 		cols = len(grid[0])
 		# Initialize variables to store network
-		n = sum([(1 if grid[r][c] in ["C","M","I"] else 0) for r in range(rows) for c in range(cols)])
+		n = sum([(1 if grid[r][c] != empty else 0) for r in range(rows) for c in range(cols)])
 		pos_to_cid = {}
 		node_types = []
 		neighbors = [[] for i in range(n)]
@@ -159,24 +260,24 @@ class HomoPlacement:
 		# Iterate through chiplets
 		for row in range(rows):
 			for col in range(cols):
-				if grid[row][col] in ["C","M","I"]:
+				if grid[row][col] != empty:
 					# Add vertex (chiplet)
 					cid = len(node_types)
 					pos_to_cid[(row,col)] = cid
-					node_types.append(grid[row][col])
+					node_types.append(gen.grid_letters[grid[row][col]])
 					# Add edge (link to right)
-					if col > 0 and grid[row][col] != "X" and grid[row][col-1] != "X" and phys[row][col] in ["A","W"] and phys[row][col-1] in ["A","E"]:
-						phy1 = 0 if phys[row][col] == "W" else 3
-						phy2 = 0 if phys[row][col-1] == "E" else 1
+					if col > 0 and grid[row][col-1] != empty and phys[row][col] in [all_sides, west] and phys[row][col-1] in [all_sides, east]:
+						phy1 = 0 if phys[row][col] == west else 3
+						phy2 = 0 if phys[row][col-1] == east else 1
 						ocid = pos_to_cid[(row,col-1)]
 						neighbors[cid].append(ocid)
 						phy_map[cid].append((phy1, phy2))
 						neighbors[ocid].append(cid)
 						phy_map[ocid].append((phy2, phy1))
 					# Add edge (link to top)
-					if row > 0 and grid[row][col] != "X" and grid[row-1][col] != "X" and phys[row][col] in ["A","S"] and phys[row-1][col] in ["A","N"]:
-						phy1 = 0 if phys[row][col] == "S" else 2
-						phy2 = 0 if phys[row-1][col] == "N" else 0
+					if row > 0 and grid[row-1][col] != empty and phys[row][col] in [all_sides, south] and phys[row-1][col] in [all_sides, north]:
+						phy1 = 0 if phys[row][col] == south else 2
+						phy2 = 0 if phys[row-1][col] == north else 0
 						ocid = pos_to_cid[(row-1,col)]
 						neighbors[cid].append(ocid)
 						phy_map[cid].append((phy1, phy2))
@@ -189,84 +290,135 @@ class HomoPlacement:
 	def get_area(self):
 		return self.params["dimensions"]["C"][0] * self.params["dimensions"]["C"][1] * self.params["rows"] * self.params["cols"]
 
-	# Perform a random mutation of the placement
-	def mutate(self):
+	# Propose a random mutation of the placement. Returns the mutated genome and the swaps and rotations that derive the
+	# mutant's move index from this one, or None if the mutant was rejected by the move screening.
+	def propose_mutation(self):
 		# Gather data
 		bias = self.params["mutation_bias"]
 		rows = len(self.grid)
 		cols = len(self.grid[0])
 		grid = self.grid
 		phys = self.phys
+		index = self.get_move_index()
+		rand_num = rnd.random()
+		new_grid = grid.copy()
+		new_phys = phys.copy()
+		changed = []
+		swaps = []
+		rotations = []
+		can_rotate = index.count_rotatable() > 0
+		# Swap Chiplets 
+		if "both" in self.params["mutation_mode"] or (rand_num >= bias) or (not can_rotate):
+			if "any" in self.params["mutation_mode"]:
+				# Select first chiplet to swap
+				r1 = rnd.randint(0, rows-1)
+				c1 = rnd.randint(0, cols-1)
+				typ1 = int(grid[r1,c1])
+				# Select second chiplet to swap: This has to be a different type than the first one
+				(r2,c2) = divmod(index.find_other(typ1, rnd.randrange(index.count_other(typ1))), cols)
+				typ2 = int(grid[r2,c2])
+			elif "neighbors" in self.params["mutation_mode"]:
+				# Select one of the valid swapping pairs
+				(cell1, cell2) = index.find_pair(rnd.randrange(index.count_pairs()))
+				((r1,c1),(r2,c2)) = (divmod(cell1, cols), divmod(cell2, cols))
+				(typ1, typ2) = (int(grid[r1,c1]), int(grid[r2,c2]))
+			else:
+				print("ERROR: Invalid mutation mode: \"%s\"" % self.params["mutation_mode"])
+				sys.exit()
+			# Perform the swap
+			new_grid[r1,c1] = typ2
+			new_grid[r2,c2] = typ1
+			(new_phys[r1,c1], new_phys[r2,c2]) = (phys[r2,c2], phys[r1,c1])
+			changed += [(r1,c1),(r2,c2)]
+			swaps.append((r1 * cols + c1, r2 * cols + c2))
+		# Rotate Chiplet
+		if ("both" in self.params["mutation_mode"] or (rand_num < bias)) and can_rotate:
+			(row, col) = divmod(index.find_rotatable(rnd.randrange(index.count_rotatable())), cols)
+			valid_choices = [north, east, south, west]
+			# Make sure the singly PHY doesn't face outside
+			if row == 0:
+				valid_choices.remove(south)
+			if row == (rows-1):
+				valid_choices.remove(north)
+			if col == 0:
+				valid_choices.remove(west)
+			if col == (cols-1):
+				valid_choices.remove(east)
+			# Make sure we actually rotate the chiplet
+			if phys[row,col] in valid_choices:
+				valid_choices.remove(phys[row,col])
+			# Perform the rotation
+			new_phys[row,col] = rnd.choice(valid_choices)
+			changed.append((row,col))
+			rotations.append((row * cols + col, True))
+		# Reject mutants that are invalid according to the connectivity of this placement without evaluating them.
+		# The random choices are the same as without screening, hence, the same mutant is proposed.
+		if self.params["move_screening"]:
+			cells = set([(r,c) for (r,c) in changed if new_grid[r,c] != grid[r,c] or new_phys[r,c] != phys[r,c]])
+			feasible = self.get_move_state().check(new_grid, new_phys, cells)
+			prf.count("screened_mutants" if feasible == False else ("unscreened_mutants" if feasible == None else "feasible_mutants"))
+			if feasible == False:
+				prf.count("mutation_attempts")
+				return None
+		return ((new_grid, new_phys), swaps, rotations)
+
+	# Construct the mutant of a proposal of propose_mutation
+	def get_mutant(self, proposal, deferred = False, known = None):
+		((grid, phys), swaps, rotations) = proposal
+		mutant = HomoPlacement(self.params, grid, phys, parent = self, deferred = deferred, known = known)
+		mutant.origin = "mutate"
+		# The mutant derives its move index from this one when it is mutated itself
+		mutant.move_index_source = (self.get_move_index(), swaps, rotations)
+		return mutant
+
+	# Perform a random mutation of the placement
+	@prf.timed("mutate")
+	def mutate(self, deferred = False):
 		valid = False
 		# Perform random mutations until a valid placement is achieved
 		while not valid:
-			rand_num = rnd.random()
-			new_grid = copy.deepcopy(grid)
-			new_phys = copy.deepcopy(phys)
-			can_rotate = sum([sum([(1 if (x in ["N","E","S","W"]) else 0) for x in y]) for y in self.phys]) > 0
-			# Swap Chiplets 
-			if "both" in self.params["mutation_mode"] or (rand_num >= bias) or (not can_rotate):
-				if "any" in self.params["mutation_mode"]:
-					# Select first chiplet to swap
-					r1 = rnd.randint(0, rows-1)
-					c1 = rnd.randint(0, cols-1)
-					typ1 = grid[r1][c1]
-					# Select second chiplet to swap: This has to be a different type than the first one
-					candidates = [(r,c) for r in range(rows) for c in range(cols) if grid[r][c] != typ1]
-					(r2,c2) = rnd.choice(candidates)
-					typ2 = grid[r2][c2]
-				elif "neighbors" in self.params["mutation_mode"]:
-					# Construct list of valid swapping pairs: 
-					candidates = []
-					for r in range(rows-1):
-						for c in range(cols-1):
-							if grid[r][c] != grid[r+1][c]:
-								candidates.append(((r,c),(r+1,c)))
-							if grid[r][c] != grid[r][c+1]:
-								candidates.append(((r,c),(r,c+1)))
-					((r1,c1),(r2,c2)) = rnd.choice(candidates)
-					(typ1, typ2) = (grid[r1][c1],grid[r2][c2])
-				else:
-					print("ERROR: Invalid mutation mode: \"%s\"" % self.params["mutation_mode"])
-					sys.exit()
-				# Perform the swap
-				new_grid[r1][c1] = typ2
-				new_grid[r2][c2] = typ1
-				tmp = new_phys[r1][c1]
-				new_phys[r1][c1] = new_phys[r2][c2]
-				new_phys[r2][c2] = tmp
-			# Rotate Chiplet
-			if ("both" in self.params["mutation_mode"] or (rand_num < bias)) and can_rotate:
-				valid_locations = [(row,col) for row in range(rows) for col in range(cols) if phys[row][col] not in ["X","A"]]
-				(row, col) = rnd.choice(valid_locations)
-				valid_choices = ["N","E","S","W"]
-				# Make sure the singly PHY doesn't face outside
-				if row == 0:
-					valid_choices.remove("S")
-				if row == (rows-1):
-					valid_choices.remove("N")
-				if col == 0:
-					valid_choices.remove("W")
-				if col == (cols-1):
-					valid_choices.remove("E")
-				# Make sure we actually rotate the chiplet
-				if phys[row][col] in valid_choices:
-					valid_choices.remove(phys[row][col])
-				# Perform the rotation
-				new_phys[row][col] = rnd.choice(valid_choices)
-			# Construct mutated object
-			mutant = HomoPlacement(self.params, new_grid, new_phys)
+			proposal = self.propose_mutation()
+			if proposal == None:
+				continue
+			mutant = self.get_mutant(proposal, deferred)
 			valid = mutant.is_valid
-		mutant.origin = "mutate"
+			prf.count("mutation_attempts")
+		prf.count("mutants")
 		return mutant
 
-	# Merge two placements into a third one	
-	def merge(self, other):
+	# Return the index of swap- and rotation-candidates: Derive it from the parent's index or build it
+	def get_move_index(self):
+		if self.move_index == None:
+			if self.move_index_source != None:
+				(index, swaps, rotations) = self.move_index_source
+				self.move_index = index.copy()
+				for (a, b) in swaps:
+					self.move_index.swap(a, b)
+				for (pos, flag) in rotations:
+					self.move_index.set_rotatable(pos, flag)
+				self.move_index_source = None
+			else:
+				(rows, cols) = self.grid.shape
+				# Pairs in the order of the "neighbors" mode: For each cell (except the last row and column) first the one above, then the one to the right
+				pairs = [pair for r in range(rows-1) for c in range(cols-1) for pair in [(r*cols+c, (r+1)*cols+c), (r*cols+c, r*cols+c+1)]]
+				# Chiplets with a single PHY can be rotated
+				rotatable = [x not in [no_phys, all_sides] for x in self.phys.ravel().tolist()]
+				self.move_index = MoveIndex(self.grid.ravel().tolist(), pairs, rotatable)
+		return self.move_index
+
+	# Return the connectivity information that is used to screen the mutants of this (valid) placement
+	def get_move_state(self):
+		if self.move_state == None:
+			self.move_state = HomoMoveState(self.grid, self.phys, self.params["relay_chiplets"])
+		return self.move_state
+
+	# Propose a merger of two placements: Returns its genome as int8-arrays
+	def propose_merge(self, other):
 		# Gather data
-		grid1 = self.grid
-		grid2 = other.grid
-		phys1 = self.phys
-		phys2 = other.phys
+		grid1 = gen.decode(self.grid, gen.grid_letters)
+		grid2 = gen.decode(other.grid, gen.grid_letters)
+		phys1 = gen.decode(self.phys, gen.phys_letters)
+		phys2 = gen.decode(other.phys, gen.phys_letters)
 		rows = len(grid1)
 		cols = len(grid1[0])
 		# Initialize the new, merged placement
@@ -287,77 +439,96 @@ class HomoPlacement:
 					# Only set the rotation if the type was matching
 					if phys1[row][col] == phys2[row][col]:
 						phys[row][col] = phys1[row][col]
-		# Pass 2: Place remaining chiplets: 50/50 chance from which parent it is selected, repeat until valid
+		# Pass 2: Place remaining chiplets: 50/50 chance from which parent it is selected
+		# Phase 2 - Step 1: Complete the grid, copy rotation if possible
+		new_grid = [list(row) for row in grid]
+		new_phys = [list(row) for row in phys]
+		to_place_tmp = dict(to_place)
+		for row in range(rows):
+			for col in range(cols):
+				if new_grid[row][col] == None:
+					typ1 = grid1[row][col]
+					typ2 = grid2[row][col]
+					if rnd.random() < 0.5 and to_place_tmp[typ1] > 0:
+						new_grid[row][col] = typ1
+						to_place_tmp[typ1] -= 1
+						new_phys[row][col] = phys1[row][col]
+					elif to_place_tmp[typ2] > 0:
+						new_grid[row][col] = typ2
+						to_place_tmp[typ2] -= 1
+						new_phys[row][col] = phys2[row][col]
+					elif sum(list(to_place_tmp.values())) > 0:
+						typ = rnd.choices(list(to_place_tmp.keys()), [x / sum(list(to_place_tmp.values())) for x in to_place_tmp.values()], k=1)[0]
+						new_grid[row][col] = typ
+						to_place_tmp[typ] -= 1
+					else:
+						print("ERROR: Unable to merge two placements")
+						sys.exit()
+		# Phase 2 - Step 1: Complete the phys once the grid is complete 
+		for row in range(rows):
+			for col in range(cols):
+				if new_phys[row][col] == None:
+					if new_grid[row][col] == "X":
+						new_phys[row][col] = "X"
+					elif len(self.params["phys"][new_grid[row][col]]) == 4:
+						new_phys[row][col] = "A"
+					else:
+						valid_choices = ["N","E","S","W"]
+						# Make sure the singly PHY doesn't face outside
+						if row == 0:
+							valid_choices.remove("S")
+						if row == (rows-1):
+							valid_choices.remove("N")
+						if col == 0:
+							valid_choices.remove("W")
+						if col == (cols-1):
+							valid_choices.remove("E")
+						new_phys[row][col] = rnd.choice(valid_choices)
+		return (gen.encode(new_grid, gen.grid_codes), gen.encode(new_phys, gen.phys_codes))
+
+	# Construct the merger of a genome proposed by propose_merge
+	def get_merger(self, other, genome, deferred = False, known = None):
+		merger = HomoPlacement(self.params, genome[0], genome[1], deferred = deferred, known = known)
+		merger.origin = "merge"
+		return merger
+
+	# Merge two placements into a third one, repeat until the merger is valid
+	@prf.timed("merge")
+	def merge(self, other, deferred = False):
 		valid = False
 		while not valid:
-			# Phase 2 - Step 1: Complete the grid, copy rotation if possible
-			new_grid = copy.deepcopy(grid)
-			new_phys = copy.deepcopy(phys)
-			to_place_tmp = copy.deepcopy(to_place)
-			for row in range(rows):
-				for col in range(cols):
-					if new_grid[row][col] == None:
-						typ1 = grid1[row][col]
-						typ2 = grid2[row][col]
-						if rnd.random() < 0.5 and to_place_tmp[typ1] > 0:
-							new_grid[row][col] = typ1
-							to_place_tmp[typ1] -= 1
-							new_phys[row][col] = phys1[row][col]
-						elif to_place_tmp[typ2] > 0:
-							new_grid[row][col] = typ2
-							to_place_tmp[typ2] -= 1
-							new_phys[row][col] = phys2[row][col]
-						elif sum(list(to_place_tmp.values())) > 0:
-							typ = rnd.choices(list(to_place_tmp.keys()), [x / sum(list(to_place_tmp.values())) for x in to_place_tmp.values()], k=1)[0]
-							new_grid[row][col] = typ
-							to_place_tmp[typ] -= 1
-						else:
-							print("ERROR: Unable to merge two placements")
-							sys.exit()
-			# Phase 2 - Step 1: Complete the phys once the grid is complete 
-			for row in range(rows):
-				for col in range(cols):
-					if new_phys[row][col] == None:
-						if new_grid[row][col] == "X":
-							new_phys[row][col] = "X"
-						elif len(self.params["phys"][new_grid[row][col]]) == 4:
-							new_phys[row][col] = "A"
-						else:
-							valid_choices = ["N","E","S","W"]
-							# Make sure the singly PHY doesn't face outside
-							if row == 0:
-								valid_choices.remove("S")
-							if row == (rows-1):
-								valid_choices.remove("N")
-							if col == 0:
-								valid_choices.remove("W")
-							if col == (cols-1):
-								valid_choices.remove("E")
-							new_phys[row][col] = rnd.choice(valid_choices)
-			merger = HomoPlacement(self.params, new_grid, new_phys)
+			merger = self.get_merger(other, self.propose_merge(other), deferred)
 			valid = merger.is_valid
-		merger.origin = "merge"
-		return merger	
+			prf.count("merge_attempts")
+		prf.count("mergers")
+		return merger
 
 	# Compute a unique hash function
+	# If canonical hashing is enabled, all symmetric placements share the hash of the smallest member of their orbit
 	def compute_hash(self):
-		rows = len(self.grid)
-		cols = len(self.grid[0])
-		return "".join([(self.grid[row][col] + self.phys[row][col]) for row in range(rows) for col in range(cols)])
+		if self.params["canonical_hash"]:
+			return min([get_grid_hash(grid, phys) for (grid, phys) in get_symmetric_variants(self.grid, self.phys)])
+		return get_grid_hash(self.grid, self.phys)
+
+	# Return the grid and phys of the orbit-member with the smallest hash
+	def get_canonical_grid(self):
+		return min(get_symmetric_variants(self.grid, self.phys), key = lambda variant : get_grid_hash(variant[0], variant[1]))
 
 	# Export this placement to the RapidChiplet toolchain
 	def export(self, path, algo):
 		# Gather data
-		rows = len(self.grid)
-		cols = len(self.grid[0])
+		grid = gen.decode(self.grid, gen.grid_letters)
+		phys = gen.decode(self.phys, gen.phys_letters)
+		rows = len(grid)
+		cols = len(grid[0])
 
 		# Store the "chiplet_placement" file that RapidChiplet uses as an input
 		placement = {"chiplets" : [], "interposer_routers" : []}
 		for row in range(rows):
 			for col in range(cols):
-				if self.grid[row][col] in ["C","M","I"]:
-					typ = self.grid[row][col]
-					ori = {"A" : 0, "E" : 0, "S" : 270, "W" : 180, "N" : 90}[self.phys[row][col]]
+				if grid[row][col] in ["C","M","I"]:
+					typ = grid[row][col]
+					ori = {"A" : 0, "E" : 0, "S" : 270, "W" : 180, "N" : 90}[phys[row][col]]
 					chiplet = {
 						"position" 	: {"x" : col * self.params["dimensions"][typ][0], "y" : row * self.params["dimensions"][typ][1]},
 						"rotation"	: ori,
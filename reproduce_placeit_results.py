@@ -16,6 +16,9 @@ mode = "main"
 # Configure the experiments to run here
 experiments = ["32cores_homo","64cores_homo","32cores_hetero","64cores_hetero"]
 
+# Number of worker processes for the optimization (0: one per CPU)
+workers = 0
+
 # Reproduce all data from the PlaceIT paper
 # Note: This takes multiple days to run!
 def reproduce_placeit_results(mode):
@@ -24,11 +27,10 @@ def reproduce_placeit_results(mode):
 	#############################################################################################################
 	# Perform optimization of placements and topologies															#
 	#############################################################################################################
-	# Run all experiments sequentially to avoid slowdowns due to Pythons global interpreter lock (GIL).
-	# This takes approximately 5 days.
-	exp_threads = []
-	for (i, exp) in enumerate(experiments):
-		rexp.run_experiment(exp)
+	# Run all repetitions of all algorithms of all experiments as independent jobs in a pool of worker processes
+	# (processes avoid slowdowns due to Pythons global interpreter lock (GIL)).
+	# This takes approximately 5 days if only one worker is used.
+	rexp.run_experiments_parallel(experiments, workers)
 
 	#############################################################################################################
 	# Perform evaluation on synthetic traffic
@@ -110,4 +112,5 @@ def reproduce_placeit_results(mode):
 
 
 # NOTE: The mode in the config.py and plots.py needs to be set manually!!!
-reproduce_placeit_results(mode)
+if __name__ == "__main__":
+	reproduce_placeit_results(mode)
@@ -0,0 +1,114 @@
+# Import python libraries
+import sys
+import copy
+import time
+import platform
+import subprocess
+import statistics
+import random as rnd
+import numpy as np
+
+# Import our own files
+import config as cfg								# Configuration
+import placeit_helpers as hlp						# Helpers
+import highspeed_proxies as hspx					# Performance proxies
+from representation_homo import HomoPlacement		# Homogeneous placement
+from representation_hetero import HeteroPlacement	# Heterogeneous placement
+
+# Benchmark configuration
+bm_sizes = [32, 64, 128, 256]						# Numbers of compute-chiplets
+bm_repetitions = 5									# Number of placements per design size
+bm_seed = 0											# Random seed
+bm_mode = "appendix"								# PHYs and relay-chiplets as in the "main" or "appendix" configuration
+bm_grids = {32 : (4,10), 64 : (8,10), 128 : (16,10), 256 : (16,20)}	# Rows and columns of homogeneous placements
+
+# Construct the parameters of a design with the given number of compute-chiplets
+# Each design has one memory- and one IO-chiplet per eight compute-chiplets as in the experiments of the paper
+def get_benchmark_params(typ, n_compute):
+	params = copy.deepcopy(cfg.params_64cores_homo if typ == "homogeneous" else cfg.params_64cores_hetero)
+	params["experiment"] = "benchmark_%s_%d" % (typ, n_compute)
+	params["n_compute"] = n_compute
+	params["n_memory"] = n_compute // 8
+	params["n_io"] = n_compute // 8
+	(params["rows"], params["cols"]) = bm_grids[n_compute]
+	if typ == "homogeneous":
+		params["phys"] = cfg.phys_homo_2 if bm_mode == "appendix" else cfg.phys_homo
+	else:
+		params["phys"] = cfg.phys_hetero_2 if bm_mode == "appendix" else cfg.phys_hetero
+		params["rotation_behaviour"] = hlp.compute_rotation_behaviour(params)
+	params["relay_chiplets"] = ["C","M","I"] if bm_mode == "appendix" else ["C"]
+	# Time the full evaluation: No normalization, no caching, no incremental or deferred evaluation
+	params["cf_normalizers"] = {metric : 1 for metric in params["cf_weights"]}
+	params["eval_cache_size"] = 0
+	params["delta_evaluation"] = False
+	params["batch_evaluation"] = False
+	return params
+
+# Call a function and return its result and the elapsed wall time
+def time_call(function, *args):
+	start = time.perf_counter()
+	result = function(*args)
+	return (result, time.perf_counter() - start)
+
+# Summarize the timings of one operation
+def summarize(timings):
+	return {"calls" : len(timings), "min" : min(timings), "median" : statistics.median(timings), "mean" : statistics.mean(timings)}
+
+# Time the core operations on seeded random placements of one design
+def benchmark_design(typ, n_compute):
+	params = get_benchmark_params(typ, n_compute)
+	representation = HomoPlacement if typ == "homogeneous" else HeteroPlacement
+	# The seed only depends on the design such that each design can be benchmarked on its own
+	rnd.seed(bm_seed * 1000 + n_compute + (0 if typ == "homogeneous" else 500))
+	timings = {}
+	add = lambda operation, elapsed : timings.setdefault(operation, []).append(elapsed)
+	(placements, elapsed) = ([], [])
+	for i in range(bm_repetitions + 1):
+		(placement, t) = time_call(representation, params)
+		placements.append(placement)
+		elapsed.append(t)
+	for (placement, other) in zip(placements[:-1], placements[1:]):
+		# Network extraction
+		if typ == "heterogeneous":
+			placement.placement = None
+			add("construct_placement", time_call(placement.construct_placement)[1])
+			add("get_network_internal", time_call(placement.placement.get_network_internal)[1])
+		(network, t) = time_call(placement.get_network)
+		add("get_network", t)
+		add("validate", time_call(network.validate)[1])
+		add("compute_highspeed_proxies", time_call(hspx.compute_highspeed_proxies, placement.get_area(), network, params)[1])
+		# Variation operators, including their retries until a valid placement is found
+		add("mutate", time_call(placement.mutate)[1])
+		add("merge", time_call(placement.merge, other)[1])
+	results = {operation : summarize(timings[operation]) for operation in timings}
+	results["random_placement"] = summarize(elapsed)
+	results["n_chiplets"] = params["n_compute"] + params["n_memory"] + params["n_io"]
+	return results
+
+# Return the current git revision, None if it cannot be determined
+def get_revision():
+	try:
+		return subprocess.run(["git", "rev-parse", "HEAD"], capture_output = True, text = True, check = True).stdout.strip()
+	except (OSError, subprocess.CalledProcessError):
+		return None
+
+# Run all benchmarks and store the results in a JSON file
+def run_benchmarks(path):
+	results = {
+		"revision" : get_revision(),
+		"python" : platform.python_version(),
+		"numpy" : np.__version__,
+		"settings" : {"sizes" : bm_sizes, "repetitions" : bm_repetitions, "seed" : bm_seed, "mode" : bm_mode},
+		"results" : {},
+	}
+	for typ in ["homogeneous", "heterogeneous"]:
+		results["results"][typ] = {}
+		for n_compute in bm_sizes:
+			print("Benchmarking the %s representation with %d compute-chiplets" % (typ, n_compute))
+			results["results"][typ][str(n_compute)] = benchmark_design(typ, n_compute)
+	hlp.write_file(path, results)
+
+# If this script is called directly
+if __name__ == "__main__":
+	# The output file can be passed as a command line argument
+	run_benchmarks(sys.argv[1] if len(sys.argv) > 1 else "results/benchmarks.json")
@@ -1,11 +1,16 @@
 # Import python libraries
+import os
 import sys
+import hashlib
 import random as rnd
+import concurrent.futures
 
 # Import our own files
 import optimizer_best_random as obr					# Best Random
 import optimizer_genetic_algorithm as oga			# Genetic Algorithm
 import optimizer_simulated_annealing as osa			# Simulated Annealing
+import optimizer_parallel_tempering as opt			# Parallel Tempering
+import optimizer_island_genetic_algorithm as oig	# Island Genetic Algorithm
 import create_baseline as cb						# Create baseline placements
 import placeit_helpers as hlp						# Helpers
 import config as cfg								# Configuration
@@ -15,10 +20,32 @@ optimizers = {
 	"br" : obr.optimizer_best_random,
 	"ga" : oga.optimizer_genetic_algorithm,
 	"sa" : osa.optimizer_simulated_annealing,
+	"pt" : opt.optimizer_parallel_tempering,
+	"ig" : oig.optimizer_island_genetic_algorithm,
 }
 
-# Runs all algorithms for one experiment (one architecture)
-def run_experiment(exp):
+# Optimizers that can continue an interrupted run from its checkpoint
+resumable = ["br", "ga", "sa"]
+
+# Derive the seed of a job from its experiment, algorithm and repetition, i.e., independently of the order of the jobs
+def get_job_seed(exp, algo, rep):
+	return int.from_bytes(hashlib.sha256(("%s_%s_%d" % (exp, algo, rep)).encode()).digest()[:8], "little")
+
+# Check if the results of a run are stored
+def is_finished(save_name):
+	return os.path.exists("results/%s.json" % save_name)
+
+# Run an optimizer, with resume = True a finished run is skipped and an interrupted one continues from its checkpoint
+def run_optimizer(algo, typ, params, save_name, resume = False):
+	if resume and is_finished(save_name):
+		print("Skipping \"%s\": results are stored" % save_name)
+	elif resume and algo in resumable:
+		optimizers[algo](typ, params, save_name, resume = True)
+	else:
+		optimizers[algo](typ, params, save_name)
+
+# Prepare the parameters of an experiment (one architecture) and create its baseline placement
+def prepare_experiment(exp, resume = False):
 	# Set random seed to ensure reproducibility 
 	rnd.seed(0)
 	# Check if experiment name is valid
@@ -38,21 +65,74 @@ def run_experiment(exp):
 	# Compute cost function normalizers
 	params["cf_normalizers"] = hlp.compute_normalizers(params)
 	# Create the baseline placement
-	if "bl" in algos:
+	if "bl" in algos and not (resume and is_finished(exp + "_bl_0")):
 		cb.create_baseline(params)
+	return params
+
+# Runs all algorithms for one experiment (one architecture). Each run is seeded like a job of the parallel runner, hence,
+# the results neither depend on the runs before it nor on the runs that --resume skips.
+def run_experiment(exp, resume = False):
+	params = prepare_experiment(exp, resume)
+	algos = params["algorithms"]
 	# Execute the specified number of repetitions
 	for i in range(params["repetitions"]):	
 		# Run all optimization algorithms (but don't re-create the baseline each time)
 		for algo in [x for x in algos if x != "bl"]:
-			print("Running experiments of \"%s\" using the %s-algorithm: repetition %d" % (exp, algo.upper(), i))
-			optimizers[algo](typ, params, "%s_%s_%d" % (exp, algo, i))
+			run_job(exp, algo, i, params, resume)
+
+# Run one repetition of one algorithm, seeded by its experiment, algorithm and repetition
+def run_job(exp, algo, rep, params, resume = False):
+	rnd.seed(get_job_seed(exp, algo, rep))
+	if not (resume and is_finished("%s_%s_%d" % (exp, algo, rep))):
+		print("Running experiments of \"%s\" using the %s-algorithm: repetition %d" % (exp, algo.upper(), rep))
+	run_optimizer(algo, params["representation"], params, "%s_%s_%d" % (exp, algo, rep), resume)
+
+# Number of processes that a job keeps busy: Parallel tempering and the island GA run their chains or islands in
+# worker processes (their main process only coordinates), the GA runs its offspring pool next to its main process
+def get_job_processes(algo, params):
+	if algo == "pt":
+		return min(params["pt_chains"], params["pt_workers"] if params["pt_workers"] > 0 else os.cpu_count())
+	elif algo == "ig":
+		return min(params["ga_islands"], params["ga_workers"] if params["ga_workers"] > 0 else os.cpu_count())
+	elif algo == "ga" and params["ga_pool_workers"] > 0:
+		return params["ga_pool_workers"] + 1
+	return 1
+
+# Runs all algorithms for the given experiments on the given number of processes (0: one per CPU).
+# The normalizers and baselines are computed first, then all repetitions of all algorithms are independent jobs.
+# Each job is seeded by get_job_seed. BR, SA and GA charge their time budget with the CPU time of the job (including
+# the offspring pool of the GA), PT and IG charge it per worker process. To keep the budgets comparable, the CPUs
+# are not oversubscribed: Only as many jobs run at once as fit if each job keeps get_job_processes processes busy.
+# With resume = True, finished jobs are skipped and interrupted ones continue from their checkpoints.
+def run_experiments_parallel(exps, workers, resume = False):
+	jobs = []
+	for exp in exps:
+		params = prepare_experiment(exp, resume)
+		jobs += [(exp, algo, i, params, resume) for i in range(params["repetitions"]) for algo in params["algorithms"] if algo != "bl"]
+	if resume:
+		jobs = [job for job in jobs if not is_finished("%s_%s_%d" % job[:3])]
+	if len(jobs) == 0:
+		return
+	processes = workers if workers > 0 else os.cpu_count()
+	job_processes = max([get_job_processes(job[1], job[3]) for job in jobs])
+	n_jobs = max(1, processes // job_processes)
+	if job_processes > 1:
+		print("Jobs keep up to %d processes busy, running %d jobs at once on %d processes" % (job_processes, n_jobs, processes))
+	with concurrent.futures.ProcessPoolExecutor(max_workers = n_jobs) as pool:
+		futures = [pool.submit(run_job, *job) for job in jobs]
+		for future in futures:
+			future.result()
 		
 # If this script is called directly
 if __name__ == "__main__":
-	# The experiment name needs to be passed as a command line argument
-	if len(sys.argv) < 2:
-		print("usage: python3 run_experiment <experiment-name>")
+	# The experiment name needs to be passed as a command line argument, the number of worker processes and --resume are optional
+	args = [x for x in sys.argv[1:] if x != "--resume"]
+	resume = "--resume" in sys.argv[1:]
+	if len(args) < 1:
+		print("usage: python3 run_experiment <experiment-name> [<workers>] [--resume]")
 		sys.exit()
 	# Run experiment
-	run_experiment(sys.argv[1])
-
+	if len(args) > 1:
+		run_experiments_parallel([args[0]], int(args[1]), resume)
+	else:
+		run_experiment(args[0], resume)
@@ -0,0 +1,67 @@
+# Import python libraries
+import numpy as np
+
+# Import our own files
+import profiling as prf				# Per-stage timing counters
+import genomes as gen				# Integer-coded genomes
+from network import chiplet_types
+from geometry import fixed_point
+
+# Necessary conditions for the validity of a placement that are checked before its network is extracted.
+# Network.validate starts a DFS at the first compute-chiplet that only continues at relay-chiplets, hence, every other
+# chiplet of a valid placement is linked to a relay-chiplet. The checks use the links that could exist (homogeneous) or
+# pairs of chiplets whose PHYs could be close enough for a link (heterogeneous), i.e., they never reject a valid placement.
+
+# Return the first violated condition or None. linked and relay_linked state for each chiplet if it can be linked to
+# any chiplet and to a relay-chiplet, start is the chiplet at which the validation starts.
+def check_conditions(linked, relay_linked, start):
+	if len(linked) > 1 and not linked.all():
+		return "isolated_chiplet"
+	relay_linked[start] = True
+	if not relay_linked.all():
+		return "no_relay_link"
+	return None
+
+# Count the outcome of a screening and return True if the placement passed it
+def record(rejection):
+	prf.count("prefilter_checks")
+	if rejection != None:
+		prf.count("prefilter_" + rejection)
+		return False
+	return True
+
+# Screen a homogeneous placement given as grid/phys arrays, the chiplets are numbered row by row as in its network
+@prf.timed("prefilter")
+def screen_homo(grid, phys, params):
+	(empty, A, N, E, S, W) = (gen.grid_codes["X"], *[gen.phys_codes[x] for x in ["A","N","E","S","W"]])
+	occupied = grid != empty
+	relay = np.isin(grid, [gen.grid_codes[typ] for typ in params["relay_chiplets"]])
+	# Links between horizontally and vertically neighboring cells
+	east = occupied[:,:-1] & occupied[:,1:] & np.isin(phys[:,:-1], [A, E]) & np.isin(phys[:,1:], [A, W])
+	north = occupied[:-1,:] & occupied[1:,:] & np.isin(phys[:-1,:], [A, N]) & np.isin(phys[1:,:], [A, S])
+	linked = np.zeros(grid.shape, dtype = bool)
+	relay_linked = np.zeros(grid.shape, dtype = bool)
+	for (link, left, right) in [(east, (slice(None), slice(None, -1)), (slice(None), slice(1, None))), (north, slice(None, -1), slice(1, None))]:
+		linked[left] |= link
+		linked[right] |= link
+		relay_linked[left] |= link & relay[right]
+		relay_linked[right] |= link & relay[left]
+	(linked, relay_linked) = (linked[occupied], relay_linked[occupied])
+	start = int(np.argmax(grid[occupied] == gen.grid_codes["C"]))
+	return record(check_conditions(linked, relay_linked, start))
+
+# Screen a heterogeneous placement given as a Geometry. Two chiplets can only be linked if the bounding boxes of their
+# PHYs are at most max_length apart, the tolerance makes sure that no pair of PHYs within max_length is missed.
+@prf.timed("prefilter")
+def screen_hetero(geometry, params):
+	starts = geometry.phy_starts[:-1]
+	(low, high) = (np.minimum.reduceat(geometry.phy_pos, starts) / fixed_point, np.maximum.reduceat(geometry.phy_pos, starts) / fixed_point)
+	# Gap between the boxes of each pair of chiplets along both axes (zero if they overlap)
+	gap = np.maximum(0, np.maximum(low[None,:,:] - high[:,None,:], low[:,None,:] - high[None,:,:]))
+	dist = np.sqrt((gap * gap).sum(axis = 2)) if params["dist_type"] == "euclidean" else gap.sum(axis = 2)
+	adjacency = dist <= params["max_length"] * (1 + 1e-9)
+	np.fill_diagonal(adjacency, False)
+	types = np.array([chiplet_types.index(typ) for typ in geometry.types])
+	relay = np.isin(types, [chiplet_types.index(typ) for typ in params["relay_chiplets"]])
+	start = int(np.argmax(types == chiplet_types.index("C")))
+	return record(check_conditions(adjacency.any(axis = 1), adjacency[:,relay].any(axis = 1), start))